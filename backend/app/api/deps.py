@@ -1,3 +1,5 @@
+import re
+from datetime import timezone
 from typing import Generator
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -7,32 +9,52 @@ from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.core.config import settings
-from app.core.security import verify_password
+from app.core.security import create_access_token, verify_password
+from app.core.user_cache import user_cache
+from app.core.utils import get_utc_now
 from app.models.user import User
-from app.schemas.token import TokenPayload
+from app.models.subscription import Subscription, SubscriptionPlan
+from app.schemas.token import TokenPayload, TokenEntitlement
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"/v1/api/login")
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
+def decode_access_token(token: str) -> TokenPayload:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        token_data = TokenPayload(**payload)
+        return TokenPayload(**payload)
     except (jwt.JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
 
-    user = db.query(User).filter(User.id == token_data.sub).first()
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> User:
+    token_data = decode_access_token(token)
+
+    try:
+        user_id = int(token_data.sub)
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+
+    # Serve hot users from memory to skip a DB round trip on every request
+    user = user_cache.get(db, user_id)
+    if user:
+        return user
+
+    user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
+    user_cache.set(user)
     return user
 
 def get_current_active_user(
@@ -54,3 +76,73 @@ def get_current_active_superuser(
             detail="The user doesn't have enough privileges",
         )
     return current_user
+
+def get_user_entitlement(db: Session, user: User) -> TokenEntitlement:
+    """
+    Build a user's playback entitlement from their most recent active, paid subscription.
+    """
+    subscription = db.query(
+        Subscription.plan_id,
+        Subscription.end_date,
+        SubscriptionPlan.name,
+        SubscriptionPlan.duration_days,
+    ).join(
+        SubscriptionPlan, Subscription.plan_id == SubscriptionPlan.id
+    ).filter(
+        Subscription.user_id == user.id,
+        Subscription.is_active == True,
+        Subscription.payment_status == "paid",
+        Subscription.end_date > get_utc_now()
+    ).order_by(Subscription.end_date.desc()).first()
+
+    if not subscription:
+        return TokenEntitlement(is_active=user.is_active, is_superuser=user.is_superuser)
+
+    # Get plan name as a clean string (remove any numeric suffix completely)
+    plan_name = re.sub(r'\.\d+$', '', str(subscription.name)) if subscription.name else "Unknown"
+
+    # SQLite hands back naive datetimes; they are stored as UTC
+    end_date = subscription.end_date
+    if end_date.tzinfo is None:
+        end_date = end_date.replace(tzinfo=timezone.utc)
+
+    return TokenEntitlement(
+        is_active=user.is_active,
+        is_superuser=user.is_superuser,
+        plan_id=subscription.plan_id,
+        plan_name=plan_name,
+        plan_duration_days=subscription.duration_days,
+        expires_at=int(end_date.timestamp()),
+    )
+
+def create_user_access_token(db: Session, user: User) -> str:
+    """
+    Issue an access token for a user, embedding their entitlement when enabled.
+    """
+    entitlement = None
+    if settings.ENTITLEMENT_CLAIMS_ENABLED:
+        entitlement = get_user_entitlement(db, user).model_dump(exclude_none=True)
+
+    return create_access_token(user.id, entitlement=entitlement)
+
+def get_current_entitlement(
+    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> TokenEntitlement:
+    """
+    Authorize playback from the entitlement claim in the token when it was
+    issued to an active account and grants access, without touching the
+    database. Anything else falls back to the database, which checks that
+    the account is active and honours new purchases before the client
+    refreshes its token; so do tokens issued before the claim carried the
+    account state.
+
+    A granted claim is trusted until the token expires, so cancellations and
+    deactivations take effect on the next refresh or login.
+    """
+    token_data = decode_access_token(token)
+    entitlement = token_data.ent
+    if settings.ENTITLEMENT_CLAIMS_ENABLED and entitlement and entitlement.is_active and entitlement.has_access():
+        return entitlement
+
+    current_user = get_current_active_user(get_current_user(db=db, token=token))
+    return get_user_entitlement(db, current_user)
@@ -1,36 +1,60 @@
-from datetime import timedelta
+from anyio import from_thread
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
-from app.core.security import create_access_token, verify_password
-from app.core.config import settings
+from app.core.security import password_hasher, PasswordHasherBusy
 from app.models.user import User
 from app.schemas.token import Token
+from app.api.deps import get_current_active_user, create_user_access_token
 
 router = APIRouter()
 
 @router.post("/login", response_model=Token)
-async def login_access_token(
+def login_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
     """
     OAuth2 compatible token login, get an access token for future requests
     """
+    # A threadpool route, so the user and entitlement queries stay off the event loop
     user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+
+    # Verify on the bounded hashing pool, which sheds logins once its queue is full
+    try:
+        is_valid = user is not None and from_thread.run(
+            password_hasher.verify, form_data.password, user.hashed_password
+        )
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
-        "access_token": create_access_token(
-            user.id, expires_delta=access_token_expires
-        ),
+        "access_token": create_user_access_token(db, user),
+        "token_type": "bearer",
+    }
+
+@router.post("/login/refresh", response_model=Token)
+def refresh_access_token(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Issue a fresh access token, e.g. after a payment changes the user's subscription
+    """
+    return {
+        "access_token": create_user_access_token(db, current_user),
         "token_type": "bearer",
     }
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends
+
+from app.core.catalog_cache import catalog_cache
+from app.core.database import engine, async_engine, pool_metrics, async_pool_metrics, read_replicas
+from app.core.query_metrics import query_metrics
+from app.core.security import password_hasher
+from app.core.tmdb_cache import tmdb_cache
+from app.core.user_cache import user_cache
+from app.models.user import User
+from app.services.watch_events import watch_event_buffer
+from app.services.watch_progress import watch_progress_buffer
+from app.api.deps import get_current_active_superuser
+
+router = APIRouter()
+
+@router.get("/admin/metrics", response_model=dict)
+def get_metrics(
+    current_user: User = Depends(get_current_active_superuser),
+):
+    """
+    Get runtime cache and performance counters (admin only).
+    """
+    return {
+        "user_cache": user_cache.stats(),
+        "catalog_cache": catalog_cache.stats(),
+        "tmdb_cache": tmdb_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "database_pool": {
+            "sync": pool_metrics.stats(engine.pool),
+            "async": async_pool_metrics.stats(async_engine.sync_engine.pool),
+        },
+        "read_replicas": read_replicas.stats(),
+        "watch_events": watch_event_buffer.stats(),
+        "watch_progress": watch_progress_buffer.stats(),
+    }
+
+@router.get("/admin/metrics/queries", response_model=dict)
+def get_query_metrics(
+    current_user: User = Depends(get_current_active_superuser),
+):
+    """
+    Get per-route SQL statement counts and database time (admin only).
+    """
+    return query_metrics.stats()
+
+@router.delete("/admin/metrics/queries", response_model=dict)
+def reset_query_metrics(
+    current_user: User = Depends(get_current_active_superuser),
+):
+    """
+    Reset the per-route query aggregates (admin only).
+    """
+    query_metrics.reset()
+    return {"success": True}
@@ -1,55 +1,243 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, BackgroundTasks, Query
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, BackgroundTasks, Query, Request
+from pydantic import TypeAdapter
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-
-from app.core.database import get_db
-from app.models.movie import Movie
-from app.schemas.movie import Movie as MovieSchema, MovieCreate, MovieUpdate
-from app.api.deps import get_current_active_user, get_current_active_superuser
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_db, get_read_db, get_async_db, AsyncSessionLocal
+from app.core.catalog_cache import catalog_cache
+from app.core.pagination import NEXT_CURSOR_HEADER, paginate, trim_page
+from app.core.serialization import RowSerializer
+from app.models.movie import Movie, movie_similarities
+from app.schemas.movie import Movie as MovieSchema, MovieCard, MovieCreate, MovieUpdate, MovieFacets, MovieEnrichmentRequest
+from app.api.deps import get_current_active_user, get_current_active_superuser, get_current_entitlement
+from app.schemas.token import TokenEntitlement
+from app.schemas.rating import MovieRating, RatingCreate
+from app.schemas.watch import WatchEventCreate, WatchProgress as WatchProgressSchema, WatchProgressUpdate
 from app.services.s3 import upload_file_to_s3, delete_file_from_s3
 from app.services.mediaconvert import create_hls_job, get_job_status
+from app.services import movie_api, movie_ratings
 from app.services.movie_api import search_movie, get_movie_details
+from app.services.movie_search import search_catalog
+from app.services.movie_taxonomy import filter_movies, movie_facets, index_movies, unindex_movie
+from app.services.movie_import import ImportProgressResponse, import_movies
+from app.services.tmdb_enrichment import enrich_movies
+from app.services.watch_events import trending_scores, unlink_watch_events, watch_event_buffer
+from app.services.watch_progress import get_watch_progress, unlink_watch_progress, watch_progress_buffer
+from app.services.movie_similarity import (
+    SIMILARITY_FIELDS,
+    refresh_similar_movies,
+    rebuild_similar_movies_task,
+    unlink_similar_movies,
+)
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.get("/movies", response_model=List[MovieSchema])
+movie_adapter = TypeAdapter(MovieSchema)
+# Catalog pages are serialized straight from column tuples
+movie_rows = RowSerializer.for_schema(MovieSchema, Movie)
+
+# Predefined projections for /movies?view=
+movie_views = {
+    "card": RowSerializer.for_schema(MovieCard, Movie),
+}
+
+def get_movie_projection(fields: Optional[str], view: Optional[str]) -> RowSerializer:
+    """Serializer for the fields= or view= projection of /movies; id is always included"""
+    if fields:
+        try:
+            return movie_rows.only({"id", *(name.strip() for name in fields.split(",") if name.strip())})
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e),
+            )
+    if view:
+        if view not in movie_views:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown view: {view}",
+            )
+        return movie_views[view]
+    return movie_rows
+
+@router.get("/movies", response_model=List[Union[MovieSchema, MovieCard]])
 def read_movies(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    genre: Optional[str] = None,
+    person: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    min_rating: Optional[float] = None,
+    fields: Optional[str] = None,
+    view: Optional[str] = None,
 ):
     """
     Retrieve movies.
+    Filter by genre, person (director or cast), release year range and minimum rating.
+    Return only some fields with fields=id,title,... or view=card.
+    Pass the X-Next-Cursor response header back as cursor to fetch the next page.
+    """
+    projection = get_movie_projection(fields, view)
+
+    def render():
+        query = filter_movies(
+            select(*projection.columns),
+            genre=genre,
+            person=person,
+            year_from=year_from,
+            year_to=year_to,
+            min_rating=min_rating,
+        )
+        order = [Movie.id]
+        movies, next_cursor = trim_page(db.execute(paginate(query, order, cursor, skip, limit)).all(), order, limit)
+        headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+        return projection.dumps(movies), headers
+
+    return catalog_cache.respond(request, render)
+
+@router.get("/movies/facets", response_model=MovieFacets)
+def read_movie_facets(
+    db: Session = Depends(get_read_db),
+    genre: Optional[str] = None,
+    person: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    min_rating: Optional[float] = None,
+):
+    """
+    Count the movies matching the /movies filters by genre, director and decade.
+    """
+    return movie_facets(
+        db,
+        genre=genre,
+        person=person,
+        year_from=year_from,
+        year_to=year_to,
+        min_rating=min_rating,
+    )
+
+@router.get("/movies/search", response_model=List[MovieSchema])
+def search_movies_catalog(
+    db: Session = Depends(get_read_db),
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Search our catalog by title, description, director and cast.
+    Matches word prefixes and tolerates small typos.
+    """
+    return search_catalog(db, q, limit)
+
+@router.get("/movies/trending", response_model=List[Union[MovieSchema, MovieCard]])
+def read_trending_movies(
+    request: Request,
+    db: Session = Depends(get_read_db),
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = None,
+    view: Optional[str] = None,
+):
+    """
+    Get the most watched movies of the trending window, recent plays counting the most.
+    Return only some fields with fields=id,title,... or view=card.
     """
-    movies = db.query(Movie).offset(skip).limit(limit).all()
-    return movies
+    projection = get_movie_projection(fields, view)
+
+    def render():
+        scores = trending_scores()
+        movies = db.execute(
+            select(*projection.columns)
+            .join(scores, scores.c.movie_id == Movie.id)
+            .order_by(scores.c.score.desc(), Movie.id)
+            .limit(limit)
+        ).all()
+        return projection.dumps(movies), {}
+
+    return catalog_cache.respond(request, render)
 
 @router.get("/movies/{movie_id}", response_model=MovieSchema)
 def read_movie(
     *,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_read_db),
     movie_id: int,
 ):
     """
     Get movie by ID.
     """
-    movie = db.query(Movie).filter(Movie.id == movie_id).first()
-    if not movie:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Movie not found",
-        )
-    return movie
+    def render():
+        movie = db.query(Movie).filter(Movie.id == movie_id).first()
+        if not movie:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Movie not found",
+            )
+        return movie_adapter.dump_json(movie_adapter.validate_python(movie, from_attributes=True)), {}
+
+    return catalog_cache.respond(request, render)
+
+@router.get("/movies/{movie_id}/similar", response_model=List[Union[MovieSchema, MovieCard]])
+def read_similar_movies(
+    *,
+    request: Request,
+    db: Session = Depends(get_read_db),
+    movie_id: int,
+    limit: int = Query(10, ge=1, le=settings.SIMILAR_MOVIES_TOP_K),
+    fields: Optional[str] = None,
+    view: Optional[str] = None,
+):
+    """
+    Get the movies most similar to a movie by genre, director, cast, year and rating.
+    Return only some fields with fields=id,title,... or view=card.
+    """
+    projection = get_movie_projection(fields, view)
+
+    def render():
+        if db.get(Movie, movie_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Movie not found",
+            )
+        movies = db.execute(
+            select(*projection.columns)
+            .join(movie_similarities, movie_similarities.c.similar_movie_id == Movie.id)
+            .where(movie_similarities.c.movie_id == movie_id)
+            .order_by(movie_similarities.c.score.desc(), Movie.id)
+            .limit(limit)
+        ).all()
+        return projection.dumps(movies), {}
+
+    return catalog_cache.respond(request, render)
+
+@router.post("/movies/similar/rebuild", status_code=status.HTTP_202_ACCEPTED)
+def rebuild_all_similar_movies(
+    *,
+    background_tasks: BackgroundTasks,
+    current_user = Depends(get_current_active_superuser),
+):
+    """
+    Recompute every movie's similar movies in the background (admin only).
+    Run after bulk imports, which don't update them.
+    """
+    background_tasks.add_task(rebuild_similar_movies_task)
+    return {"status": "accepted"}
 
 @router.post("/movies", response_model=MovieSchema)
 def create_movie(
     *,
     db: Session = Depends(get_db),
     movie_in: MovieCreate,
+    background_tasks: BackgroundTasks,
     current_user = Depends(get_current_active_superuser),
 ):
     """
@@ -65,18 +253,91 @@ def create_movie(
         cast=movie_in.cast,
         poster_url=movie_in.poster_url,
         video_url=movie_in.video_url,
+        tmdb_id=movie_in.tmdb_id,
     )
     db.add(movie)
+    db.flush()
+    index_movies(db, [movie])
     db.commit()
+    catalog_cache.invalidate()
     db.refresh(movie)
+    background_tasks.add_task(refresh_similar_movies, [movie.id])
     return movie
 
+# Content types accepted by the bulk import, by format
+IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+@router.post("/movies/import")
+async def bulk_import_movies(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    current_user = Depends(get_current_active_superuser),
+):
+    """
+    Bulk import movies from a streamed CSV or NDJSON body (admin only).
+    The format comes from the format parameter or the Content-Type header.
+    Responds with a stream of NDJSON progress and per-row error events.
+    """
+    file_format = format or IMPORT_CONTENT_TYPES.get(
+        request.headers.get("content-type", "").split(";")[0].strip().lower()
+    )
+    if not file_format:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson, or pass format=csv|ndjson",
+        )
+
+    return ImportProgressResponse(
+        import_movies(request.stream(), file_format),
+        media_type="application/x-ndjson",
+    )
+
+@router.post("/movies/enrich", status_code=status.HTTP_202_ACCEPTED)
+async def enrich_movies_from_tmdb(
+    *,
+    enrichment_in: MovieEnrichmentRequest,
+    background_tasks: BackgroundTasks,
+    current_user = Depends(get_current_active_superuser),
+):
+    """
+    Fill in movie details from TMDB in the background (admin only).
+    Movies without a TMDB id are matched by title and release year;
+    TMDB ids not linked to a movie yet are added to the catalog.
+    """
+    if not enrichment_in.movie_ids and not enrichment_in.tmdb_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Pass movie_ids or tmdb_ids",
+        )
+    if not movie_api.TMDB_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="TMDB_API_KEY is not configured",
+        )
+
+    background_tasks.add_task(
+        enrich_movies,
+        enrichment_in.movie_ids,
+        enrichment_in.tmdb_ids,
+        overwrite=enrichment_in.overwrite,
+    )
+    return {
+        "status": "accepted",
+        "movie_ids": len(set(enrichment_in.movie_ids)),
+        "tmdb_ids": len(set(enrichment_in.tmdb_ids)),
+    }
+
 @router.put("/movies/{movie_id}", response_model=MovieSchema)
 def update_movie(
     *,
     db: Session = Depends(get_db),
     movie_id: int,
     movie_in: MovieUpdate,
+    background_tasks: BackgroundTasks,
     current_user = Depends(get_current_active_superuser),
 ):
     """
@@ -94,8 +355,14 @@ def update_movie(
         setattr(movie, field, value)
 
     db.add(movie)
+    if {"genre", "director", "cast"} & update_data.keys():
+        db.flush()
+        index_movies(db, [movie])
     db.commit()
+    catalog_cache.invalidate()
     db.refresh(movie)
+    if SIMILARITY_FIELDS & update_data.keys():
+        background_tasks.add_task(refresh_similar_movies, [movie.id])
     return movie
 
 @router.delete("/movies/{movie_id}", response_model=MovieSchema)
@@ -103,6 +370,7 @@ def delete_movie(
     *,
     db: Session = Depends(get_db),
     movie_id: int,
+    background_tasks: BackgroundTasks,
     current_user = Depends(get_current_active_superuser),
 ):
     """
@@ -149,15 +417,134 @@ def delete_movie(
     logger.info(f"S3 deletion results for movie {movie_id}: {s3_deletion_results}")
 
     # Delete movie from database
+    unindex_movie(db, movie_id)
+    unlink_watch_events(db, movie_id)
+    unlink_watch_progress(db, movie_id)
+    movie_ratings.unlink_movie_ratings(db, movie_id)
+    listed_by = unlink_similar_movies(db, movie_id)
     db.delete(movie)
     db.commit()
+    catalog_cache.invalidate()
+    background_tasks.add_task(refresh_similar_movies, [], refill=listed_by)
 
     return movie_data
 
+@router.get("/movies/{movie_id}/rating", response_model=MovieRating)
+def read_movie_rating(
+    *,
+    db: Session = Depends(get_db),
+    movie_id: int,
+    current_user = Depends(get_current_active_user),
+):
+    """
+    Get the current user's rating of a movie (null if unrated) and the movie's average.
+    """
+    rating = movie_ratings.get_movie_rating(db, current_user.id, movie_id)
+    if rating is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Movie not found",
+        )
+    return rating
+
+@router.put("/movies/{movie_id}/rating", response_model=MovieRating)
+def rate_movie(
+    *,
+    db: Session = Depends(get_db),
+    movie_id: int,
+    rating_in: RatingCreate,
+    current_user = Depends(get_current_active_user),
+):
+    """
+    Rate a movie from 1 to 10, replacing the current user's previous rating.
+    Returns the movie's updated average; cached catalog responses catch up within the cache TTL.
+    """
+    rating = movie_ratings.rate_movie(db, current_user.id, movie_id, rating_in.score)
+    if rating is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Movie not found",
+        )
+    return rating
+
+@router.delete("/movies/{movie_id}/rating", response_model=MovieRating)
+def delete_movie_rating(
+    *,
+    db: Session = Depends(get_db),
+    movie_id: int,
+    current_user = Depends(get_current_active_user),
+):
+    """
+    Remove the current user's rating of a movie.
+    """
+    rating = movie_ratings.unrate_movie(db, current_user.id, movie_id)
+    if rating is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Rating not found",
+        )
+    return rating
+
+@router.post("/movies/{movie_id}/watch-events", status_code=status.HTTP_202_ACCEPTED)
+async def record_watch_event(
+    *,
+    movie_id: int,
+    event_in: WatchEventCreate,
+    current_user = Depends(get_current_active_user),
+):
+    """
+    Record a playback start, heartbeat or completion.
+    Events are buffered and written in bulk, so trending picks them up after a short delay.
+    Events with a position, and completions, also update the resume position.
+    """
+    if not watch_event_buffer.add(current_user.id, movie_id, event_in.event, event_in.position):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    if event_in.position is not None or event_in.event == "complete":
+        watch_progress_buffer.set(
+            current_user.id, movie_id, event_in.position or 0, completed=event_in.event == "complete"
+        )
+    return {"status": "accepted"}
+
+@router.put("/movies/{movie_id}/progress", status_code=status.HTTP_202_ACCEPTED)
+async def update_watch_progress(
+    *,
+    movie_id: int,
+    progress_in: WatchProgressUpdate,
+    current_user = Depends(get_current_active_user),
+):
+    """
+    Save where the current user is in a movie.
+    Updates are coalesced in memory and written every few seconds.
+    """
+    watch_progress_buffer.set(current_user.id, movie_id, progress_in.position, progress_in.completed)
+    return {"status": "accepted"}
+
+@router.get("/movies/{movie_id}/progress", response_model=WatchProgressSchema)
+def read_watch_progress(
+    *,
+    db: Session = Depends(get_db),
+    movie_id: int,
+    current_user = Depends(get_current_active_user),
+):
+    """
+    Get where the current user stopped in a movie.
+    """
+    progress = get_watch_progress(db, current_user.id, movie_id)
+    if not progress:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No progress saved for this movie",
+        )
+    return progress
+
 @router.post("/movies/{movie_id}/upload-poster")
 async def upload_movie_poster(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     movie_id: int,
     file: UploadFile = File(...),
     current_user = Depends(get_current_active_superuser),
@@ -165,7 +552,7 @@ async def upload_movie_poster(
     """
     Upload a movie poster image to S3.
     """
-    movie = db.query(Movie).filter(Movie.id == movie_id).first()
+    movie = await db.get(Movie, movie_id)
     if not movie:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -176,15 +563,15 @@ async def upload_movie_poster(
     movie.poster_url = poster_url
 
     db.add(movie)
-    db.commit()
-    db.refresh(movie)
+    await db.commit()
+    catalog_cache.invalidate()
 
     return {"poster_url": poster_url}
 
 @router.post("/movies/{movie_id}/upload-video")
 async def upload_movie_video(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     movie_id: int,
     file: UploadFile = File(...),
     background_tasks: BackgroundTasks,
@@ -193,7 +580,7 @@ async def upload_movie_video(
     """
     Upload a movie video file to S3 and start the transcoding process.
     """
-    movie = db.query(Movie).filter(Movie.id == movie_id).first()
+    movie = await db.get(Movie, movie_id)
     if not movie:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -206,75 +593,82 @@ async def upload_movie_video(
     movie.transcoding_status = "QUEUED"
 
     db.add(movie)
-    db.commit()
-    db.refresh(movie)
+    await db.commit()
+    catalog_cache.invalidate()
 
     # Start the transcoding process in the background
-    background_tasks.add_task(start_transcoding_job, db, movie_id, video_url)
+    background_tasks.add_task(start_transcoding_job, movie_id, video_url)
 
     return {
         "video_url": video_url,
         "message": "Video uploaded successfully. Transcoding process started in the background."
     }
 
-async def start_transcoding_job(db: Session, movie_id: int, video_url: str):
+async def start_transcoding_job(movie_id: int, video_url: str):
     """
     Start a MediaConvert job to transcode the video to HLS format.
     """
-    try:
-        # Get the movie
-        movie = db.query(Movie).filter(Movie.id == movie_id).first()
-        if not movie:
-            logger.error(f"Movie {movie_id} not found when starting transcoding job")
-            return
-
-        # Update status
-        movie.transcoding_status = "PROCESSING"
-        db.add(movie)
-        db.commit()
-
-        # Create the MediaConvert job
-        job_result = create_hls_job(video_url, movie_id)
-
-        if not job_result:
-            logger.error(f"Failed to create MediaConvert job for movie {movie_id}")
-            movie.transcoding_status = "ERROR"
+    # The request's session is closed by the time background tasks run
+    async with AsyncSessionLocal() as db:
+        try:
+            # Get the movie
+            movie = await db.get(Movie, movie_id)
+            if not movie:
+                logger.error(f"Movie {movie_id} not found when starting transcoding job")
+                return
+
+            # Update status
+            movie.transcoding_status = "PROCESSING"
             db.add(movie)
-            db.commit()
-            return
-
-        # Update the movie with job details
-        movie.mediaconvert_job_id = job_result["job_id"]
-        movie.streaming_url = job_result["streaming_url"]
-        movie.transcoding_status = job_result["status"]
+            await db.commit()
+            catalog_cache.invalidate()
 
-        db.add(movie)
-        db.commit()
+            # Create the MediaConvert job
+            job_result = create_hls_job(video_url, movie_id)
 
-        logger.info(f"Started transcoding job {job_result['job_id']} for movie {movie_id}")
-
-    except Exception as e:
-        logger.error(f"Error starting transcoding job for movie {movie_id}: {str(e)}")
-        try:
-            movie = db.query(Movie).filter(Movie.id == movie_id).first()
-            if movie:
+            if not job_result:
+                logger.error(f"Failed to create MediaConvert job for movie {movie_id}")
                 movie.transcoding_status = "ERROR"
                 db.add(movie)
-                db.commit()
-        except Exception as db_error:
-            logger.error(f"Error updating movie status: {str(db_error)}")
+                await db.commit()
+                catalog_cache.invalidate()
+                return
+
+            # Update the movie with job details
+            movie.mediaconvert_job_id = job_result["job_id"]
+            movie.streaming_url = job_result["streaming_url"]
+            movie.transcoding_status = job_result["status"]
+
+            db.add(movie)
+            await db.commit()
+            catalog_cache.invalidate()
+
+            logger.info(f"Started transcoding job {job_result['job_id']} for movie {movie_id}")
+
+        except Exception as e:
+            logger.error(f"Error starting transcoding job for movie {movie_id}: {str(e)}")
+            try:
+                await db.rollback()
+                movie = await db.get(Movie, movie_id)
+                if movie:
+                    movie.transcoding_status = "ERROR"
+                    db.add(movie)
+                    await db.commit()
+                    catalog_cache.invalidate()
+            except Exception as db_error:
+                logger.error(f"Error updating movie status: {str(db_error)}")
 
 @router.get("/movies/{movie_id}/transcoding-status")
 async def get_transcoding_status(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     movie_id: int,
-    current_user = Depends(get_current_active_user),
+    entitlement: TokenEntitlement = Depends(get_current_entitlement),
 ):
     """
     Get the transcoding status of a movie.
     """
-    movie = db.query(Movie).filter(Movie.id == movie_id).first()
+    movie = await db.get(Movie, movie_id)
     if not movie:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -282,20 +676,7 @@ async def get_transcoding_status(
         )
 
     # Check if user has an active subscription or is an admin
-    has_access = current_user.is_superuser
-
-    if not has_access:
-        # Check for active subscription
-        from app.models.subscription import Subscription
-        from app.core.utils import get_utc_now
-
-        subscription = db.query(Subscription).filter(
-            Subscription.user_id == current_user.id,
-            Subscription.is_active == True,
-            Subscription.end_date > get_utc_now()
-        ).first()
-
-        has_access = subscription is not None
+    has_access = entitlement.has_access()
 
     # If the movie has a MediaConvert job ID and is still processing, check the status
     if movie.mediaconvert_job_id and movie.transcoding_status == "PROCESSING":
@@ -310,8 +691,8 @@ async def get_transcoding_status(
                 movie.is_transcoded = True
 
             db.add(movie)
-            db.commit()
-            db.refresh(movie)
+            await db.commit()
+            catalog_cache.invalidate()
 
     # Return streaming URL only if user has access
     streaming_url = None
@@ -336,7 +717,7 @@ async def search_movies(
     """
     Search for movies by title using external API.
     """
-    results = search_movie(title)
+    results = await search_movie(title)
     return {"results": results}
 
 @router.get("/movie-details/{tmdb_id}")
@@ -348,7 +729,7 @@ async def fetch_movie_details(
     """
     Get detailed information about a movie by its TMDB ID.
     """
-    movie_details = get_movie_details(tmdb_id)
+    movie_details = await get_movie_details(tmdb_id)
     if not movie_details:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
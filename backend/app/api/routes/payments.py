@@ -1,10 +1,13 @@
 from typing import List, Optional
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status, Request, BackgroundTasks
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-
-from app.core.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, BackgroundTasks
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from app.core.database import get_async_db, get_async_read_db
+from app.core.pagination import NEXT_CURSOR_HEADER, paginate, set_next_cursor, trim_page
+from app.core.serialization import RowSerializer
 from app.core.utils import get_utc_now
 from app.models.payment import Payment
 from app.models.subscription import Subscription, SubscriptionPlan
@@ -26,20 +29,25 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Admin listing rows are serialized straight from column tuples
+payment_rows = RowSerializer.for_schema(PaymentSchema, Payment)
+
 @router.post("/payments/create-order", response_model=RazorpayOrderResponse)
 async def create_payment_order(
     subscription_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Create a new Razorpay order for subscription payment
     """
     # Get subscription details
-    subscription = db.query(Subscription).filter(
-        Subscription.id == subscription_id,
-        Subscription.user_id == current_user.id
-    ).first()
+    subscription = await db.scalar(
+        select(Subscription).options(joinedload(Subscription.plan)).where(
+            Subscription.id == subscription_id,
+            Subscription.user_id == current_user.id
+        )
+    )
 
     if not subscription:
         raise HTTPException(
@@ -48,9 +56,7 @@ async def create_payment_order(
         )
 
     # Get subscription plan details
-    plan = db.query(SubscriptionPlan).filter(
-        SubscriptionPlan.id == subscription.plan_id
-    ).first()
+    plan = subscription.plan
 
     if not plan:
         raise HTTPException(
@@ -68,8 +74,8 @@ async def create_payment_order(
     )
 
     db.add(payment)
-    db.commit()
-    db.refresh(payment)
+    await db.commit()
+    await db.refresh(payment)
 
     # Create Razorpay order
     receipt = f"receipt_{payment.id}"
@@ -89,7 +95,7 @@ async def create_payment_order(
 
         # Update payment with order ID
         payment.razorpay_order_id = order["id"]
-        db.commit()
+        await db.commit()
 
         return {
             "order_id": order["id"],
@@ -98,7 +104,7 @@ async def create_payment_order(
             "key": order["key"]
         }
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create payment order: {str(e)}"
@@ -108,17 +114,21 @@ async def create_payment_order(
 async def verify_payment(
     payment_data: PaymentVerification,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Verify payment signature and update payment status
     """
     # Find payment by order ID
-    payment = db.query(Payment).filter(
-        Payment.razorpay_order_id == payment_data.razorpay_order_id,
-        Payment.user_id == current_user.id
-    ).first()
+    payment = await db.scalar(
+        select(Payment)
+        .options(joinedload(Payment.subscription).joinedload(Subscription.plan))
+        .where(
+            Payment.razorpay_order_id == payment_data.razorpay_order_id,
+            Payment.user_id == current_user.id
+        )
+    )
 
     if not payment:
         raise HTTPException(
@@ -135,7 +145,7 @@ async def verify_payment(
 
     if not is_valid:
         payment.status = "failed"
-        db.commit()
+        await db.commit()
 
         # Send payment failure email in background
         background_tasks.add_task(
@@ -170,17 +180,12 @@ async def verify_payment(
         pass
 
     # Update subscription status
-    if payment.subscription_id:
-        subscription = db.query(Subscription).filter(
-            Subscription.id == payment.subscription_id
-        ).first()
-
-        if subscription:
-            subscription.payment_status = "paid"
-            subscription.is_active = True
+    subscription = payment.subscription
+    if subscription:
+        subscription.payment_status = "paid"
+        subscription.is_active = True
 
-    db.commit()
-    db.refresh(payment)
+    await db.commit()
 
     # Send payment success email in background
     if payment.subscription and payment.subscription.plan:
@@ -215,38 +220,48 @@ async def verify_payment(
 
 @router.get("/payments/my", response_model=List[PaymentSchema])
 async def get_my_payments(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     status: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Get current user's payment history
+    Pass the X-Next-Cursor response header back as cursor to fetch the next page.
     """
-    query = db.query(Payment).filter(Payment.user_id == current_user.id)
+    query = select(Payment).where(Payment.user_id == current_user.id)
 
     if status:
-        query = query.filter(Payment.status == status)
+        query = query.where(Payment.status == status)
 
-    payments = query.order_by(desc(Payment.created_at)).offset(skip).limit(limit).all()
+    order = [Payment.created_at, Payment.id]
+    payments = (await db.scalars(
+        paginate(query, order, cursor, skip, limit, descending=True)
+    )).all()
 
-    return payments
+    return set_next_cursor(response, payments, order, limit)
 
 @router.get("/payments/{payment_id}/receipt", response_model=PaymentReceipt)
 async def get_payment_receipt(
     payment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Get receipt for a specific payment
     """
-    payment = db.query(Payment).filter(
-        Payment.id == payment_id,
-        Payment.user_id == current_user.id,
-        Payment.status == "successful"
-    ).first()
+    payment = await db.scalar(
+        select(Payment)
+        .options(joinedload(Payment.subscription).joinedload(Subscription.plan))
+        .where(
+            Payment.id == payment_id,
+            Payment.user_id == current_user.id,
+            Payment.status == "successful"
+        )
+    )
 
     if not payment:
         raise HTTPException(
@@ -259,9 +274,7 @@ async def get_payment_receipt(
     subscription_duration = None
 
     if payment.subscription_id:
-        subscription = db.query(Subscription).filter(
-            Subscription.id == payment.subscription_id
-        ).first()
+        subscription = payment.subscription
 
         if subscription and subscription.plan:
             subscription_plan = subscription.plan.name
@@ -285,22 +298,27 @@ async def get_payment_receipt(
 async def get_all_payments(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     status: Optional[str] = None,
     user_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_active_superuser)
 ):
     """
     Get all payments (admin only)
+    Pass the X-Next-Cursor response header back as cursor to fetch the next page.
     """
-    query = db.query(Payment)
+    query = select(*payment_rows.columns)
 
     if status:
-        query = query.filter(Payment.status == status)
+        query = query.where(Payment.status == status)
 
     if user_id:
-        query = query.filter(Payment.user_id == user_id)
+        query = query.where(Payment.user_id == user_id)
 
-    payments = query.order_by(desc(Payment.created_at)).offset(skip).limit(limit).all()
+    order = [Payment.created_at, Payment.id]
+    payments, next_cursor = trim_page((await db.execute(
+        paginate(query, order, cursor, skip, limit, descending=True)
+    )).all(), order, limit)
 
-    return payments
+    return payment_rows.response(payments, {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None)
@@ -1,16 +1,20 @@
-from typing import List
+from typing import List, Optional
 from datetime import timedelta
-import re
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
 from app.core.utils import get_utc_now
 
-from app.core.database import get_db
+from app.core.database import get_async_db, get_async_read_db
+from app.core.pagination import NEXT_CURSOR_HEADER, paginate, trim_page
+from app.core.serialization import RowSerializer
 from app.models.subscription import SubscriptionPlan, Subscription
 # Import User model using a function to avoid circular imports
-from app.api.deps import get_current_active_user, get_current_active_superuser
+from app.api.deps import get_current_active_user, get_current_active_superuser, get_current_entitlement
 from app.models.user import User
+from app.schemas.token import TokenEntitlement
 from app.schemas.subscription import (
     SubscriptionPlan as SubscriptionPlanSchema,
     SubscriptionPlanCreate,
@@ -24,23 +28,39 @@ from app.api.deps import get_current_active_user, get_current_active_superuser
 
 router = APIRouter()
 
+# Admin listing rows are serialized straight from column tuples
+subscription_rows = RowSerializer.for_schema(
+    SubscriptionSchema, Subscription, plan=(SubscriptionPlanSchema, SubscriptionPlan)
+)
+
+async def _load_subscription(db: AsyncSession, subscription_id: int) -> Subscription:
+    """Reload a subscription with its plan so it can be serialized without lazy loads"""
+    return await db.scalar(
+        select(Subscription)
+        .options(joinedload(Subscription.plan))
+        .where(Subscription.id == subscription_id)
+        .execution_options(populate_existing=True)
+    )
+
 # Subscription Plans Endpoints
 @router.get("/subscription-plans", response_model=List[SubscriptionPlanSchema])
 async def get_subscription_plans(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     skip: int = 0,
     limit: int = 100,
 ):
     """
     Get all active subscription plans.
     """
-    plans = db.query(SubscriptionPlan).filter(SubscriptionPlan.is_active == True).offset(skip).limit(limit).all()
+    plans = (await db.scalars(
+        select(SubscriptionPlan).where(SubscriptionPlan.is_active == True).offset(skip).limit(limit)
+    )).all()
     return plans
 
 @router.post("/subscription-plans", response_model=SubscriptionPlanSchema)
 async def create_subscription_plan(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     plan_in: SubscriptionPlanCreate,
     current_user: User = Depends(get_current_active_superuser),
 ):
@@ -56,14 +76,14 @@ async def create_subscription_plan(
         is_active=plan_in.is_active,
     )
     db.add(plan)
-    db.commit()
-    db.refresh(plan)
+    await db.commit()
+    await db.refresh(plan)
     return plan
 
 @router.put("/subscription-plans/{plan_id}", response_model=SubscriptionPlanSchema)
 async def update_subscription_plan(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     plan_id: int,
     plan_in: SubscriptionPlanUpdate,
     current_user: User = Depends(get_current_active_superuser),
@@ -71,7 +91,7 @@ async def update_subscription_plan(
     """
     Update a subscription plan (admin only).
     """
-    plan = db.query(SubscriptionPlan).filter(SubscriptionPlan.id == plan_id).first()
+    plan = await db.scalar(select(SubscriptionPlan).where(SubscriptionPlan.id == plan_id))
     if not plan:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -83,14 +103,14 @@ async def update_subscription_plan(
         setattr(plan, field, value)
 
     db.add(plan)
-    db.commit()
-    db.refresh(plan)
+    await db.commit()
+    await db.refresh(plan)
     return plan
 
 @router.delete("/subscription-plans/{plan_id}", response_model=dict)
 async def delete_subscription_plan(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     plan_id: int,
     current_user: User = Depends(get_current_active_superuser),
 ):
@@ -100,7 +120,7 @@ async def delete_subscription_plan(
     Note: This will set the plan to inactive rather than actually deleting it
     to preserve historical data for existing subscriptions.
     """
-    plan = db.query(SubscriptionPlan).filter(SubscriptionPlan.id == plan_id).first()
+    plan = await db.scalar(select(SubscriptionPlan).where(SubscriptionPlan.id == plan_id))
     if not plan:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -108,11 +128,13 @@ async def delete_subscription_plan(
         )
 
     # Check if there are any active subscriptions using this plan
-    active_subscriptions = db.query(Subscription).filter(
-        Subscription.plan_id == plan_id,
-        Subscription.is_active == True,
-        Subscription.end_date > get_utc_now()
-    ).count()
+    active_subscriptions = await db.scalar(
+        select(func.count()).select_from(Subscription).where(
+            Subscription.plan_id == plan_id,
+            Subscription.is_active == True,
+            Subscription.end_date > get_utc_now()
+        )
+    )
 
     if active_subscriptions > 0:
         raise HTTPException(
@@ -123,7 +145,7 @@ async def delete_subscription_plan(
     # Instead of deleting, we'll set it to inactive
     plan.is_active = False
     db.add(plan)
-    db.commit()
+    await db.commit()
 
     return {
         "success": True,
@@ -133,21 +155,13 @@ async def delete_subscription_plan(
 # User Subscriptions Endpoints
 @router.get("/subscriptions/me", response_model=UserSubscriptionStatus)
 async def get_my_subscription(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    entitlement: TokenEntitlement = Depends(get_current_entitlement),
 ):
     """
     Get current user's subscription status.
     """
-    # Get the most recent active and paid subscription
-    subscription = db.query(Subscription).filter(
-        Subscription.user_id == current_user.id,
-        Subscription.is_active == True,
-        Subscription.payment_status == "paid",
-        Subscription.end_date > get_utc_now()
-    ).order_by(Subscription.end_date.desc()).first()
-
-    if not subscription:
+    # The entitlement reflects the most recent active and paid subscription
+    if not entitlement.has_subscription():
         return UserSubscriptionStatus(
             has_active_subscription=False,
             subscription_end_date=None,
@@ -156,22 +170,19 @@ async def get_my_subscription(
         )
 
     # Calculate days remaining
-    days_remaining = (subscription.end_date - get_utc_now()).days
-
-    # Get plan name as a clean string (remove any numeric suffix completely)
-    plan_name = re.sub(r'\.\d+$', '', str(subscription.plan.name)) if subscription.plan and subscription.plan.name else "Unknown"
+    days_remaining = (entitlement.end_date - get_utc_now()).days
 
     return UserSubscriptionStatus(
         has_active_subscription=True,
-        subscription_end_date=subscription.end_date,
-        plan_name=plan_name,
+        subscription_end_date=entitlement.end_date,
+        plan_name=entitlement.plan_name,
         days_remaining=days_remaining
     )
 
 @router.post("/subscriptions", response_model=SubscriptionSchema)
 async def create_subscription(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     subscription_in: SubscriptionCreate,
     current_user: User = Depends(get_current_active_user),
 ):
@@ -179,10 +190,10 @@ async def create_subscription(
     Subscribe to a plan.
     """
     # Check if plan exists
-    plan = db.query(SubscriptionPlan).filter(
+    plan = await db.scalar(select(SubscriptionPlan).where(
         SubscriptionPlan.id == subscription_in.plan_id,
         SubscriptionPlan.is_active == True
-    ).first()
+    ))
 
     if not plan:
         raise HTTPException(
@@ -206,14 +217,13 @@ async def create_subscription(
     )
 
     db.add(subscription)
-    db.commit()
-    db.refresh(subscription)
-    return subscription
+    await db.commit()
+    return await _load_subscription(db, subscription.id)
 
 @router.put("/subscriptions/{subscription_id}", response_model=SubscriptionSchema)
 async def update_subscription(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     subscription_id: int,
     subscription_in: SubscriptionUpdate,
     current_user: User = Depends(get_current_active_user),
@@ -221,10 +231,12 @@ async def update_subscription(
     """
     Update a subscription (e.g., cancel auto-renewal).
     """
-    subscription = db.query(Subscription).filter(
-        Subscription.id == subscription_id,
-        Subscription.user_id == current_user.id
-    ).first()
+    subscription = await db.scalar(
+        select(Subscription).options(joinedload(Subscription.plan)).where(
+            Subscription.id == subscription_id,
+            Subscription.user_id == current_user.id
+        )
+    )
 
     if not subscription:
         raise HTTPException(
@@ -236,10 +248,10 @@ async def update_subscription(
 
     # If changing plan, recalculate end date
     if "plan_id" in update_data:
-        plan = db.query(SubscriptionPlan).filter(
+        plan = await db.scalar(select(SubscriptionPlan).where(
             SubscriptionPlan.id == update_data["plan_id"],
             SubscriptionPlan.is_active == True
-        ).first()
+        ))
 
         if not plan:
             raise HTTPException(
@@ -263,40 +275,29 @@ async def update_subscription(
         setattr(subscription, field, value)
 
     db.add(subscription)
-    db.commit()
-    db.refresh(subscription)
-    return subscription
+    await db.commit()
+    return await _load_subscription(db, subscription.id)
 
 @router.get("/subscriptions/check-access", response_model=dict)
 async def check_subscription_access(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    entitlement: TokenEntitlement = Depends(get_current_entitlement),
 ):
     """
     Check if the current user has an active subscription for movie access.
     """
     # Admins always have access
-    if current_user.is_superuser:
+    if entitlement.is_superuser:
         return {"has_access": True, "message": "Admin access granted"}
 
     # Check for active subscription with paid status
-    subscription = db.query(Subscription).filter(
-        Subscription.user_id == current_user.id,
-        Subscription.is_active == True,
-        Subscription.payment_status == "paid",
-        Subscription.end_date > get_utc_now()
-    ).first()
-
-    if subscription:
-        days_remaining = (subscription.end_date - get_utc_now()).days
-        hours_remaining = int((subscription.end_date - get_utc_now()).total_seconds() // 3600)
-
-        # Get plan name as a clean string (remove any numeric suffix completely)
-        plan_name = re.sub(r'\.\d+$', '', str(subscription.plan.name)) if subscription.plan and subscription.plan.name else "Unknown"
+    if entitlement.has_subscription():
+        days_remaining = (entitlement.end_date - get_utc_now()).days
+        hours_remaining = int((entitlement.end_date - get_utc_now()).total_seconds() // 3600)
+        plan_name = entitlement.plan_name
 
         # For daily plans, show hours remaining instead of days
         time_remaining_msg = (
-            f"{hours_remaining} hours" if subscription.plan.duration_days == 1
+            f"{hours_remaining} hours" if entitlement.plan_duration_days == 1
             else f"{days_remaining} days"
         )
 
@@ -316,45 +317,54 @@ async def check_subscription_access(
 # Admin Subscription Management Endpoints
 @router.get("/admin/subscriptions", response_model=List[SubscriptionSchema])
 async def get_all_subscriptions(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_active_superuser),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     status: str = None,
 ):
     """
     Get all subscriptions (admin only).
     Filter by status if provided (active, expired, all).
+    Pass the X-Next-Cursor response header back as cursor to fetch the next page.
     """
-    query = db.query(Subscription)
+    query = select(*subscription_rows.columns).join(
+        SubscriptionPlan, Subscription.plan_id == SubscriptionPlan.id
+    )
 
     if status == "active":
-        query = query.filter(
+        query = query.where(
             Subscription.is_active == True,
             Subscription.end_date > get_utc_now()
         )
     elif status == "expired":
-        query = query.filter(
+        query = query.where(
             (Subscription.is_active == False) |
             (Subscription.end_date <= get_utc_now())
         )
 
     # Order by most recent first
-    subscriptions = query.order_by(Subscription.created_at.desc()).offset(skip).limit(limit).all()
+    order = [Subscription.created_at, Subscription.id]
+    subscriptions, next_cursor = trim_page((await db.execute(
+        paginate(query, order, cursor, skip, limit, descending=True)
+    )).all(), order, limit)
 
-    return subscriptions
+    return subscription_rows.response(
+        subscriptions, {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    )
 
 @router.get("/admin/subscriptions/{subscription_id}", response_model=SubscriptionSchema)
 async def get_subscription_by_id(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     subscription_id: int,
     current_user: User = Depends(get_current_active_superuser),
 ):
     """
     Get a specific subscription by ID (admin only).
     """
-    subscription = db.query(Subscription).filter(Subscription.id == subscription_id).first()
+    subscription = await _load_subscription(db, subscription_id)
 
     if not subscription:
         raise HTTPException(
@@ -367,7 +377,7 @@ async def get_subscription_by_id(
 @router.put("/admin/subscriptions/{subscription_id}/extend", response_model=SubscriptionSchema)
 async def extend_subscription(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     subscription_id: int,
     days: int,
     current_user: User = Depends(get_current_active_superuser),
@@ -375,7 +385,7 @@ async def extend_subscription(
     """
     Extend a subscription by a specified number of days (admin only).
     """
-    subscription = db.query(Subscription).filter(Subscription.id == subscription_id).first()
+    subscription = await _load_subscription(db, subscription_id)
 
     if not subscription:
         raise HTTPException(
@@ -394,22 +404,21 @@ async def extend_subscription(
     subscription.is_active = True
 
     db.add(subscription)
-    db.commit()
-    db.refresh(subscription)
+    await db.commit()
 
-    return subscription
+    return await _load_subscription(db, subscription.id)
 
 @router.put("/admin/subscriptions/{subscription_id}/cancel", response_model=SubscriptionSchema)
 async def cancel_subscription(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     subscription_id: int,
     current_user: User = Depends(get_current_active_superuser),
 ):
     """
     Cancel a subscription (admin only).
     """
-    subscription = db.query(Subscription).filter(Subscription.id == subscription_id).first()
+    subscription = await _load_subscription(db, subscription_id)
 
     if not subscription:
         raise HTTPException(
@@ -421,7 +430,6 @@ async def cancel_subscription(
     subscription.auto_renew = False
 
     db.add(subscription)
-    db.commit()
-    db.refresh(subscription)
+    await db.commit()
 
-    return subscription
+    return await _load_subscription(db, subscription.id)
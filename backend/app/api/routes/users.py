@@ -1,27 +1,57 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-
-from app.core.database import get_db
-from app.core.security import get_password_hash
+from typing import List, Optional
+from anyio import from_thread
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.database import get_db, get_read_db
+from app.core.pagination import paginate, set_next_cursor
+from app.core.serialization import RowSerializer
+from app.core.security import password_hasher, PasswordHasherBusy
+from app.core.user_cache import user_cache
 from app.models.user import User
+from app.models.subscription import Subscription
+from app.models.movie import Movie
+from app.models.watch import WatchProgress
 from app.schemas.user import User as UserSchema, UserCreate, UserUpdate
+from app.schemas.movie import MovieCard
+from app.schemas.watch import ContinueWatchingItem
 from app.api.deps import get_current_active_user, get_current_active_superuser
+from app.services.movie_ratings import delete_user_ratings
+from app.services.watch_events import delete_user_watch_events
+from app.services.watch_progress import delete_user_watch_progress, get_continue_watching
 
 router = APIRouter()
 
+# Continue-watching entries are serialized straight from column tuples
+continue_watching_rows = RowSerializer.for_schema(ContinueWatchingItem, WatchProgress, movie=(MovieCard, Movie))
+
+def _hash_password(password: str) -> str:
+    """Hash a password on the bounded hashing pool from a threadpool route"""
+    try:
+        return from_thread.run(password_hasher.hash, password)
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
 @router.get("/users", response_model=List[UserSchema])
 def read_users(
-    db: Session = Depends(get_db),
+    response: Response,
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_active_superuser),
 ):
     """
     Retrieve users.
+    Pass the X-Next-Cursor response header back as cursor to fetch the next page.
     """
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    order = [User.id]
+    users = paginate(db.query(User), order, cursor, skip, limit).all()
+    return set_next_cursor(response, users, order, limit)
 
 @router.post("/users", response_model=UserSchema)
 def create_user(
@@ -49,7 +79,7 @@ def create_user(
     user = User(
         email=user_in.email,
         username=user_in.username,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=_hash_password(user_in.password),
         is_superuser=user_in.is_superuser,
     )
     db.add(user)
@@ -77,7 +107,7 @@ def update_user_me(
     Update own user.
     """
     if user_in.password is not None:
-        hashed_password = get_password_hash(user_in.password)
+        hashed_password = _hash_password(user_in.password)
         current_user.hashed_password = hashed_password
 
     if user_in.username is not None:
@@ -88,13 +118,26 @@ def update_user_me(
 
     db.add(current_user)
     db.commit()
+    user_cache.invalidate(current_user.id)
     db.refresh(current_user)
     return current_user
 
+@router.get("/users/me/continue-watching", response_model=List[ContinueWatchingItem])
+def read_continue_watching(
+    db: Session = Depends(get_db),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Get the movies the current user started and hasn't finished, most recently watched first.
+    """
+    rows = get_continue_watching(db, current_user.id, continue_watching_rows.columns, limit)
+    return continue_watching_rows.payload(rows)
+
 @router.get("/users/{user_id}", response_model=UserSchema)
 def read_user(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user_id: int,
     current_user: User = Depends(get_current_active_superuser),
 ):
@@ -126,8 +169,11 @@ def delete_user(
             detail="You cannot delete your own account",
         )
 
-    # Get the user to delete
-    user = db.query(User).filter(User.id == user_id).first()
+    # Get the user to delete, with everything the delete cascade touches
+    user = db.query(User).options(
+        selectinload(User.subscriptions).selectinload(Subscription.payments),
+        selectinload(User.payments),
+    ).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -144,8 +190,12 @@ def delete_user(
             )
 
     # Delete the user
+    delete_user_watch_events(db, user_id)
+    delete_user_watch_progress(db, user_id)
+    delete_user_ratings(db, user_id)
     db.delete(user)
     db.commit()
+    user_cache.invalidate(user_id)
 
     return {
         "success": True,
@@ -2,6 +2,7 @@ import asyncio
 import logging
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.core.catalog_cache import catalog_cache
 from app.models.movie import Movie
 from app.services.mediaconvert import get_job_status
 from app.services.s3 import s3_client
@@ -113,6 +114,7 @@ async def check_transcoding_status():
                         # Save changes
                         db.add(movie)
                         db.commit()
+                        catalog_cache.invalidate()
 
             # Close the session
             db.close()
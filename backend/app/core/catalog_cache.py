@@ -0,0 +1,139 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+
+class CachedResponse:
+    """Serialized JSON body and headers of a catalog response"""
+
+    def __init__(self, body: bytes, headers: Dict[str, str]):
+        self.body = body
+        self.headers = headers
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        if not if_none_match:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        # If-None-Match uses weak comparison
+        return "*" in tags or any(tag.removeprefix("W/") == self.etag for tag in tags)
+
+    def response(self, request: Request) -> Response:
+        headers = {"ETag": self.etag, **self.headers}
+        if self.matches(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+class CatalogCache:
+    """
+    Bounded TTL/LRU cache of public catalog responses keyed by path and query
+    string, stored as serialized bytes with a strong ETag.
+
+    invalidate() must be called after any write that changes a movie; it drops
+    every entry, and responses rendered from reads that started before it are
+    not stored. The cache is per process and the TTL bounds staleness across
+    workers.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, CachedResponse]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    @staticmethod
+    def key(request: Request) -> str:
+        return request.url.path + "?" + urlencode(sorted(request.query_params.multi_items()))
+
+    def _get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, cached = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached
+
+    def _set(self, key: str, cached: CachedResponse, generation: int) -> None:
+        with self._lock:
+            # Rendered from a read that raced with a catalog write
+            if generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, cached)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def respond(self, request: Request, render: Callable[[], Tuple[bytes, Dict[str, str]]]) -> Response:
+        """
+        Serve a request from the cache, or call render() for the JSON body and
+        extra headers and cache the result. Answers 304 when If-None-Match
+        matches the ETag.
+        """
+        cached = None
+        if self.enabled:
+            key = self.key(request)
+            generation = self._generation
+            cached = self._get(key)
+
+        if cached is None:
+            cached = CachedResponse(*render())
+            if self.enabled:
+                self._set(key, cached, generation)
+
+        response = cached.response(request)
+        if response.status_code == 304:
+            self.not_modified += 1
+        return response
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+# Create a singleton instance
+catalog_cache = CatalogCache(
+    max_size=settings.CATALOG_CACHE_MAX_SIZE,
+    ttl_seconds=settings.CATALOG_CACHE_TTL_SECONDS,
+)
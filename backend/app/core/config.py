@@ -8,14 +8,57 @@ class Settings(BaseSettings):
     # API settings
     API_V1_STR: str = "/api/v1"
     PROJECT_NAME: str = "Movie Streaming API"
+    # Debug mode allows implicit lazy loading of ORM relationships
+    DEBUG: bool = False
 
     # JWT settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-for-development")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Embed subscription entitlements in access tokens so playback checks skip the DB
+    ENTITLEMENT_CLAIMS_ENABLED: bool = True
+
+    # Password hashing pool (0 workers means one per CPU)
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+    # Authenticated user cache settings (set either value to 0 to disable)
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+    USER_CACHE_TTL_SECONDS: int = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+
+    # Public catalog response cache settings (set either value to 0 to disable)
+    CATALOG_CACHE_MAX_SIZE: int = int(os.getenv("CATALOG_CACHE_MAX_SIZE", "1000"))
+    CATALOG_CACHE_TTL_SECONDS: int = int(os.getenv("CATALOG_CACHE_TTL_SECONDS", "300"))
 
     # Database settings
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./movie_app.db")
+    # Optional comma-separated read replica URLs used by GET endpoints
+    DATABASE_READ_URL: str = os.getenv("DATABASE_READ_URL", "")
+    # Route a user's reads to the primary for this long after they write
+    DB_READ_STICKY_SECONDS: int = int(os.getenv("DB_READ_STICKY_SECONDS", "5"))
+    # Skip a failed replica for this long before retrying it
+    DB_REPLICA_RETRY_SECONDS: int = int(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))
+
+    # Connection pool settings (applied to both the sync and async engines)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+    DB_POOL_PRE_PING: bool = True
+    # Only ping connections idle longer than this many seconds (0 pings on every checkout)
+    DB_POOL_PRE_PING_IDLE_SECONDS: int = int(os.getenv("DB_POOL_PRE_PING_IDLE_SECONDS", "0"))
+
+    # Query instrumentation (per-route statement counts and slow query log)
+    QUERY_METRICS_ENABLED: bool = True
+    SLOW_QUERY_MS: int = int(os.getenv("SLOW_QUERY_MS", "200"))
+
+    # SQLite settings (only used when DATABASE_URL is a sqlite URL)
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_CACHE_SIZE: int = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # Negative values are KiB
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", "268435456"))
+    SQLITE_SERIALIZE_WRITES: bool = True
 
     # AWS settings
     AWS_ACCESS_KEY_ID: str = os.getenv("AWS_ACCESS_KEY_ID", "")
@@ -44,6 +87,40 @@ class Settings(BaseSettings):
     PAYMENT_SUCCESS_URL: str = os.getenv("PAYMENT_SUCCESS_URL", "http://localhost:5173/payment/success")
     PAYMENT_FAILURE_URL: str = os.getenv("PAYMENT_FAILURE_URL", "http://localhost:5173/payment/failure")
 
+    # Neighbours precomputed per movie for /movies/{id}/similar
+    SIMILAR_MOVIES_TOP_K: int = int(os.getenv("SIMILAR_MOVIES_TOP_K", "20"))
+
+    # Playback event buffer, written every WATCH_EVENT_FLUSH_SECONDS or once
+    # WATCH_EVENT_FLUSH_SIZE events are waiting; full buffers reject events
+    WATCH_EVENT_FLUSH_SIZE: int = int(os.getenv("WATCH_EVENT_FLUSH_SIZE", "1000"))
+    WATCH_EVENT_FLUSH_SECONDS: float = float(os.getenv("WATCH_EVENT_FLUSH_SECONDS", "2"))
+    WATCH_EVENT_BUFFER_MAX_SIZE: int = int(os.getenv("WATCH_EVENT_BUFFER_MAX_SIZE", "100000"))
+
+    # Resume positions: the latest per user and movie is written every
+    # WATCH_PROGRESS_FLUSH_SECONDS, or early once this many are waiting
+    WATCH_PROGRESS_FLUSH_SECONDS: float = float(os.getenv("WATCH_PROGRESS_FLUSH_SECONDS", "10"))
+    WATCH_PROGRESS_BUFFER_MAX_SIZE: int = int(os.getenv("WATCH_PROGRESS_BUFFER_MAX_SIZE", "50000"))
+
+    # /movies/trending: plays of the last TRENDING_WINDOW_HOURS, halving in weight every half-life
+    TRENDING_WINDOW_HOURS: int = int(os.getenv("TRENDING_WINDOW_HOURS", "168"))
+    TRENDING_HALF_LIFE_HOURS: float = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "24"))
+
+    # TMDB HTTP client (the read timeout also bounds writes and waits for a pooled connection)
+    TMDB_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("TMDB_CONNECT_TIMEOUT_SECONDS", "3"))
+    TMDB_TIMEOUT_SECONDS: float = float(os.getenv("TMDB_TIMEOUT_SECONDS", "10"))
+    TMDB_MAX_CONNECTIONS: int = int(os.getenv("TMDB_MAX_CONNECTIONS", "20"))
+
+    # TMDB enrichment job (0 requests per second disables client-side pacing)
+    TMDB_MAX_CONCURRENCY: int = int(os.getenv("TMDB_MAX_CONCURRENCY", "8"))
+    TMDB_REQUESTS_PER_SECOND: float = float(os.getenv("TMDB_REQUESTS_PER_SECOND", "40"))
+    TMDB_MAX_RETRIES: int = int(os.getenv("TMDB_MAX_RETRIES", "3"))
+
+    # TMDB lookup cache (TTL 0 disables it; an empty path keeps it in memory only)
+    TMDB_CACHE_MAX_SIZE: int = int(os.getenv("TMDB_CACHE_MAX_SIZE", "1000"))
+    TMDB_CACHE_TTL_SECONDS: int = int(os.getenv("TMDB_CACHE_TTL_SECONDS", "86400"))
+    TMDB_CACHE_NEGATIVE_TTL_SECONDS: int = int(os.getenv("TMDB_CACHE_NEGATIVE_TTL_SECONDS", "600"))
+    TMDB_CACHE_PATH: str = os.getenv("TMDB_CACHE_PATH", "./tmdb_cache.db")
+
 
 
 settings = Settings()
@@ -1,7 +1,20 @@
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.core.read_replicas import ReadReplicaRouter, Replica, get_request_sticky_until, get_request_user_id
+from app.core.pool_metrics import (
+    InstrumentedQueuePool,
+    InstrumentedAsyncAdaptedQueuePool,
+    instrument_engine,
+)
+from app.core.sqlite import configure_sqlite_engine
+from app.core.query_metrics import instrument_queries
 
 connect_args = {}
 if settings.DATABASE_URL.startswith('sqlite'):
@@ -9,16 +22,106 @@ if settings.DATABASE_URL.startswith('sqlite'):
 elif settings.DATABASE_URL.startswith('postgresql'):
     connect_args = {"connect_timeout": 10}
 
+# Pool sizing shared by the sync and async engines. With an idle threshold set,
+# only connections idle longer than it are pinged instead of every checkout.
+pool_options = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,  # Recycle connections after this many seconds
+    "pool_pre_ping": settings.DB_POOL_PRE_PING and settings.DB_POOL_PRE_PING_IDLE_SECONDS <= 0,
+}
+idle_ping_seconds = settings.DB_POOL_PRE_PING_IDLE_SECONDS if settings.DB_POOL_PRE_PING else 0
+
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,  # Enables connection pool "pre-ping" feature
-    pool_recycle=3600,   # Recycle connections after 1 hour
-    connect_args=connect_args
+    poolclass=InstrumentedQueuePool,
+    connect_args=connect_args,
+    **pool_options
 )
+pool_metrics = instrument_engine(engine, idle_ping_seconds)
+if settings.QUERY_METRICS_ENABLED:
+    instrument_queries(engine)
+if settings.DATABASE_URL.startswith('sqlite'):
+    configure_sqlite_engine(engine, serialize_writes=settings.SQLITE_SERIALIZE_WRITES)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def get_async_database_url(database_url: str) -> str:
+    """Map a sync database URL to its async driver (aiosqlite / asyncpg)"""
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    elif url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    return url.render_as_string(hide_password=False)
+
+async_connect_args = {}
+if settings.DATABASE_URL.startswith('sqlite'):
+    async_connect_args = {"check_same_thread": False}
+elif settings.DATABASE_URL.startswith('postgresql'):
+    async_connect_args = {"timeout": 10}
+
+async_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    poolclass=InstrumentedAsyncAdaptedQueuePool,
+    connect_args=async_connect_args,
+    **pool_options
+)
+async_pool_metrics = instrument_engine(async_engine.sync_engine, idle_ping_seconds)
+if settings.QUERY_METRICS_ENABLED:
+    instrument_queries(async_engine.sync_engine)
+if settings.DATABASE_URL.startswith('sqlite'):
+    # Async writers take turns with the sync engine's writers through the same lock
+    configure_sqlite_engine(async_engine.sync_engine, serialize_writes=settings.SQLITE_SERIALIZE_WRITES)
+# Objects stay loaded after commit so async routes never trigger implicit IO
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# Read replicas (DATABASE_READ_URL, comma-separated); reads fall back to the primary
+def create_replica(index: int, url: str) -> Replica:
+    replica_engine = create_engine(
+        url, poolclass=QueuePool, connect_args=connect_args, **pool_options
+    )
+    replica_async_engine = create_async_engine(
+        get_async_database_url(url),
+        poolclass=AsyncAdaptedQueuePool,
+        connect_args=async_connect_args,
+        **pool_options
+    )
+    if settings.QUERY_METRICS_ENABLED:
+        instrument_queries(replica_engine)
+        instrument_queries(replica_async_engine.sync_engine)
+    return Replica(
+        name=f"replica-{index}",
+        session_factory=sessionmaker(autocommit=False, autoflush=False, bind=replica_engine),
+        async_session_factory=async_sessionmaker(
+            bind=replica_async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        ),
+    )
+
+read_replicas = ReadReplicaRouter(
+    [
+        create_replica(index, url.strip())
+        for index, url in enumerate(settings.DATABASE_READ_URL.split(","))
+        if url.strip()
+    ],
+    sticky_seconds=settings.DB_READ_STICKY_SECONDS,
+    retry_seconds=settings.DB_REPLICA_RETRY_SECONDS,
+)
+
+@event.listens_for(Session, "before_flush")
+def _prevent_read_only_writes(session, flush_context, instances):
+    if session.info.get("read_only"):
+        raise InvalidRequestError("Cannot write through a read-only session")
+
 Base = declarative_base()
 
+# Default loader for model relationships. Outside debug mode an implicit lazy
+# load raises, so N+1 regressions surface instead of silently adding queries;
+# routes must load the relationships they use with selectinload/joinedload.
+RELATIONSHIP_LAZY = "select" if settings.DEBUG else "raise_on_sql"
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -26,3 +129,52 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Async dependency for async def routes
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Read-only dependency for GET routes, served from a replica when configured
+def get_read_db(request: Request):
+    db = None
+    for replica in read_replicas.candidates(get_request_user_id(request), get_request_sticky_until(request)):
+        db = replica.session_factory()
+        try:
+            db.connection()
+            break
+        except (DBAPIError, OSError) as e:
+            db.close()
+            db = None
+            read_replicas.mark_down(replica, e)
+
+    read_replicas.record_read(on_replica=db is not None)
+    if db is None:
+        db = SessionLocal()
+    db.info["read_only"] = True
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Async variant of get_read_db
+async def get_async_read_db(request: Request):
+    db = None
+    for replica in read_replicas.candidates(get_request_user_id(request), get_request_sticky_until(request)):
+        db = replica.async_session_factory()
+        try:
+            await db.connection()
+            break
+        except (DBAPIError, OSError) as e:
+            await db.close()
+            db = None
+            read_replicas.mark_down(replica, e)
+
+    read_replicas.record_read(on_replica=db is not None)
+    if db is None:
+        db = AsyncSessionLocal()
+    db.sync_session.info["read_only"] = True
+    try:
+        yield db
+    finally:
+        await db.close()
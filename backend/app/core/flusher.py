@@ -0,0 +1,64 @@
+import abc
+import asyncio
+import logging
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class BackgroundFlusher(abc.ABC):
+    """
+    Base class for in-memory write buffers. start() runs a task that calls
+    flush() in the threadpool every flush_seconds, or early after wake();
+    stop() ends it and flushes once more. Subclasses implement flush(),
+    which must be safe to call from any thread.
+    """
+
+    def __init__(self, flush_seconds: float):
+        self.flush_seconds = flush_seconds
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @abc.abstractmethod
+    def flush(self) -> int:
+        """Write whatever is buffered; returns the number of rows written"""
+
+    def wake(self) -> None:
+        """Ask for an early flush; safe to call from any thread"""
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await run_in_threadpool(self.flush)
+            except Exception as e:
+                logger.error(f"Error flushing {type(self).__name__}: {str(e)}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+            logger.info(f"Started {type(self).__name__} flusher")
+
+    async def stop(self) -> None:
+        """Stop the flusher and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._loop = None
+        await run_in_threadpool(self.flush)
@@ -88,7 +88,10 @@ MOVIES = [
 def init_db(db: Session) -> None:
     # Create tables
     Base.metadata.create_all(bind=engine)
-    
+    seed_db(db)
+
+def seed_db(db: Session) -> None:
+    """Add the admin, a regular user and sample movies to an empty database"""
     # Check if we already have users
     user = db.query(User).first()
     if user:
@@ -1,63 +1,234 @@
 import logging
-from sqlalchemy import Column, String, Boolean
+from typing import Callable, List, Optional, Tuple
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
 from sqlalchemy.sql import text
-from app.core.database import engine, Base, get_db
-from app.models.movie import Movie
-from app.models.user import User
-from app.models.subscription import SubscriptionPlan, Subscription
-from app.core.migrate_subscription_db import migrate_subscription_db
+from app.core.database import engine, Base
+from app.core.init_db import seed_db
+from app.core.migrate_subscription_db import create_subscription_plans
+# Import all models to ensure they're registered with SQLAlchemy
+import app.models
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def check_column_exists(table_name, column_name):
-    """Check if a column exists in a table"""
-    from app.core.config import settings
-
-    with engine.connect() as connection:
-        if settings.DATABASE_URL.startswith('sqlite'):
-            # SQLite specific query
-            result = connection.execute(text(
-                f"SELECT COUNT(*) FROM pragma_table_info('{table_name}') "
-                f"WHERE name='{column_name}'"
-            ))
-        else:
-            # PostgreSQL query
-            result = connection.execute(text(
-                f"SELECT EXISTS (SELECT 1 FROM information_schema.columns "
-                f"WHERE table_name='{table_name}' AND column_name='{column_name}')"
-            ))
-        return result.scalar() > 0
-
-def add_column(table_name, column_name, column_type):
+# Arbitrary key for the PostgreSQL advisory lock that serializes concurrent runners
+MIGRATION_LOCK_KEY = 727274
+
+# Kept out of Base.metadata so create_all never touches it
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+def add_column(connection: Connection, table_name: str, column_name: str, column_type: str) -> bool:
     """Add a column to a table if it doesn't exist"""
-    if not check_column_exists(table_name, column_name):
-        logger.info(f"Adding column {column_name} to {table_name}")
-        with engine.connect() as connection:
-            connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
-            connection.commit()
-        return True
-    else:
+    columns = {column["name"] for column in inspect(connection).get_columns(table_name)}
+    if column_name in columns:
         logger.info(f"Column {column_name} already exists in {table_name}")
         return False
+    logger.info(f"Adding column {column_name} to {table_name}")
+    connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+    return True
+
+def create_index(connection: Connection, table: Table, index_name: str) -> None:
+    """Create one of a table's model-declared indexes if it doesn't exist"""
+    index = next(index for index in table.indexes if index.name == index_name)
+    index.create(connection, checkfirst=True)
+
+def create_tables(connection: Connection) -> None:
+    Base.metadata.create_all(bind=connection)
+
+def add_movie_transcoding_columns(connection: Connection) -> None:
+    add_column(connection, "movies", "streaming_url", "VARCHAR")
+    add_column(connection, "movies", "mediaconvert_job_id", "VARCHAR")
+    add_column(connection, "movies", "is_transcoded", "BOOLEAN DEFAULT FALSE")
+    add_column(connection, "movies", "transcoding_status", "VARCHAR DEFAULT 'NOT_STARTED'")
+
+def add_subscription_payment_status(connection: Connection) -> None:
+    # The payments table itself is created by create_tables
+    add_column(connection, "subscriptions", "payment_status", "VARCHAR DEFAULT 'pending'")
+
+def add_hot_query_indexes(connection: Connection) -> None:
+    from app.models.movie import Movie
+    from app.models.payment import Payment
+    from app.models.subscription import Subscription
+
+    create_index(connection, Subscription.__table__, "ix_subscriptions_user_active_paid_end_date")
+    create_index(connection, Subscription.__table__, "ix_subscriptions_created_at_id")
+    create_index(connection, Payment.__table__, "ix_payments_user_id_created_at")
+    create_index(connection, Payment.__table__, "ix_payments_created_at_id")
+    create_index(connection, Movie.__table__, "ix_movies_pending_transcoding")
+
+SQLITE_MOVIE_SEARCH = [
+    # External-content FTS5 index over movies; triggers keep it in sync
+    """CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5(
+        title, description, director, "cast",
+        content='movies', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    # Indexed words, used to correct misspelled search terms
+    "CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts_vocab USING fts5vocab(movies_fts, 'row')",
+    """CREATE TRIGGER IF NOT EXISTS movies_fts_insert AFTER INSERT ON movies BEGIN
+        INSERT INTO movies_fts(rowid, title, description, director, "cast")
+        VALUES (new.id, new.title, new.description, new.director, new."cast");
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS movies_fts_delete AFTER DELETE ON movies BEGIN
+        INSERT INTO movies_fts(movies_fts, rowid, title, description, director, "cast")
+        VALUES ('delete', old.id, old.title, old.description, old.director, old."cast");
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS movies_fts_update AFTER UPDATE OF title, description, director, "cast" ON movies BEGIN
+        INSERT INTO movies_fts(movies_fts, rowid, title, description, director, "cast")
+        VALUES ('delete', old.id, old.title, old.description, old.director, old."cast");
+        INSERT INTO movies_fts(rowid, title, description, director, "cast")
+        VALUES (new.id, new.title, new.description, new.director, new."cast");
+    END""",
+    # Index movies that existed before the triggers
+    "INSERT INTO movies_fts(movies_fts) VALUES ('rebuild')",
+]
+
+POSTGRES_MOVIE_SEARCH = [
+    """ALTER TABLE movies ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(director, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce("cast", '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_movies_search_vector ON movies USING GIN (search_vector)",
+    # Trigram index for misspelled titles
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_movies_title_trgm ON movies USING GIN (title gin_trgm_ops)",
+]
+
+def add_movie_search_index(connection: Connection) -> None:
+    if connection.dialect.name == "sqlite":
+        statements = SQLITE_MOVIE_SEARCH
+    elif connection.dialect.name == "postgresql":
+        statements = POSTGRES_MOVIE_SEARCH
+    else:
+        logger.warning(f"Full-text search is not supported on {connection.dialect.name}")
+        return
+    for statement in statements:
+        connection.execute(text(statement))
+
+def add_movie_taxonomy(connection: Connection) -> None:
+    from app.models.movie import Movie, Genre, Person, movie_genres, movie_people
+    from app.services.movie_taxonomy import reindex_all_movies
+
+    Base.metadata.create_all(
+        bind=connection,
+        tables=[Genre.__table__, Person.__table__, movie_genres, movie_people],
+    )
+    create_index(connection, Movie.__table__, "ix_movies_release_year")
+    create_index(connection, Movie.__table__, "ix_movies_rating")
+    reindex_all_movies(Session(bind=connection))
+
+def add_movie_tmdb_id(connection: Connection) -> None:
+    from app.models.movie import Movie
+
+    add_column(connection, "movies", "tmdb_id", "INTEGER")
+    create_index(connection, Movie.__table__, "ix_movies_tmdb_id")
+
+def add_movie_similarities(connection: Connection) -> None:
+    from app.models.movie import movie_similarities
+    from app.services.movie_similarity import rebuild_similar_movies
+
+    Base.metadata.create_all(bind=connection, tables=[movie_similarities])
+    rebuild_similar_movies(Session(bind=connection))
+
+def add_watch_events(connection: Connection) -> None:
+    from app.models.watch import WatchEvent, movie_watch_counts
+
+    Base.metadata.create_all(bind=connection, tables=[WatchEvent.__table__, movie_watch_counts])
+
+def add_watch_progress(connection: Connection) -> None:
+    from app.models.watch import WatchProgress
+
+    Base.metadata.create_all(bind=connection, tables=[WatchProgress.__table__])
+
+def add_movie_ratings(connection: Connection) -> None:
+    from app.models.rating import Rating
+
+    add_column(connection, "movies", "user_rating_sum", "INTEGER NOT NULL DEFAULT 0")
+    add_column(connection, "movies", "user_rating_count", "INTEGER NOT NULL DEFAULT 0")
+    add_column(connection, "movies", "user_rating", "FLOAT")
+    Base.metadata.create_all(bind=connection, tables=[Rating.__table__])
+
+def add_timestamp_microseconds(connection: Connection) -> None:
+    # Server-default timestamps were stored as "YYYY-MM-DD HH:MM:SS"; give them
+    # the ".ffffff" SQLAlchemy writes so keyset cursors compare consistently
+    if connection.dialect.name != "sqlite":
+        return
+    for table_name in ("payments", "subscriptions"):
+        connection.execute(text(
+            f"UPDATE {table_name} SET created_at = created_at || '.000000' WHERE length(created_at) = 19"
+        ))
+
+def seed_subscription_plans(connection: Connection) -> None:
+    create_subscription_plans(Session(bind=connection))
+
+def seed_sample_data(connection: Connection) -> None:
+    seed_db(Session(bind=connection))
+
+# Ordered migration steps. Append new steps with the next version number and
+# never edit a released one; each step should be safe to run against databases
+# created before versioning was introduced.
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "Create tables", create_tables),
+    (2, "Add movie transcoding columns", add_movie_transcoding_columns),
+    (3, "Add subscription payment status", add_subscription_payment_status),
+    (4, "Seed default subscription plans", seed_subscription_plans),
+    (5, "Seed sample users and movies", seed_sample_data),
+    (6, "Add composite indexes for hot queries", add_hot_query_indexes),
+    (7, "Add movie full-text search index", add_movie_search_index),
+    (8, "Add genre and people index of movies", add_movie_taxonomy),
+    (9, "Add movie TMDB id", add_movie_tmdb_id),
+    (10, "Add precomputed similar movies", add_movie_similarities),
+    (11, "Add watch events and trending counts", add_watch_events),
+    (12, "Add watch progress", add_watch_progress),
+    (13, "Add user ratings", add_movie_ratings),
+    (14, "Store SQLite payment and subscription timestamps with microseconds", add_timestamp_microseconds),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version() -> Optional[int]:
+    """Return the applied schema version, or None if the database isn't versioned yet"""
+    try:
+        with engine.connect() as connection:
+            return connection.execute(select(func.max(schema_version.c.version))).scalar()
+    except DBAPIError:
+        return None
 
-def migrate_db():
-    """Run database migrations"""
-    logger.info("Running database migrations...")
+def migrate_db() -> int:
+    """Apply pending migrations in a single transaction and return the schema version"""
+    current = get_schema_version()
+    if current is not None and current >= LATEST_VERSION:
+        logger.info(f"Database schema is up to date (version {current})")
+        return current
 
-    # Create tables if they don't exist
-    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
 
-    # Add missing columns to movies table
-    add_column("movies", "streaming_url", "VARCHAR")
-    add_column("movies", "mediaconvert_job_id", "VARCHAR")
-    add_column("movies", "is_transcoded", "BOOLEAN DEFAULT FALSE")
-    add_column("movies", "transcoding_status", "VARCHAR DEFAULT 'NOT_STARTED'")
+        # Re-read under the lock in case another runner got here first
+        schema_version.create(connection, checkfirst=True)
+        current = connection.execute(select(func.max(schema_version.c.version))).scalar() or 0
 
-    # Run subscription migrations
-    migrate_subscription_db()
+        for version, description, step in MIGRATIONS:
+            if version <= current:
+                continue
+            logger.info(f"Applying migration {version}: {description}")
+            step(connection)
+            connection.execute(schema_version.insert().values(version=version, description=description))
+            current = version
 
-    logger.info("Database migrations completed successfully")
+    logger.info(f"Database migrated to version {current}")
+    return current
 
 if __name__ == "__main__":
     migrate_db()
@@ -1,5 +1,6 @@
 import logging
 from sqlalchemy import text
+from sqlalchemy.orm import Session
 from app.core.database import engine, Base, get_db
 # Import all models to ensure they're registered with SQLAlchemy
 from app.models.user import User
@@ -19,9 +20,10 @@ def add_column(table, column, type_):
     except Exception as e:
         logger.error(f"Error adding column {column} to {table}: {str(e)}")
 
-def create_subscription_plans():
+def create_subscription_plans(db: Session = None):
     """Create default subscription plans"""
-    db = next(get_db())
+    if db is None:
+        db = next(get_db())
 
     # Check if plans already exist
     existing_plans = db.query(SubscriptionPlan).all()
@@ -0,0 +1,94 @@
+import json
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import String, DateTime, bindparam, tuple_
+from sqlalchemy.types import TypeDecorator
+
+# Response header carrying the cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class CursorDateTime(TypeDecorator):
+    """
+    Binds a cursor timestamp the way the column stores it. SQLite keeps
+    timestamps as text compared character by character, so the bound value
+    must have the stored "YYYY-MM-DD HH:MM:SS.ffffff" form exactly, including
+    zero microseconds (see migration 14 for older server-default rows).
+    """
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "sqlite":
+            return dialect.type_descriptor(String())
+        return dialect.type_descriptor(DateTime(timezone=True))
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and dialect.name == "sqlite":
+            return value.replace(tzinfo=None).strftime("%Y-%m-%d %H:%M:%S.%f")
+        return value
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor for the sort key of the last row on a page"""
+    payload = json.dumps([
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in values
+    ], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("Cursor does not match the sort key")
+        return [
+            None if value is None
+            else datetime.fromisoformat(value) if column.type.python_type is datetime
+            else column.type.python_type(value)
+            for column, value in zip(columns, values)
+        ]
+    except (ValueError, TypeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid cursor: {str(e)}",
+        )
+
+def paginate(query, columns: Sequence[Any], cursor: Optional[str], skip: int, limit: int, descending: bool = False):
+    """
+    Order a Query or select() by columns (a unique sort key, e.g. (created_at, id))
+    and apply keyset pagination when a cursor is given, otherwise skip/limit.
+    Fetches one extra row so set_next_cursor can tell whether a next page exists.
+    """
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+
+    if cursor:
+        values = [
+            bindparam(None, value, type_=CursorDateTime() if column.type.python_type is datetime else column.type)
+            for column, value in zip(columns, decode_cursor(cursor, columns))
+        ]
+        if len(columns) == 1:
+            key, bound = columns[0], values[0]
+        else:
+            key, bound = tuple_(*columns), tuple_(*values)
+        query = query.where(key < bound if descending else key > bound)
+    else:
+        query = query.offset(skip)
+
+    return query.limit(limit + 1)
+
+def trim_page(rows: List[Any], columns: Sequence[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """Trim the extra row fetched by paginate; returns the page and the next page's cursor"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], column.key) for column in columns])
+
+def set_next_cursor(response: Response, rows: List[Any], columns: Sequence[Any], limit: int) -> List[Any]:
+    """Trim the extra row fetched by paginate and expose the next page's cursor"""
+    rows, next_cursor = trim_page(rows, columns, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
@@ -0,0 +1,163 @@
+import time
+import logging
+import threading
+from bisect import bisect_left
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DisconnectionError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the checkout latency histogram buckets, in milliseconds
+CHECKOUT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+class PoolMetrics:
+    """
+    Counters for a connection pool: checkout wait histogram, timeouts,
+    connections opened and closed, and idle pings. Gauges (in use,
+    overflow) are read live from the pool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bucket_counts = [0] * (len(CHECKOUT_BUCKETS_MS) + 1)
+        self.checkouts = 0
+        self.checkout_ms_total = 0.0
+        self.checkout_ms_max = 0.0
+        self.timeouts = 0
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.pings = 0
+        self.ping_failures = 0
+
+    def record_checkout(self, elapsed_ms: float) -> None:
+        with self._lock:
+            self.bucket_counts[bisect_left(CHECKOUT_BUCKETS_MS, elapsed_ms)] += 1
+            self.checkouts += 1
+            self.checkout_ms_total += elapsed_ms
+            self.checkout_ms_max = max(self.checkout_ms_max, elapsed_ms)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connection(self, opened: bool) -> None:
+        with self._lock:
+            if opened:
+                self.connections_opened += 1
+            else:
+                self.connections_closed += 1
+
+    def record_ping(self, ok: bool) -> None:
+        with self._lock:
+            self.pings += 1
+            if not ok:
+                self.ping_failures += 1
+
+    def stats(self, pool: Any) -> Dict[str, Any]:
+        with self._lock:
+            buckets = {
+                f"le_{bound}ms": count
+                for bound, count in zip(CHECKOUT_BUCKETS_MS, self.bucket_counts)
+            }
+            buckets["le_inf"] = self.bucket_counts[-1]
+            counters = {
+                "checkouts": self.checkouts,
+                "checkout_ms_avg": self.checkout_ms_total / self.checkouts if self.checkouts else 0.0,
+                "checkout_ms_max": self.checkout_ms_max,
+                "checkout_ms_buckets": buckets,
+                "timeouts": self.timeouts,
+                "connections_opened": self.connections_opened,
+                "connections_closed": self.connections_closed,
+                "idle_pings": self.pings,
+                "idle_ping_failures": self.ping_failures,
+            }
+
+        gauges = {"pool_class": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            gauges.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": getattr(pool, "max_overflow", None),
+                "timeout": pool.timeout(),
+            })
+        return {**gauges, **counters}
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each connect() took to hand out a
+    connection: waiting for one to be checked in, opening a new one and the
+    checkout listeners (such as idle pings). Checkouts that time out are
+    only counted as timeouts, not in the latency histogram.
+    """
+
+    metrics: PoolMetrics
+
+    def __init__(self, *args, max_overflow: int = 10, **kwargs):
+        super().__init__(*args, max_overflow=max_overflow, **kwargs)
+        self.max_overflow = max_overflow
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout((time.perf_counter() - start) * 1000)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool, InstrumentedQueuePool):
+    """Async-adapted variant of InstrumentedQueuePool"""
+
+def instrument_engine(engine: Engine, idle_ping_seconds: int = 0) -> PoolMetrics:
+    """
+    Attach metrics to an engine built with an instrumented pool class and,
+    when idle_ping_seconds > 0, ping only connections that have been idle
+    longer than that on checkout (instead of pre-pinging every checkout).
+    """
+    metrics = PoolMetrics()
+    engine.pool.metrics = metrics
+
+    @event.listens_for(engine, "connect")
+    def _count_connect(dbapi_connection, connection_record):
+        metrics.record_connection(opened=True)
+
+    @event.listens_for(engine, "close")
+    def _count_close(dbapi_connection, connection_record):
+        metrics.record_connection(opened=False)
+
+    if idle_ping_seconds > 0:
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            connection_record.info["last_used"] = time.monotonic()
+
+        @event.listens_for(engine, "checkin")
+        def _on_checkin(dbapi_connection, connection_record):
+            connection_record.info["last_used"] = time.monotonic()
+
+        @event.listens_for(engine, "checkout")
+        def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+            last_used = connection_record.info.get("last_used", 0)
+            if time.monotonic() - last_used < idle_ping_seconds:
+                return
+            try:
+                engine.dialect.do_ping(dbapi_connection)
+            except Exception as e:
+                metrics.record_ping(False)
+                logger.warning(f"Idle connection failed ping, reconnecting: {str(e)}")
+                # Tells the pool to discard this connection and retry with a new one
+                raise DisconnectionError() from e
+            metrics.record_ping(True)
+
+    return metrics
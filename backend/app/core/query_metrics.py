@@ -0,0 +1,103 @@
+import time
+import logging
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class RequestQueryStats:
+    """SQL statements issued while serving a single request"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_ms:.1f};desc="{self.count} queries"'
+
+# Stats of the request being served; shared with threadpool and greenlet
+# workers because they run in a copy of the request's context
+current_request_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar(
+    "current_request_stats", default=None
+)
+
+class QueryMetrics:
+    """Per-route aggregates of statement counts and database time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, Any]] = {}
+
+    def record_request(self, route: str, stats: RequestQueryStats) -> None:
+        with self._lock:
+            entry = self._routes.setdefault(route, {
+                "requests": 0,
+                "statements": 0,
+                "max_statements": 0,
+                "db_ms_total": 0.0,
+                "slowest_ms": 0.0,
+                "slowest_statement": None,
+            })
+            entry["requests"] += 1
+            entry["statements"] += stats.count
+            entry["max_statements"] = max(entry["max_statements"], stats.count)
+            entry["db_ms_total"] += stats.total_ms
+            if stats.slowest_ms > entry["slowest_ms"]:
+                entry["slowest_ms"] = stats.slowest_ms
+                entry["slowest_statement"] = stats.slowest_statement
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                route: {
+                    **entry,
+                    "avg_statements": entry["statements"] / entry["requests"],
+                    "avg_db_ms": entry["db_ms_total"] / entry["requests"],
+                }
+                for route, entry in sorted(self._routes.items())
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+# Create a singleton instance
+query_metrics = QueryMetrics()
+
+def instrument_queries(engine: Engine) -> None:
+    """
+    Time every statement on an engine, attribute it to the current request
+    and log statements slower than SLOW_QUERY_MS.
+    """
+    # The start time lives on the statement's execution context, so a
+    # statement that fails (and never reaches after_cursor_execute) leaves
+    # nothing behind on the connection
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context.query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - context.query_start) * 1000
+
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed_ms)
+
+        if elapsed_ms >= settings.SLOW_QUERY_MS:
+            logger.warning(f"Slow query ({elapsed_ms:.1f} ms): {statement}")
@@ -0,0 +1,137 @@
+import time
+import logging
+import threading
+from itertools import count
+from typing import Any, Dict, List, Optional
+
+from fastapi import Request
+from jose import jwt
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Cookie carrying when a client's reads may go back to the replicas (a Unix timestamp)
+STICKY_COOKIE = "db_sticky_until"
+
+class Replica:
+    def __init__(self, name: str, session_factory, async_session_factory):
+        self.name = name
+        self.session_factory = session_factory
+        self.async_session_factory = async_session_factory
+        self.down_until = 0.0
+        self.failures = 0
+
+class ReadReplicaRouter:
+    """
+    Picks a read replica for read-only sessions.
+
+    Replicas are tried round-robin; one that fails to connect is skipped for
+    retry_seconds and the caller falls back to the next replica or the primary.
+    Users who wrote within sticky_seconds are routed to the primary so they
+    read their own writes despite replication lag. Stickiness is tracked per
+    process and handed to the client in STICKY_COOKIE, so a read served by
+    another worker or instance stays on the primary too.
+    """
+
+    def __init__(self, replicas: List[Replica], sticky_seconds: int, retry_seconds: int):
+        self.replicas = replicas
+        self.sticky_seconds = sticky_seconds
+        self.retry_seconds = retry_seconds
+        self._recent_writers: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._next = count()
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.sticky_reads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def mark_write(self, user_id: Optional[int]) -> Optional[float]:
+        """Pin the writer's reads to the primary; returns the Unix time the pin lasts until"""
+        if self.sticky_seconds <= 0:
+            return None
+        sticky_until = time.time() + self.sticky_seconds
+        if user_id is None:
+            return sticky_until
+        now = time.monotonic()
+        with self._lock:
+            self._recent_writers[user_id] = now + self.sticky_seconds
+            # Keep the map from growing without bound
+            if len(self._recent_writers) > 10000:
+                self._recent_writers = {
+                    uid: until for uid, until in self._recent_writers.items() if until > now
+                }
+        return sticky_until
+
+    def is_sticky(self, user_id: Optional[int]) -> bool:
+        if user_id is None:
+            return False
+        with self._lock:
+            until = self._recent_writers.get(user_id)
+            return until is not None and until > time.monotonic()
+
+    def candidates(self, user_id: Optional[int], sticky_until: float = 0.0) -> List[Replica]:
+        """
+        Replicas to try in order, or an empty list to read from the primary.
+        sticky_until is the Unix time from the client's STICKY_COOKIE, if any.
+        """
+        if not self.enabled:
+            return []
+        # A cookie can't pin reads for longer than a write would
+        wall_clock = time.time()
+        if wall_clock < sticky_until <= wall_clock + self.sticky_seconds or self.is_sticky(user_id):
+            self.sticky_reads += 1
+            return []
+        now = time.monotonic()
+        start = next(self._next) % len(self.replicas)
+        ordered = self.replicas[start:] + self.replicas[:start]
+        return [replica for replica in ordered if replica.down_until <= now]
+
+    def mark_down(self, replica: Replica, error: Exception) -> None:
+        replica.failures += 1
+        replica.down_until = time.monotonic() + self.retry_seconds
+        logger.warning(f"Read replica {replica.name} unavailable, falling back: {str(error)}")
+
+    def record_read(self, on_replica: bool) -> None:
+        if on_replica:
+            self.replica_reads += 1
+        else:
+            self.primary_reads += 1
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "healthy": replica.down_until <= now,
+                    "failures": replica.failures,
+                }
+                for replica in self.replicas
+            ],
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "sticky_reads": self.sticky_reads,
+        }
+
+def get_request_sticky_until(request: Request) -> float:
+    """Unix time until which the client's reads stay on the primary, from its cookie"""
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0))
+    except ValueError:
+        return 0.0
+
+def get_request_user_id(request: Request) -> Optional[int]:
+    """Best-effort user id from the bearer token, without hitting the database"""
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        return int(payload.get("sub"))
+    except (jwt.JWTError, TypeError, ValueError):
+        return None
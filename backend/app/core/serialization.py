@@ -0,0 +1,108 @@
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type, get_args
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+from pydantic.fields import FieldInfo
+
+from app.core.utils import format_utc
+
+def _converter(field: FieldInfo) -> Optional[Callable[[Any], Any]]:
+    """What to apply to a column value for field, or None when it passes through as is"""
+    default = None if field.is_required() else field.get_default(call_default_factory=True)
+    annotation = field.annotation
+    is_datetime = annotation is datetime or datetime in get_args(annotation)
+    if default is None and not is_datetime:
+        return None
+
+    def convert(value: Any) -> Any:
+        if value is None:
+            return default
+        if is_datetime and isinstance(value, datetime):
+            return format_utc(value)
+        return value
+
+    return convert
+
+class RowSerializer:
+    """
+    Serializes rows selected as plain columns straight to JSON bytes, skipping
+    ORM instances, Pydantic validation and jsonable_encoder.
+
+    Build one with for_schema: every field of the schema must be a column of
+    model (or a nested schema given as name=(schema, model)), so the output
+    matches what the schema returns. NULL columns take the field's default
+    where it has one, and datetimes are emitted in UTC with a Z suffix
+    whichever database they were read from, as Pydantic writes UTC datetimes.
+    """
+
+    def __init__(
+        self,
+        model,
+        fields: List[str],
+        nested: Optional[Dict[str, "RowSerializer"]] = None,
+        converters: Optional[Dict[str, Callable[[Any], Any]]] = None,
+    ):
+        """Serializer of already checked fields; use for_schema to build one from a schema"""
+        self.model = model
+        self.fields = fields
+        self.nested = nested or {}
+        self.converters = converters or {}
+        # Top-level columns keep their names so rows can feed pagination cursors
+        self.columns = [getattr(model, name) for name in fields]
+        for name, serializer in self.nested.items():
+            self.columns += [column.label(f"{name}__{column.key}") for column in serializer.columns]
+
+    @classmethod
+    def for_schema(cls, schema: Type[BaseModel], model, **nested: Tuple[Type[BaseModel], Any]) -> "RowSerializer":
+        """Serializer for every field of schema, checking that each one has a column"""
+        table_columns = model.__table__.columns
+        fields = [name for name in schema.model_fields if name in table_columns]
+        nested_serializers = {
+            name: cls.for_schema(nested_schema, nested_model)
+            for name, (nested_schema, nested_model) in nested.items()
+        }
+
+        missing = set(schema.model_fields) - set(fields) - set(nested_serializers)
+        if missing:
+            raise ValueError(f"{schema.__name__} fields without a {model.__name__} column: {sorted(missing)}")
+
+        converters = {
+            name: converter
+            for name in fields
+            if (converter := _converter(schema.model_fields[name])) is not None
+        }
+        return cls(model, fields, nested_serializers, converters)
+
+    def only(self, fields: Iterable[str]) -> "RowSerializer":
+        """Serializer for a subset of the top-level fields, selecting only their columns"""
+        fields = set(fields)
+        unknown = fields - set(self.fields) - set(self.nested)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        return RowSerializer(
+            self.model,
+            [name for name in self.fields if name in fields],
+            {name: serializer for name, serializer in self.nested.items() if name in fields},
+            {name: converter for name, converter in self.converters.items() if name in fields},
+        )
+
+    def _item(self, row: Sequence[Any], offset: int) -> Tuple[Dict[str, Any], int]:
+        end = offset + len(self.fields)
+        item = dict(zip(self.fields, row[offset:end]))
+        for name, convert in self.converters.items():
+            item[name] = convert(item[name])
+        for name, serializer in self.nested.items():
+            item[name], end = serializer._item(row, end)
+        return item, end
+
+    def payload(self, rows: Sequence[Sequence[Any]]) -> List[Dict[str, Any]]:
+        return [self._item(row, 0)[0] for row in rows]
+
+    def dumps(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        return orjson.dumps(self.payload(rows))
+
+    def response(self, rows: Sequence[Sequence[Any]], headers: Dict[str, str] = None) -> Response:
+        return Response(content=self.dumps(rows), media_type="application/json", headers=headers)
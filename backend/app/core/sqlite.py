@@ -0,0 +1,111 @@
+import re
+import asyncio
+import logging
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.util import await_only
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Statements that take SQLite's write lock
+WRITE_STATEMENT = re.compile(r"^\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b", re.IGNORECASE)
+
+# One writer at a time per process; readers are never blocked by it
+_writer_lock = threading.Lock()
+
+def set_sqlite_pragmas(dbapi_connection) -> None:
+    """Apply the production SQLite profile to a new connection"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA cache_size={settings.SQLITE_CACHE_SIZE}")
+    cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+def _connection_info(dbapi_connection) -> dict:
+    # The dialect's first-connect probe passes an ad-hoc proxy with no info;
+    # it never takes the writer lock
+    try:
+        return dbapi_connection.info
+    except NotImplementedError:
+        return {}
+
+def _release_writer_lock(info) -> None:
+    if info.pop("holds_writer_lock", False):
+        _writer_lock.release()
+
+async def _acquire_writer_lock_async(timeout: float) -> bool:
+    """Take the writer lock from the event loop, waiting for it in the default executor"""
+    if _writer_lock.acquire(blocking=False):
+        return True
+    waiter = asyncio.get_running_loop().run_in_executor(None, _writer_lock.acquire, True, timeout)
+    try:
+        return await asyncio.shield(waiter)
+    except asyncio.CancelledError:
+        # Nobody will release a lock the abandoned waiter goes on to take
+        waiter.add_done_callback(lambda done: done.result() and _writer_lock.release())
+        raise
+
+def configure_sqlite_engine(engine: Engine, serialize_writes: bool = False) -> None:
+    """
+    Apply pragmas on connect and, when serialize_writes is set, queue write
+    transactions behind a process-wide lock so they take turns instead of
+    failing with "database is locked". The lock is taken on a transaction's
+    first write statement and released once the DBAPI commit or rollback has
+    returned, with checkin as the backstop.
+
+    The lock is shared by the sync and async engines of a database. On an
+    async engine (aiosqlite) the wait happens in the loop's default
+    executor, so the event loop keeps running while a writer queues.
+    """
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        set_sqlite_pragmas(dbapi_connection)
+
+    if not serialize_writes:
+        return
+
+    timeout = settings.SQLITE_BUSY_TIMEOUT_MS / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _acquire_writer_lock(conn, cursor, statement, parameters, context, executemany):
+        if conn.info.get("holds_writer_lock") or not WRITE_STATEMENT.match(statement):
+            return
+        if conn.dialect.is_async:
+            # Async engines run their events in a greenlet on the event loop
+            acquired = await_only(_acquire_writer_lock_async(timeout))
+        else:
+            acquired = _writer_lock.acquire(timeout=timeout)
+        if acquired:
+            conn.info["holds_writer_lock"] = True
+        else:
+            # Let SQLite's own busy handler have the final say
+            logger.warning("Timed out waiting for the SQLite writer lock")
+
+    # The engine's commit/rollback events fire before the COMMIT is sent, so
+    # the lock is released by wrapping the dialect calls that actually run it
+    dialect = engine.dialect
+    do_commit, do_rollback = dialect.do_commit, dialect.do_rollback
+
+    def _do_commit(dbapi_connection):
+        do_commit(dbapi_connection)
+        _release_writer_lock(_connection_info(dbapi_connection))
+
+    def _do_rollback(dbapi_connection):
+        try:
+            do_rollback(dbapi_connection)
+        finally:
+            _release_writer_lock(_connection_info(dbapi_connection))
+
+    dialect.do_commit = _do_commit
+    dialect.do_rollback = _do_rollback
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        _release_writer_lock(connection_record.info)
@@ -0,0 +1,215 @@
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Expired rows are purged from disk after this many writes
+PURGE_INTERVAL = 1000
+
+class TMDBCache:
+    """
+    Two-level TTL cache of TMDB lookups: a bounded in-memory LRU in front of
+    a SQLite file, so entries survive restarts and are shared by workers on
+    the same host. Values must be JSON-serializable.
+
+    Misses (no search results, unknown TMDB id) are cached too, with the
+    shorter negative TTL. Lookups that failed must not be cached. If the
+    file can't be opened or written the cache carries on in memory only.
+
+    get and set are coroutines: the LRU is consulted on the event loop,
+    the file only from the threadpool.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int, negative_ttl_seconds: int, path: str):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.path = path
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        # The LRU and the file have separate locks, so memory hits never
+        # wait behind disk I/O
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_opened = False
+        self._writes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def _disk(self) -> Optional[sqlite3.Connection]:
+        # Opened on first use so importing the module doesn't touch the filesystem
+        if not self._disk_opened:
+            self._disk_opened = True
+            if self.path:
+                try:
+                    db = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+                    db.execute("PRAGMA journal_mode=WAL")
+                    db.execute("PRAGMA synchronous=NORMAL")
+                    db.execute(
+                        "CREATE TABLE IF NOT EXISTS tmdb_cache "
+                        "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+                    )
+                    db.execute("DELETE FROM tmdb_cache WHERE expires_at < ?", (time.time(),))
+                    self._db = db
+                except sqlite3.Error as e:
+                    logger.warning(f"TMDB cache file {self.path} unavailable, caching in memory only: {str(e)}")
+                    self.disk_errors += 1
+        return self._db
+
+    def _remember(self, key: str, expires_at: float, value: Any) -> None:
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def _is_negative(value: Any) -> bool:
+        return value is None or value == []
+
+    def _lookup_memory(self, key: str, now: float) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at >= now:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    self.negative_hits += self._is_negative(value)
+                    return True, value
+                del self._entries[key]
+            return False, None
+
+    def _lookup_disk(self, key: str, now: float) -> Tuple[bool, Any]:
+        row = None
+        with self._disk_lock:
+            db = self._disk()
+            if db is not None:
+                try:
+                    row = db.execute(
+                        "SELECT value, expires_at FROM tmdb_cache WHERE key = ? AND expires_at >= ?",
+                        (key, now),
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.warning(f"Error reading TMDB cache: {str(e)}")
+                    self.disk_errors += 1
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return False, None
+            value = orjson.loads(row[0])
+            self._remember(key, row[1], value)
+            self.disk_hits += 1
+            self.negative_hits += self._is_negative(value)
+            return True, value
+
+    def _store_disk(self, key: str, value: Any, expires_at: float) -> None:
+        with self._disk_lock:
+            db = self._disk()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO tmdb_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, orjson.dumps(value), expires_at),
+                )
+                self._writes += 1
+                if self._writes % PURGE_INTERVAL == 0:
+                    db.execute("DELETE FROM tmdb_cache WHERE expires_at < ?", (time.time(),))
+            except sqlite3.Error as e:
+                logger.warning(f"Error writing TMDB cache: {str(e)}")
+                self.disk_errors += 1
+
+    def _uses_disk(self) -> bool:
+        return bool(self.path) and (self._db is not None or not self._disk_opened)
+
+    async def get(self, key: str) -> Tuple[bool, Any]:
+        """Return (found, value); found is False when the key isn't cached or has expired"""
+        if not self.enabled:
+            return False, None
+
+        now = time.time()
+        found, value = self._lookup_memory(key, now)
+        if found:
+            return found, value
+        if not self._uses_disk():
+            with self._lock:
+                self.misses += 1
+            return False, None
+        # The file is read in the threadpool, never on the event loop
+        return await run_in_threadpool(self._lookup_disk, key, now)
+
+    async def set(self, key: str, value: Any) -> None:
+        """Cache a lookup result; None and [] are cached as misses with the negative TTL"""
+        if not self.enabled:
+            return
+
+        ttl = self.negative_ttl_seconds if self._is_negative(value) else self.ttl_seconds
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+
+        with self._lock:
+            self._remember(key, expires_at, value)
+        if self._uses_disk():
+            await run_in_threadpool(self._store_disk, key, value, expires_at)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        with self._disk_lock:
+            db = self._disk()
+            if db is not None:
+                try:
+                    db.execute("DELETE FROM tmdb_cache")
+                except sqlite3.Error as e:
+                    logger.warning(f"Error clearing TMDB cache: {str(e)}")
+                    self.disk_errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "negative_ttl_seconds": self.negative_ttl_seconds,
+                "path": self.path if self._db is not None else None,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "disk_errors": self.disk_errors,
+            }
+
+# Create a singleton instance
+tmdb_cache = TMDBCache(
+    max_size=settings.TMDB_CACHE_MAX_SIZE,
+    ttl_seconds=settings.TMDB_CACHE_TTL_SECONDS,
+    negative_ttl_seconds=settings.TMDB_CACHE_NEGATIVE_TTL_SECONDS,
+    path=settings.TMDB_CACHE_PATH,
+)
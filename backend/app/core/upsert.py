@@ -0,0 +1,45 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import Table
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+# Rows per executemany batch
+BATCH_SIZE = 500
+
+def upsert(
+    db: Session,
+    table: Table,
+    rows: List[Dict[str, Any]],
+    keys: Iterable[str],
+    increment: Iterable[str] = (),
+    replace: Iterable[str] = (),
+    version: Optional[str] = None,
+) -> None:
+    """
+    Insert rows, or on a conflict with an existing row on the keys columns
+    add the increment columns to it and overwrite the replace columns, in a
+    single statement per batch. With version set, an existing row is only
+    updated when the incoming value of that column isn't older than its own.
+    Supports SQLite and PostgreSQL; the caller commits.
+    """
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        statement = sqlite.insert(table)
+    elif dialect == "postgresql":
+        statement = postgresql.insert(table)
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {dialect}")
+
+    updates = {name: table.c[name] + statement.excluded[name] for name in increment}
+    updates.update({name: statement.excluded[name] for name in replace})
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c[name] for name in keys],
+        set_=updates,
+        where=table.c[version] <= statement.excluded[version] if version else None,
+    )
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.execute(statement, rows[start:start + BATCH_SIZE])
@@ -6,3 +6,19 @@ def get_utc_now():
     This should be used instead of datetime.now() when working with timezone-aware database fields.
     """
     return datetime.now(timezone.utc)
+
+def as_utc(value: datetime) -> datetime:
+    """
+    Returns the datetime in UTC. Naive values are taken to be UTC already,
+    which is how SQLite hands back timezone-aware columns.
+    """
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def format_utc(value: datetime) -> str:
+    """
+    Formats a datetime as ISO 8601 UTC with a Z suffix, the way API
+    responses carry timestamps whichever database they were read from.
+    """
+    return as_utc(value).isoformat().replace("+00:00", "Z")
@@ -1,17 +1,28 @@
 import os
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routes import auth, movies, users, subscriptions, payments
+from app.api.routes import auth, movies, users, subscriptions, payments, metrics
 from app.core.config import settings
 from app.core.background_tasks import start_background_tasks
+from app.core.database import read_replicas
+from app.core.read_replicas import STICKY_COOKIE, get_request_user_id
+from app.core.query_metrics import RequestQueryStats, current_request_stats, query_metrics
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.services import movie_api
+from app.services.watch_events import watch_event_buffer
+from app.services.watch_progress import watch_progress_buffer
 
 # Import all models to ensure they're registered with SQLAlchemy
 from app.models.user import User
 from app.models.movie import Movie
+from app.models.rating import Rating
 from app.models.subscription import SubscriptionPlan, Subscription
 from app.models.payment import Payment
+from app.models.watch import WatchEvent, WatchProgress
 
 app = FastAPI(
+    default_response_class=ORJSONResponse,
     title="Movie Streaming API",
     description="API for movie streaming application",
     version="0.1.0",
@@ -31,14 +42,60 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """
+    Pin a user's reads to the primary for a short window after a successful write,
+    in this process and through a cookie that every worker reads back
+    """
+    response = await call_next(request)
+    if (
+        read_replicas.enabled
+        and request.method not in ("GET", "HEAD", "OPTIONS")
+        and response.status_code < 400
+    ):
+        sticky_until = read_replicas.mark_write(get_request_user_id(request))
+        if sticky_until is not None:
+            response.set_cookie(
+                STICKY_COOKIE,
+                f"{sticky_until:.3f}",
+                max_age=read_replicas.sticky_seconds,
+                httponly=True,
+                samesite="lax",
+            )
+    return response
+
+@app.middleware("http")
+async def track_queries(request: Request, call_next):
+    """
+    Attribute SQL statements to the matched route and report them via Server-Timing
+    """
+    if not settings.QUERY_METRICS_ENABLED:
+        return await call_next(request)
+
+    stats = RequestQueryStats()
+    token = current_request_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        current_request_stats.reset(token)
+
+    route = request.scope.get("route")
+    if route is not None:
+        query_metrics.record_request(f"{request.method} {route.path}", stats)
+    response.headers.append("Server-Timing", stats.server_timing())
+    return response
+
 # Include routers with version prefix
 app.include_router(auth.router, prefix="/v1/api", tags=["Authentication"])
 app.include_router(movies.router, prefix="/v1/api", tags=["Movies"])
 app.include_router(users.router, prefix="/v1/api", tags=["Users"])
 app.include_router(subscriptions.router, prefix="/v1/api", tags=["Subscriptions"])
 app.include_router(payments.router, prefix="/v1/api", tags=["Payments"])
+app.include_router(metrics.router, prefix="/v1/api", tags=["Metrics"])
 
 @app.get("/")
 async def root():
@@ -51,3 +108,15 @@ async def startup_event():
     """
     # Start background tasks
     start_background_tasks()
+    watch_event_buffer.start()
+    watch_progress_buffer.start()
+    await movie_api.open_client()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Function that runs when the application stops
+    """
+    await movie_api.close_client()
+    await watch_event_buffer.stop()
+    await watch_progress_buffer.stop()
@@ -1,6 +1,8 @@
 # Initialize the models package
 # Import all models to ensure they're registered with SQLAlchemy
 from app.models.user import User
-from app.models.movie import Movie
+from app.models.movie import Movie, Genre, Person
+from app.models.rating import Rating
 from app.models.subscription import SubscriptionPlan, Subscription
 from app.models.payment import Payment
+from app.models.watch import WatchEvent, WatchProgress
@@ -1,7 +1,51 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Boolean, Index, Table
 from sqlalchemy.sql import func
 from app.core.database import Base
 
+# Normalized index of the comma-separated genre, director and cast strings,
+# maintained by app.services.movie_taxonomy; the strings stay authoritative
+movie_genres = Table(
+    "movie_genres",
+    Base.metadata,
+    Column("movie_id", Integer, ForeignKey("movies.id", ondelete="CASCADE"), primary_key=True),
+    Column("genre_id", Integer, ForeignKey("genres.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_movie_genres_genre_id_movie_id", "genre_id", "movie_id"),
+)
+
+movie_people = Table(
+    "movie_people",
+    Base.metadata,
+    Column("movie_id", Integer, ForeignKey("movies.id", ondelete="CASCADE"), primary_key=True),
+    Column("person_id", Integer, ForeignKey("people.id", ondelete="CASCADE"), primary_key=True),
+    Column("role", String, primary_key=True),  # "director" or "cast"
+    Index("ix_movie_people_person_id_movie_id", "person_id", "movie_id"),
+)
+
+# Precomputed nearest neighbours of each movie, maintained by
+# app.services.movie_similarity
+movie_similarities = Table(
+    "movie_similarities",
+    Base.metadata,
+    Column("movie_id", Integer, ForeignKey("movies.id", ondelete="CASCADE"), primary_key=True),
+    Column("similar_movie_id", Integer, ForeignKey("movies.id", ondelete="CASCADE"), primary_key=True),
+    Column("score", Float, nullable=False),  # Cosine similarity
+    Index("ix_movie_similarities_similar_movie_id", "similar_movie_id"),
+)
+
+class Genre(Base):
+    __tablename__ = "genres"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    key = Column(String, unique=True, index=True, nullable=False)  # Lowercased name for lookups
+
+class Person(Base):
+    __tablename__ = "people"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    key = Column(String, unique=True, index=True, nullable=False)  # Lowercased name for lookups
+
 class Movie(Base):
     __tablename__ = "movies"
 
@@ -20,5 +64,24 @@ class Movie(Base):
     is_transcoded = Column(Boolean, default=False)  # Flag to indicate if video has been transcoded
     transcoding_status = Column(String, default="NOT_STARTED")  # Status of transcoding job
     rating = Column(Float, default=0.0)
+    tmdb_id = Column(Integer)  # TMDB movie the details were fetched from
+    # Running aggregate of user ratings, maintained by app.services.movie_ratings
+    user_rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    user_rating_count = Column(Integer, nullable=False, default=0, server_default="0")
+    user_rating = Column(Float)  # Average, NULL until rated
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        # Transcoding poller: movies with a job still in flight
+        Index(
+            "ix_movies_pending_transcoding",
+            transcoding_status,
+            postgresql_where=(mediaconvert_job_id.isnot(None)) & (is_transcoded == False),
+        ),
+        # Catalog filters
+        Index("ix_movies_release_year", release_year),
+        Index("ix_movies_rating", rating),
+        # TMDB enrichment
+        Index("ix_movies_tmdb_id", tmdb_id),
+    )
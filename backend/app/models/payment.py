@@ -1,9 +1,9 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from datetime import timedelta
 
-from app.core.database import Base
+from app.core.database import Base, RELATIONSHIP_LAZY
 from app.core.utils import get_utc_now
 
 class Payment(Base):
@@ -20,12 +20,21 @@ class Payment(Base):
     razorpay_signature = Column(String, nullable=True)
     status = Column(String, default="pending")  # pending, successful, failed
     payment_data = Column(JSON, nullable=True)  # Store additional payment data
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set by the app so SQLite stores it with microseconds, like every bound
+    # timestamp; keyset cursors compare against that text
+    created_at = Column(DateTime(timezone=True), default=get_utc_now, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
-    user = relationship("app.models.user.User", back_populates="payments")
-    subscription = relationship("app.models.subscription.Subscription", back_populates="payments")
+    user = relationship("app.models.user.User", back_populates="payments", lazy=RELATIONSHIP_LAZY)
+    subscription = relationship("app.models.subscription.Subscription", back_populates="payments", lazy=RELATIONSHIP_LAZY)
+
+    __table_args__ = (
+        # Payment history: a user's payments newest first
+        Index("ix_payments_user_id_created_at", user_id, created_at),
+        # Admin listing ordered by most recent first
+        Index("ix_payments_created_at_id", created_at, id),
+    )
 
     def is_verified(self) -> bool:
         """Check if the payment is verified"""
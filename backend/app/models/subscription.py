@@ -1,9 +1,9 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from datetime import timedelta
 
-from app.core.database import Base
+from app.core.database import Base, RELATIONSHIP_LAZY
 from app.core.utils import get_utc_now
 
 class SubscriptionPlan(Base):
@@ -20,7 +20,7 @@ class SubscriptionPlan(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationship with subscriptions
-    subscriptions = relationship("Subscription", back_populates="plan")
+    subscriptions = relationship("Subscription", back_populates="plan", lazy=RELATIONSHIP_LAZY)
 
 class Subscription(Base):
     __tablename__ = "subscriptions"
@@ -33,13 +33,28 @@ class Subscription(Base):
     is_active = Column(Boolean, default=True)
     auto_renew = Column(Boolean, default=True)
     payment_status = Column(String, default="pending")  # pending, paid, failed
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set by the app so SQLite stores it with microseconds, like every bound
+    # timestamp; keyset cursors compare against that text
+    created_at = Column(DateTime(timezone=True), default=get_utc_now, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships - using string reference to avoid circular imports
-    user = relationship("app.models.user.User", back_populates="subscriptions")
-    plan = relationship("SubscriptionPlan", back_populates="subscriptions")
-    payments = relationship("app.models.payment.Payment", back_populates="subscription")
+    user = relationship("app.models.user.User", back_populates="subscriptions", lazy=RELATIONSHIP_LAZY)
+    plan = relationship("SubscriptionPlan", back_populates="subscriptions", lazy=RELATIONSHIP_LAZY)
+    payments = relationship("app.models.payment.Payment", back_populates="subscription", lazy=RELATIONSHIP_LAZY)
+
+    __table_args__ = (
+        # Access checks: a user's active, paid subscriptions by end date
+        # (partial on PostgreSQL, a plain composite index elsewhere)
+        Index(
+            "ix_subscriptions_user_active_paid_end_date",
+            user_id,
+            end_date,
+            postgresql_where=(is_active == True) & (payment_status == "paid"),
+        ),
+        # Admin listing ordered by most recent first
+        Index("ix_subscriptions_created_at_id", created_at, id),
+    )
 
     def is_valid(self) -> bool:
         """Check if the subscription is currently valid"""
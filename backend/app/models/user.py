@@ -1,7 +1,7 @@
 from sqlalchemy import Boolean, Column, Integer, String, DateTime
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-from app.core.database import Base
+from app.core.database import Base, RELATIONSHIP_LAZY
 
 class User(Base):
     __tablename__ = "users"
@@ -16,7 +16,7 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationship with subscriptions - using string reference to avoid circular imports
-    subscriptions = relationship("app.models.subscription.Subscription", back_populates="user", cascade="all, delete-orphan")
+    subscriptions = relationship("app.models.subscription.Subscription", back_populates="user", cascade="all, delete-orphan", lazy=RELATIONSHIP_LAZY)
 
     # Relationship with payments
-    payments = relationship("app.models.payment.Payment", back_populates="user", cascade="all, delete-orphan")
+    payments = relationship("app.models.payment.Payment", back_populates="user", cascade="all, delete-orphan", lazy=RELATIONSHIP_LAZY)
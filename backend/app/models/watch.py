@@ -0,0 +1,52 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, Table
+from app.core.database import Base
+
+class WatchEvent(Base):
+    __tablename__ = "watch_events"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    movie_id = Column(Integer, ForeignKey("movies.id", ondelete="CASCADE"), nullable=False)
+    event = Column(String, nullable=False)  # start, heartbeat or complete
+    position = Column(Integer)  # Playback position in seconds
+    created_at = Column(DateTime(timezone=True), nullable=False)  # When the event was received
+
+    # Written in bulk by app.services.watch_events; keep indexes to a minimum
+    __table_args__ = (
+        Index("ix_watch_events_movie_id_created_at", movie_id, created_at),
+        Index("ix_watch_events_user_id_created_at", user_id, created_at),
+    )
+
+# Event counts per movie and hour (hours since the Unix epoch), maintained by
+# app.services.watch_events for trending; buckets older than the window are pruned
+movie_watch_counts = Table(
+    "movie_watch_counts",
+    Base.metadata,
+    Column("movie_id", Integer, ForeignKey("movies.id", ondelete="CASCADE"), primary_key=True),
+    Column("hour", Integer, primary_key=True),
+    Column("plays", Integer, nullable=False, default=0),
+    Column("heartbeats", Integer, nullable=False, default=0),
+    Column("completions", Integer, nullable=False, default=0),
+    Index("ix_movie_watch_counts_hour", "hour"),
+)
+
+class WatchProgress(Base):
+    __tablename__ = "watch_progress"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    movie_id = Column(Integer, ForeignKey("movies.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(Integer, nullable=False, default=0)  # Resume position in seconds
+    completed = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)  # Last playback activity
+
+    # Written in coalesced batches by app.services.watch_progress
+    __table_args__ = (
+        # Continue watching: a user's unfinished movies by last activity
+        Index(
+            "ix_watch_progress_continue_watching",
+            user_id,
+            updated_at,
+            postgresql_where=completed == False,
+            sqlite_where=completed == False,
+        ),
+    )
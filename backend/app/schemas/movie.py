@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -17,6 +17,7 @@ class MovieBase(BaseModel):
     is_transcoded: Optional[bool] = False
     transcoding_status: Optional[str] = "NOT_STARTED"
     rating: Optional[float] = 0.0
+    tmdb_id: Optional[int] = None
 
 # Properties to receive on movie creation
 class MovieCreate(MovieBase):
@@ -35,6 +36,8 @@ class MovieUpdate(MovieBase):
 # Properties shared by models stored in DB
 class MovieInDBBase(MovieBase):
     id: int
+    user_rating: Optional[float] = None  # Average of user ratings
+    user_rating_count: int = 0
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -44,3 +47,30 @@ class MovieInDBBase(MovieBase):
 # Additional properties to return via API
 class Movie(MovieInDBBase):
     pass
+
+# Lightweight projection for poster grids (/movies?view=card)
+class MovieCard(BaseModel):
+    id: int
+    title: Optional[str] = None
+    poster_url: Optional[str] = None
+    rating: Optional[float] = 0.0
+
+    class Config:
+        from_attributes = True
+
+# Counts of matching movies per genre, director and decade
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+class MovieFacets(BaseModel):
+    total: int
+    genres: List[FacetCount]
+    directors: List[FacetCount]
+    decades: List[FacetCount]
+
+# Batch TMDB enrichment job
+class MovieEnrichmentRequest(BaseModel):
+    movie_ids: List[int] = []
+    tmdb_ids: List[int] = []
+    overwrite: bool = False  # Replace existing values instead of only filling empty ones
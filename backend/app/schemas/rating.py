@@ -0,0 +1,13 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+# A user's rating of a movie
+class RatingCreate(BaseModel):
+    score: int = Field(..., ge=1, le=10)
+
+# The caller's rating and the movie's updated aggregate
+class MovieRating(BaseModel):
+    movie_id: int
+    score: Optional[int] = None
+    user_rating: Optional[float] = None
+    user_rating_count: int = 0
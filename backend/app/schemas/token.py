@@ -1,9 +1,37 @@
 from typing import Optional
+from datetime import datetime, timezone
 from pydantic import BaseModel
 
+from app.core.utils import get_utc_now
+
 class Token(BaseModel):
     access_token: str
     token_type: str
 
+# Playback entitlement embedded in the access token
+class TokenEntitlement(BaseModel):
+    is_active: Optional[bool] = None  # Account state at issue; missing from older tokens
+    is_superuser: bool = False
+    plan_id: Optional[int] = None
+    plan_name: Optional[str] = None
+    plan_duration_days: Optional[int] = None
+    expires_at: Optional[int] = None  # Subscription end as a UTC timestamp
+
+    @property
+    def end_date(self) -> Optional[datetime]:
+        if self.expires_at is None:
+            return None
+        return datetime.fromtimestamp(self.expires_at, tz=timezone.utc)
+
+    def has_subscription(self) -> bool:
+        """Check if the entitlement carries a subscription that hasn't ended yet"""
+        end_date = self.end_date
+        return end_date is not None and end_date > get_utc_now()
+
+    def has_access(self) -> bool:
+        """Check if the entitlement grants playback access"""
+        return self.is_superuser or self.has_subscription()
+
 class TokenPayload(BaseModel):
     sub: Optional[str] = None
+    ent: Optional[TokenEntitlement] = None
@@ -0,0 +1,34 @@
+from typing import Literal, Optional
+from pydantic import BaseModel, Field, field_serializer
+from datetime import datetime
+
+from app.core.utils import format_utc
+
+from app.schemas.movie import MovieCard
+
+# Playback event sent by players
+class WatchEventCreate(BaseModel):
+    event: Literal["start", "heartbeat", "complete"]
+    position: Optional[int] = Field(None, ge=0)  # Playback position in seconds
+
+# Resume position sent by players
+class WatchProgressUpdate(BaseModel):
+    position: int = Field(..., ge=0)  # Seconds
+    completed: bool = False
+
+class WatchProgress(BaseModel):
+    movie_id: int
+    position: int
+    completed: bool
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+    @field_serializer("updated_at")
+    def serialize_updated_at(self, updated_at: datetime) -> str:
+        return format_utc(updated_at)
+
+# Entry of /users/me/continue-watching
+class ContinueWatchingItem(WatchProgress):
+    movie: MovieCard
@@ -1,17 +1,66 @@
 import os
+import asyncio
 import logging
-import requests
-from typing import Dict, Any, Optional, List
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.tmdb_cache import tmdb_cache
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 # TMDB API configuration
 TMDB_API_KEY = os.getenv("TMDB_API_KEY", "")
-TMDB_BASE_URL = "https://api.themoviedb.org/3"
+TMDB_BASE_URL = os.getenv("TMDB_BASE_URL", "https://api.themoviedb.org/3")
 TMDB_IMAGE_BASE_URL = "https://image.tmdb.org/t/p/w500"
+TMDB_TIMEOUT = httpx.Timeout(settings.TMDB_TIMEOUT_SECONDS, connect=settings.TMDB_CONNECT_TIMEOUT_SECONDS)
+
+# Shared client, opened on application startup and closed on shutdown
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Lookups in flight, by cache key
+_inflight: Dict[str, "asyncio.Task[Any]"] = {}
+
+def get_client() -> httpx.AsyncClient:
+    """The shared TMDB client, created on first use outside the application lifespan"""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    # Pooled connections belong to the loop that opened them
+    if _client is None or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            base_url=TMDB_BASE_URL,
+            timeout=TMDB_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.TMDB_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.TMDB_MAX_CONNECTIONS,
+            ),
+        )
+        _client_loop = loop
+    return _client
+
+async def open_client() -> None:
+    get_client()
+
+async def close_client() -> None:
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = _client_loop = None
+
+async def _coalesced(key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+    """Run fetch() once for concurrent lookups of the same key, sharing its result"""
+    task = _inflight.get(key)
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(fetch())
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # A cancelled caller mustn't cancel the lookup other callers are waiting on
+    return await asyncio.shield(task)
 
-def search_movie(title: str) -> List[Dict[str, Any]]:
+async def search_movie(title: str) -> List[Dict[str, Any]]:
     """
     Search for movies by title using TMDB API
     Returns a list of movie results
@@ -20,93 +69,115 @@ def search_movie(title: str) -> List[Dict[str, Any]]:
         logger.warning("TMDB_API_KEY not set. Using mock data.")
         return _get_mock_search_results(title)
     
-    try:
-        url = f"{TMDB_BASE_URL}/search/movie"
+    key = f"search:{' '.join(title.split()).casefold()}"
+    found, results = await tmdb_cache.get(key)
+    if found:
+        return results
+    
+    async def fetch() -> List[Dict[str, Any]]:
         params = {
             "api_key": TMDB_API_KEY,
             "query": title,
             "language": "en-US",
             "page": 1,
-            "include_adult": False
+            "include_adult": "false"
         }
         
-        response = requests.get(url, params=params)
+        response = await get_client().get("/search/movie", params=params)
         response.raise_for_status()
         
         data = response.json()
         results = data.get("results", [])
         
-        # Format the results
-        formatted_results = []
-        for movie in results[:5]:  # Limit to top 5 results
-            formatted_results.append({
-                "tmdb_id": movie.get("id"),
-                "title": movie.get("title"),
-                "release_year": _extract_year(movie.get("release_date", "")),
-                "poster_path": _get_poster_url(movie.get("poster_path")),
-                "overview": movie.get("overview"),
-                "vote_average": movie.get("vote_average", 0)
-            })
-        
-        return formatted_results
+        # Limit to top 5 results
+        results = [format_search_result(movie) for movie in results[:5]]
+        await tmdb_cache.set(key, results)
+        return results
     
+    try:
+        return await _coalesced(key, fetch)
     except Exception as e:
-        logger.error(f"Error searching for movie: {str(e)}")
+        logger.error(f"Error searching for movie: {type(e).__name__}: {str(e)}")
         return _get_mock_search_results(title)
 
-def get_movie_details(movie_id: int) -> Optional[Dict[str, Any]]:
+async def get_movie_details(movie_id: int) -> Optional[Dict[str, Any]]:
     """
     Get detailed information about a movie by its TMDB ID
+    Returns None if TMDB doesn't know the ID
     """
     if not TMDB_API_KEY:
         logger.warning("TMDB_API_KEY not set. Using mock data.")
         return _get_mock_movie_details(movie_id)
     
-    try:
-        url = f"{TMDB_BASE_URL}/movie/{movie_id}"
+    key = f"details:{movie_id}"
+    found, details = await tmdb_cache.get(key)
+    if found:
+        return details
+    
+    async def fetch() -> Optional[Dict[str, Any]]:
         params = {
             "api_key": TMDB_API_KEY,
             "language": "en-US",
             "append_to_response": "credits"
         }
         
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        
-        movie = response.json()
-        
-        # Extract director(s)
-        directors = []
-        if "credits" in movie and "crew" in movie["credits"]:
-            directors = [
-                crew["name"] for crew in movie["credits"]["crew"]
-                if crew["job"] == "Director"
-            ]
-        
-        # Extract cast
-        cast = []
-        if "credits" in movie and "cast" in movie["credits"]:
-            cast = [actor["name"] for actor in movie["credits"]["cast"][:5]]
-        
-        # Extract genres
-        genres = [genre["name"] for genre in movie.get("genres", [])]
-        
-        return {
-            "title": movie.get("title"),
-            "description": movie.get("overview"),
-            "release_year": _extract_year(movie.get("release_date", "")),
-            "duration": movie.get("runtime", 0),
-            "genre": ", ".join(genres),
-            "director": ", ".join(directors),
-            "cast": ", ".join(cast),
-            "poster_url": _get_poster_url(movie.get("poster_path")),
-            "rating": movie.get("vote_average", 0)
-        }
+        response = await get_client().get(f"/movie/{movie_id}", params=params)
+        if response.status_code == 404:
+            details = None
+        else:
+            response.raise_for_status()
+            details = format_movie_details(response.json())
+        await tmdb_cache.set(key, details)
+        return details
     
+    try:
+        return await _coalesced(key, fetch)
     except Exception as e:
-        logger.error(f"Error getting movie details: {str(e)}")
+        logger.error(f"Error getting movie details: {type(e).__name__}: {str(e)}")
         return _get_mock_movie_details(movie_id)
 
+def format_search_result(movie: Dict[str, Any]) -> Dict[str, Any]:
+    """Format a TMDB search result"""
+    return {
+        "tmdb_id": movie.get("id"),
+        "title": movie.get("title"),
+        "release_year": _extract_year(movie.get("release_date", "")),
+        "poster_path": _get_poster_url(movie.get("poster_path")),
+        "overview": movie.get("overview"),
+        "vote_average": movie.get("vote_average", 0)
+    }
+
+def format_movie_details(movie: Dict[str, Any]) -> Dict[str, Any]:
+    """Format a TMDB movie fetched with append_to_response=credits as movie fields"""
+    # Extract director(s)
+    directors = []
+    if "credits" in movie and "crew" in movie["credits"]:
+        directors = [
+            crew["name"] for crew in movie["credits"]["crew"]
+            if crew["job"] == "Director"
+        ]
+    
+    # Extract cast
+    cast = []
+    if "credits" in movie and "cast" in movie["credits"]:
+        cast = [actor["name"] for actor in movie["credits"]["cast"][:5]]
+    
+    # Extract genres
+    genres = [genre["name"] for genre in movie.get("genres", [])]
+    
+    return {
+        "tmdb_id": movie.get("id"),
+        "title": movie.get("title"),
+        "description": movie.get("overview"),
+        "release_year": _extract_year(movie.get("release_date", "")),
+        "duration": movie.get("runtime", 0),
+        "genre": ", ".join(genres),
+        "director": ", ".join(directors),
+        "cast": ", ".join(cast),
+        "poster_url": _get_poster_url(movie.get("poster_path")),
+        "rating": movie.get("vote_average", 0)
+    }
+
 def _extract_year(date_str: str) -> int:
     """Extract year from a date string (YYYY-MM-DD)"""
     try:
@@ -0,0 +1,168 @@
+import csv
+import codecs
+import logging
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from app.core.catalog_cache import catalog_cache
+from app.core.database import SessionLocal
+from app.models.movie import Movie
+from app.schemas.movie import MovieCreate
+from app.services.movie_taxonomy import index_movies
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Rows inserted per statement and transaction
+BATCH_SIZE = 1000
+
+# Longest line accepted before the import is aborted
+MAX_LINE_LENGTH = 1024 * 1024
+
+# Fields taken from each row, as in create_movie
+IMPORT_FIELDS = {
+    "title", "description", "release_year", "duration", "genre",
+    "director", "cast", "poster_url", "video_url", "tmdb_id",
+}
+
+class ImportProgressResponse(StreamingResponse):
+    """
+    Streams progress while the import is still reading the request body.
+    StreamingResponse listens for disconnects by calling receive(), which
+    would swallow body chunks here; a disconnect instead surfaces as an
+    error reading the body or sending progress.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+
+def _event(**fields: Any) -> bytes:
+    return orjson.dumps(fields) + b"\n"
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines without holding more than one line"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+        if len(pending) > MAX_LINE_LENGTH:
+            raise ValueError(f"Line longer than {MAX_LINE_LENGTH} characters")
+    pending += decoder.decode(b"", final=True)
+    if pending.strip():
+        yield pending.rstrip("\r")
+
+async def _csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Dict[str, Any]]:
+    header = None
+    record = ""
+    async for line in lines:
+        record = f"{record}\n{line}" if record else line
+        # A quoted field may span lines; wait until its quotes are balanced
+        if record.count('"') % 2:
+            if len(record) > MAX_LINE_LENGTH:
+                raise ValueError(f"Record longer than {MAX_LINE_LENGTH} characters")
+            continue
+        if not record.strip():
+            record = ""
+            continue
+        values = next(csv.reader([record]))
+        record = ""
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        # Empty cells count as missing so optional fields fall back to defaults
+        yield {name: value for name, value in zip(header, values) if value != ""}
+    if record:
+        raise ValueError("Unterminated quoted field at end of file")
+
+async def _ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[str]:
+    # Lines are parsed per row so a malformed one is reported, not fatal
+    async for line in lines:
+        if line.strip():
+            yield line
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}"
+        for detail in error.errors()
+    ]
+
+def _insert_batch(batch: List[Tuple[int, Dict[str, Any]]]) -> None:
+    # Runs in the threadpool on the sync engine: a batch is dozens of
+    # statements, and SQLite writes queue behind its writer lock there
+    with SessionLocal() as db:
+        movies = db.execute(
+            insert(Movie).returning(
+                Movie.id, Movie.genre, Movie.director, Movie.cast, sort_by_parameter_order=True
+            ),
+            [values for _, values in batch],
+        ).all()
+        index_movies(db, movies, replace=False)
+        db.commit()
+    catalog_cache.invalidate()
+
+async def import_movies(chunks: AsyncIterator[bytes], file_format: str) -> AsyncIterator[bytes]:
+    """
+    Import movies from a CSV (with a header row) or NDJSON byte stream,
+    yielding NDJSON progress: an "error" event per rejected row, a
+    "progress" event per committed batch and a final "done" event.
+    Rows are validated with MovieCreate and inserted in batches of
+    BATCH_SIZE, each in its own transaction.
+    """
+    records = _csv_records(_lines(chunks)) if file_format == "csv" else _ndjson_records(_lines(chunks))
+    rows = imported = failed = 0
+    batch: List[Tuple[int, Dict[str, Any]]] = []
+
+    async def flush() -> AsyncIterator[bytes]:
+        nonlocal imported, failed
+        try:
+            await run_in_threadpool(_insert_batch, batch)
+            imported += len(batch)
+        except SQLAlchemyError as e:
+            logger.error(f"Error importing rows {batch[0][0]}-{batch[-1][0]}: {str(e)}")
+            failed += len(batch)
+            yield _event(event="error", rows=[batch[0][0], batch[-1][0]], errors=[str(getattr(e, "orig", None) or e)])
+        batch.clear()
+        yield _event(event="progress", rows=rows, imported=imported, failed=failed)
+
+    try:
+        async for record in records:
+            rows += 1
+            try:
+                if isinstance(record, str):
+                    record = orjson.loads(record)
+                if not isinstance(record, dict):
+                    raise ValueError("Row must be an object")
+                movie_in = MovieCreate(**record)
+            except ValidationError as e:
+                failed += 1
+                yield _event(event="error", row=rows, errors=_validation_messages(e))
+                continue
+            except (TypeError, ValueError) as e:
+                failed += 1
+                yield _event(event="error", row=rows, errors=[str(e)])
+                continue
+
+            batch.append((rows, movie_in.model_dump(include=IMPORT_FIELDS)))
+            if len(batch) >= BATCH_SIZE:
+                async for event in flush():
+                    yield event
+    except (ValueError, csv.Error) as e:
+        # Unreadable input; rows already committed stay imported
+        yield _event(event="error", row=rows + 1, errors=[f"Aborted: {str(e)}"])
+
+    if batch:
+        async for event in flush():
+            yield event
+
+    logger.info(f"Movie import finished: {rows} rows, {imported} imported, {failed} failed")
+    yield _event(event="done", rows=rows, imported=imported, failed=failed)
@@ -0,0 +1,107 @@
+import logging
+from typing import Any, Dict, Optional
+
+from sqlalchemy import Float, and_, cast, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.utils import get_utc_now
+from app.models.movie import Movie
+from app.models.rating import Rating
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Attempts at a rating change that raced a concurrent change by the same user
+MAX_ATTEMPTS = 3
+
+def _apply(db: Session, movie_id: int, sum_delta: int, count_delta: int) -> Optional[Dict[str, Any]]:
+    """
+    Add to a movie's running sum and count and recompute its average, in one
+    UPDATE so concurrent raters never lose each other's changes. Returns the
+    new aggregate, or None if the movie doesn't exist.
+    """
+    count = Movie.user_rating_count + count_delta
+    row = db.execute(
+        update(Movie)
+        .where(Movie.id == movie_id)
+        .values(
+            user_rating_sum=Movie.user_rating_sum + sum_delta,
+            user_rating_count=count,
+            user_rating=cast(Movie.user_rating_sum + sum_delta, Float) / func.nullif(count, 0),
+        )
+        .returning(Movie.user_rating, Movie.user_rating_count)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        return None
+    return {"movie_id": movie_id, "user_rating": row.user_rating, "user_rating_count": row.user_rating_count}
+
+def _delete_rating(db: Session, user_id: int, movie_id: int) -> Optional[int]:
+    # Deleting first takes the rating's row lock (the write lock on SQLite),
+    # so the score it returns can't change before the aggregate is updated
+    return db.scalar(
+        delete(Rating)
+        .where(Rating.user_id == user_id, Rating.movie_id == movie_id)
+        .returning(Rating.score)
+    )
+
+def rate_movie(db: Session, user_id: int, movie_id: int, score: int) -> Optional[Dict[str, Any]]:
+    """
+    Set a user's rating of a movie and move the movie's aggregate by the
+    difference, in one transaction that this commits. Returns the rating
+    and the new aggregate, or None if the movie doesn't exist.
+    """
+    if db.scalar(select(Movie.id).where(Movie.id == movie_id)) is None:
+        return None
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            previous = _delete_rating(db, user_id, movie_id)
+            db.execute(insert(Rating).values(user_id=user_id, movie_id=movie_id, score=score, updated_at=get_utc_now()))
+            aggregate = _apply(db, movie_id, score - (previous or 0), 0 if previous is not None else 1)
+            if aggregate is None:
+                db.rollback()
+                return None
+            db.commit()
+            return {**aggregate, "score": score}
+        except IntegrityError:
+            # The same user's concurrent request inserted the rating first; redo against it
+            db.rollback()
+            if attempt == MAX_ATTEMPTS:
+                raise
+
+def unrate_movie(db: Session, user_id: int, movie_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Remove a user's rating of a movie and take it out of the aggregate, in
+    one transaction that this commits. Returns the new aggregate, or None if
+    the user hadn't rated the movie.
+    """
+    previous = _delete_rating(db, user_id, movie_id)
+    aggregate = _apply(db, movie_id, -previous, -1) if previous is not None else None
+    if aggregate is None:
+        db.rollback()
+        return None
+    db.commit()
+    return {**aggregate, "score": None}
+
+def get_movie_rating(db: Session, user_id: int, movie_id: int) -> Optional[Dict[str, Any]]:
+    """A user's rating of a movie (None if unrated) and its aggregate; None if the movie doesn't exist"""
+    row = db.execute(
+        select(Movie.user_rating, Movie.user_rating_count, Rating.score)
+        .outerjoin(Rating, and_(Rating.movie_id == Movie.id, Rating.user_id == user_id))
+        .where(Movie.id == movie_id)
+    ).first()
+    if row is None:
+        return None
+    return {"movie_id": movie_id, "score": row.score, "user_rating": row.user_rating, "user_rating_count": row.user_rating_count}
+
+def unlink_movie_ratings(db: Session, movie_id: int) -> None:
+    """Remove a movie's ratings ahead of deleting it"""
+    db.execute(delete(Rating).where(Rating.movie_id == movie_id))
+
+def delete_user_ratings(db: Session, user_id: int) -> None:
+    """Remove a user's ratings ahead of deleting them, taking them out of each movie's aggregate; the caller commits"""
+    removed = db.execute(delete(Rating).where(Rating.user_id == user_id).returning(Rating.movie_id, Rating.score)).all()
+    for movie_id, score in removed:
+        _apply(db, movie_id, -score, -1)
@@ -0,0 +1,137 @@
+import re
+import logging
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.movie import Movie
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Ranking weight of each indexed column: title, description, director, cast
+SQLITE_COLUMN_WEIGHTS = (10.0, 1.0, 4.0, 2.0)
+
+# Query terms beyond this are ignored
+MAX_TERMS = 8
+
+def _terms(query: str) -> List[str]:
+    return re.findall(r"\w+", query.lower())[:MAX_TERMS]
+
+def _max_typos(term: str) -> int:
+    """Edits tolerated for a term; short terms must match exactly"""
+    if len(term) <= 3:
+        return 0
+    return 1 if len(term) <= 6 else 2
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Levenshtein distance, giving up with max_distance + 1 once it's exceeded"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+def search_catalog(db: Session, query: str, limit: int = 20) -> List[Movie]:
+    """
+    Ranked full-text search over movie title, description, director and cast.
+    Every term matches as a word prefix; when nothing matches, misspelled
+    terms are replaced with the closest indexed word and the search retried.
+    """
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        return _search_sqlite(db, terms, limit)
+    if dialect == "postgresql":
+        return _search_postgres(db, terms, query, limit)
+
+    logger.warning(f"Full-text search is not supported on {dialect}, matching titles only")
+    return db.query(Movie).filter(Movie.title.ilike(f"%{query}%")).limit(limit).all()
+
+# SQLite: FTS5 table movies_fts kept in sync with movies by triggers
+
+def _sqlite_query(db: Session, terms: List[str], limit: int) -> List[Movie]:
+    match = " ".join(f'"{term}"*' for term in terms)
+    weights = ", ".join(str(weight) for weight in SQLITE_COLUMN_WEIGHTS)
+    statement = text(
+        "SELECT movies.* FROM movies_fts JOIN movies ON movies.id = movies_fts.rowid "
+        f"WHERE movies_fts MATCH :match ORDER BY bm25(movies_fts, {weights}) LIMIT :limit"
+    )
+    return db.query(Movie).from_statement(statement).params(match=match, limit=limit).all()
+
+def _sqlite_correct(db: Session, term: str) -> Optional[str]:
+    """Closest indexed word to a term that matches nothing, or None"""
+    vocabulary = "SELECT term, doc FROM movies_fts_vocab WHERE term >= :low AND term < :high"
+    # Terms that are a prefix of an indexed word are left alone
+    if db.execute(text(vocabulary + " LIMIT 1"), {"low": term, "high": term + "\uffff"}).first():
+        return term
+
+    max_typos = _max_typos(term)
+    if not max_typos:
+        return None
+    # Candidates are of similar length and share the first two letters, in
+    # either order; scanning the vocabulary any wider is too slow to stay
+    # interactive on large catalogs
+    candidates = []
+    for start in {term[:2], term[1] + term[0]}:
+        candidates += db.execute(
+            text(vocabulary + " AND length(term) BETWEEN :shortest AND :longest"),
+            {
+                "low": start,
+                "high": start + "\uffff",
+                "shortest": len(term) - max_typos,
+                "longest": len(term) + max_typos,
+            },
+        ).all()
+
+    best, best_key = None, None
+    for candidate, documents in candidates:
+        distance = edit_distance(term, candidate, max_typos)
+        if distance <= max_typos and (best_key is None or (distance, -documents) < best_key):
+            best, best_key = candidate, (distance, -documents)
+    return best
+
+def _search_sqlite(db: Session, terms: List[str], limit: int) -> List[Movie]:
+    movies = _sqlite_query(db, terms, limit)
+    if movies:
+        return movies
+
+    corrected = [_sqlite_correct(db, term) for term in terms]
+    if None in corrected or corrected == terms:
+        return []
+    logger.info(f"No matches for {terms}, retrying as {corrected}")
+    return _sqlite_query(db, corrected, limit)
+
+# PostgreSQL: generated tsvector column with a GIN index, plus a trigram index
+# on title for misspelled queries
+
+def _search_postgres(db: Session, terms: List[str], query: str, limit: int) -> List[Movie]:
+    statement = text(
+        "SELECT movies.* FROM movies, to_tsquery('simple', :tsquery) query "
+        "WHERE movies.search_vector @@ query "
+        "ORDER BY ts_rank(movies.search_vector, query) DESC, movies.id LIMIT :limit"
+    )
+    tsquery = " & ".join(f"{term}:*" for term in terms)
+    movies = db.query(Movie).from_statement(statement).params(tsquery=tsquery, limit=limit).all()
+    if movies:
+        return movies
+
+    statement = text(
+        "SELECT movies.* FROM movies WHERE movies.title % :query "
+        "ORDER BY similarity(movies.title, :query) DESC, movies.id LIMIT :limit"
+    )
+    return db.query(Movie).from_statement(statement).params(query=query, limit=limit).all()
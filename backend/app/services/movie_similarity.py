@@ -0,0 +1,508 @@
+import time
+import logging
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import CompoundSelect, and_, delete, func, insert, or_, select, union
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.catalog_cache import catalog_cache
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.movie import Movie, movie_genres, movie_people, movie_similarities
+from app.services.movie_taxonomy import ROLE_CAST, ROLE_DIRECTOR
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Relative weight of each feature block in the similarity
+FEATURE_WEIGHTS = {"genre": 3.0, "director": 2.0, "cast": 2.0, "year": 1.0, "rating": 0.5}
+
+# Movie columns the features are computed from
+SIMILARITY_FIELDS = {"genre", "director", "cast", "release_year", "rating"}
+
+# Release years and ratings this far apart stop adding similarity (and
+# count against it beyond); fixed so scores don't shift as the catalog grows
+YEAR_SCALE = 40.0
+RATING_SCALE = 5.0
+
+# Query rows scored per matrix product
+BLOCK_SIZE = 256
+
+# Nearest unchanged movies per changed movie used to bound the k-th score of
+# the lists a refresh might add it to
+BOUND_SAMPLE_SIZE = 100
+
+# Neighbour rows per IN list or multi-row insert
+WRITE_BATCH_SIZE = 5000
+
+# Serializes rebuilds and refreshes within a process
+_write_lock = threading.Lock()
+
+def _angles(values: np.ndarray, scale: float) -> np.ndarray:
+    # Unit vectors whose dot product is cos(pi/2 * difference / scale)
+    theta = values * (np.pi / 2 / scale)
+    return np.stack([np.cos(theta), np.sin(theta)], axis=1)
+
+class MovieFeatures:
+    """
+    Catalog feature vectors for cosine similarity. A movie's vector joins
+    weighted blocks, each L2-normalized: genres, directors and cast
+    (one-hot), and release year and rating (as angles, so their dot product
+    falls off with the difference). Rows are unit length, so the dot
+    product of two rows is their cosine.
+
+    Genres, year and rating form a small dense matrix. People form a sparse
+    one, scored through an inverted index of who appears in what.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        years: np.ndarray,
+        ratings: np.ndarray,
+        genre_links: np.ndarray,
+        director_links: np.ndarray,
+        cast_links: np.ndarray,
+        people_counts: Optional[np.ndarray] = None,
+    ):
+        """
+        ids are movie ids in ascending order; years and ratings are aligned
+        with them, 0 when unknown. The links are (movie id, genre or person
+        id) pairs.
+
+        people_counts, aligned with ids, holds each movie's number of
+        directors and cast members when the people links cover only some
+        movies. The rest then score exactly against those movies and on
+        their dense features alone against each other.
+        """
+        self.ids = ids
+        n = len(ids)
+
+        def rows_of(links: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+            # Drop links of movies that aren't in ids
+            links = links.reshape(-1, 2)
+            rows = np.searchsorted(ids, links[:, 0])
+            known = rows < n
+            known[known] = ids[rows[known]] == links[known, 0]
+            return rows[known], links[known, 1]
+
+        genre_rows, genre_ids = rows_of(genre_links)
+        director_rows, director_ids = rows_of(director_links)
+        cast_rows, cast_ids = rows_of(cast_links)
+
+        genre_counts = np.bincount(genre_rows, minlength=n)
+        if people_counts is None:
+            director_counts = np.bincount(director_rows, minlength=n)
+            cast_counts = np.bincount(cast_rows, minlength=n)
+        else:
+            director_counts, cast_counts = people_counts[:, 0], people_counts[:, 1]
+        has_year = years > 0
+        has_rating = ratings > 0
+
+        weights = FEATURE_WEIGHTS
+        norm = np.sqrt(
+            weights["genre"] * (genre_counts > 0)
+            + weights["director"] * (director_counts > 0)
+            + weights["cast"] * (cast_counts > 0)
+            + weights["year"] * has_year
+            + weights["rating"] * has_rating
+        )
+        scale = np.divide(1.0, norm, out=np.zeros(n), where=norm > 0)
+
+        genre_columns, genre_columns_of = np.unique(genre_ids, return_inverse=True)
+        g = len(genre_columns)
+        dense = np.zeros((n, g + 4), dtype=np.float32)
+        dense[genre_rows, genre_columns_of] = np.sqrt(weights["genre"] / genre_counts[genre_rows]) * scale[genre_rows]
+        year_weights = np.sqrt(weights["year"]) * has_year * scale
+        rating_weights = np.sqrt(weights["rating"]) * has_rating * scale
+        dense[:, g:g + 2] = _angles(years, YEAR_SCALE) * year_weights[:, None]
+        dense[:, g + 2:] = _angles(ratings, RATING_SCALE) * rating_weights[:, None]
+        self.dense = dense
+
+        # People as sparse features; directors and cast are separate features
+        rows = np.concatenate([director_rows, cast_rows])
+        features = np.concatenate([director_ids * 2, cast_ids * 2 + 1])
+        values = np.concatenate([
+            np.sqrt(weights["director"] / director_counts[director_rows]) * scale[director_rows],
+            np.sqrt(weights["cast"] / cast_counts[cast_rows]) * scale[cast_rows],
+        ]).astype(np.float32)
+        _, features = np.unique(features, return_inverse=True)
+
+        by_row = np.lexsort((features, rows))
+        self.row_ptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n))])
+        self.row_features = features[by_row]
+        self.row_values = values[by_row]
+        by_feature = np.argsort(features, kind="stable")
+        self.feature_ptr = np.concatenate([[0], np.cumsum(np.bincount(features))])
+        self.feature_rows = rows[by_feature]
+        self.feature_values = values[by_feature]
+
+        # Rows with the same genres and the same blocks present have the same
+        # genre vector and year/rating weights, so one bound covers a group:
+        # its dense score against any row is at most the dot product of
+        # their genre vectors plus the products of their year and rating weights
+        bounds = np.concatenate([dense[:, :g], year_weights[:, None], rating_weights[:, None]], axis=1)
+        self.group_bounds, self.group = np.unique(bounds, axis=0, return_inverse=True)
+        self.group = self.group.reshape(-1)
+        self.group_rows = np.argsort(self.group, kind="stable")
+        self.group_ptr = np.concatenate([[0], np.cumsum(np.bincount(self.group))])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def rows_of(self, movie_ids: Iterable[int]) -> np.ndarray:
+        """Rows of the given movie ids, skipping unknown ones"""
+        movie_ids = np.asarray(sorted(set(movie_ids)), dtype=np.int64)
+        rows = np.searchsorted(self.ids, movie_ids)
+        known = rows < len(self.ids)
+        known[known] = self.ids[rows[known]] == movie_ids[known]
+        return rows[known]
+
+    def _people_pairs(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(query index, row, score) of every pair that shares a director or cast member"""
+        starts, ends = self.row_ptr[rows], self.row_ptr[rows + 1]
+        counts = ends - starts
+        entries = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        queries = np.repeat(np.arange(len(rows)), counts)
+        features, values = self.row_features[entries], self.row_values[entries]
+
+        starts = self.feature_ptr[features]
+        counts = self.feature_ptr[features + 1] - starts
+        members = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        return (
+            np.repeat(queries, counts),
+            self.feature_rows[members],
+            np.repeat(values, counts) * self.feature_values[members],
+        )
+
+    def scores(self, rows: np.ndarray, columns: Optional[np.ndarray] = None) -> np.ndarray:
+        """Cosine similarity of rows against columns (every row by default)"""
+        columns = np.arange(len(self)) if columns is None else columns
+        scores = self.dense[rows] @ self.dense[columns].T
+        queries, partners, values = self._people_pairs(rows)
+        positions = np.searchsorted(columns, partners)
+        found = positions < len(columns)
+        found[found] = columns[positions[found]] == partners[found]
+        np.add.at(scores, (queries[found], positions[found]), values[found])
+        return scores
+
+    def _block_neighbours(self, group: int, rows: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        n = len(self)
+        dense = self.dense[rows]
+
+        # Movies sharing people with the block are scored pair by pair
+        queries, partners, people = self._people_pairs(rows)
+        pairs, pair_index = np.unique(queries * n + partners, return_inverse=True)
+        people = np.bincount(pair_index.reshape(-1), weights=people, minlength=len(pairs))
+        pair_queries, pair_rows = pairs // n, pairs % n
+        others = pair_rows != rows[pair_queries]
+        pair_queries, pair_rows, people = pair_queries[others], pair_rows[others], people[others]
+        pair_scores = (np.einsum("ij,ij->i", dense[pair_queries], self.dense[pair_rows]) + people).astype(np.float32)
+
+        # Everyone else scores their dense product, bounded per group: scan
+        # the groups whose bound beats the block's k-th best score so far
+        bounds = self.group_bounds @ self.group_bounds[group]
+        order = np.argsort(-bounds, kind="stable")
+        bounds = bounds[order]
+        sizes = np.cumsum(self.group_ptr[order + 1] - self.group_ptr[order])
+        positive = int(np.searchsorted(-bounds, 0.0))
+
+        taken = min(int(np.searchsorted(sizes, len(rows) + 2 * k)) + 1, positive)
+        while True:
+            columns = np.sort(np.concatenate(
+                [self.group_rows[self.group_ptr[h]:self.group_ptr[h + 1]] for h in order[:taken]]
+                + [np.zeros(0, dtype=np.int64)]
+            ))
+            scores = dense @ self.dense[columns].T
+            # Skip the movie itself and the pairs scored above
+            for skip_queries, skip_rows in ((np.arange(len(rows)), rows), (pair_queries, pair_rows)):
+                positions = np.minimum(np.searchsorted(columns, skip_rows), max(len(columns) - 1, 0))
+                found = columns[positions] == skip_rows if len(columns) else np.zeros(len(skip_rows), dtype=bool)
+                scores[skip_queries[found], positions[found]] = -np.inf
+
+            if len(columns) > k:
+                top = np.argpartition(scores, -k, axis=1)[:, -k:]
+            else:
+                top = np.broadcast_to(np.arange(len(columns)), (len(rows), len(columns)))
+            top_queries = np.broadcast_to(np.arange(len(rows))[:, None], top.shape).reshape(-1)
+            top_scores = np.take_along_axis(scores, top, axis=1).reshape(-1)
+
+            # Best k of both per row, dropping non-positive scores
+            merged_queries = np.concatenate([top_queries, pair_queries])
+            merged_rows = np.concatenate([columns[top].reshape(-1), pair_rows])
+            merged_scores = np.concatenate([top_scores, pair_scores])
+            keep = merged_scores > 0
+            merged_queries, merged_rows, merged_scores = merged_queries[keep], merged_rows[keep], merged_scores[keep]
+            ranked = np.lexsort((-merged_scores, merged_queries))
+            merged_queries, merged_rows, merged_scores = merged_queries[ranked], merged_rows[ranked], merged_scores[ranked]
+            firsts = np.searchsorted(merged_queries, np.arange(len(rows)))
+            keep = np.arange(len(merged_queries)) - firsts[merged_queries] < k
+            merged_queries, merged_rows, merged_scores = merged_queries[keep], merged_rows[keep], merged_scores[keep]
+
+            if taken >= positive:
+                break
+            counts = np.bincount(merged_queries, minlength=len(rows))
+            if counts.min() < k:
+                threshold = 0.0
+            else:
+                threshold = float(merged_scores[np.searchsorted(merged_queries, np.arange(len(rows))) + k - 1].min())
+            more = int(np.searchsorted(-bounds, -threshold))
+            if more <= taken:
+                break
+            taken = min(more, positive)
+
+        return rows[merged_queries], merged_rows, merged_scores
+
+    def neighbours(self, rows: Optional[np.ndarray] = None, k: int = settings.SIMILAR_MOVIES_TOP_K) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Exact top-k cosine neighbours (positive scores only) of rows, every
+        row by default: (row, neighbour row, score) arrays, best first per row.
+        """
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows, dtype=np.int64)
+        # Rows of a group share their bounds, so they're scored together
+        rows = rows[np.argsort(self.group[rows], kind="stable")]
+        boundaries = np.flatnonzero(np.diff(self.group[rows])) + 1
+        results = []
+        for group_rows in np.split(rows, boundaries):
+            for start in range(0, len(group_rows), BLOCK_SIZE):
+                block = group_rows[start:start + BLOCK_SIZE]
+                results.append(self._block_neighbours(int(self.group[block[0]]), block, k))
+        if not results:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0, dtype=np.float32)
+        return tuple(np.concatenate(parts) for parts in zip(*results))
+
+def _sharing_people(movie_ids: List[int]) -> CompoundSelect:
+    """Ids of movie_ids and of the movies that share a director or cast member with any of them"""
+    others = movie_people.alias("others")
+    return union(
+        select(Movie.id).where(Movie.id.in_(movie_ids)),
+        select(movie_people.c.movie_id)
+        .join(others, and_(others.c.person_id == movie_people.c.person_id, others.c.role == movie_people.c.role))
+        .where(others.c.movie_id.in_(movie_ids)),
+    )
+
+def load_features(db: Session, people_within: Optional[CompoundSelect] = None) -> MovieFeatures:
+    """
+    Feature vectors of the whole catalog. With people_within, only the
+    movies whose ids it selects get their people links; every other movie
+    gets its dense features and its number of people, which its
+    normalization depends on. Scores of those movies against anything
+    sharing a person with them are then still exact.
+    """
+    movies = db.execute(select(Movie.id, Movie.release_year, Movie.rating).order_by(Movie.id)).all()
+    ids = np.array([movie.id for movie in movies], dtype=np.int64)
+    years = np.array([movie.release_year or 0 for movie in movies], dtype=np.float64)
+    ratings = np.array([movie.rating or 0 for movie in movies], dtype=np.float64)
+
+    def links(query) -> np.ndarray:
+        return np.array(db.execute(query).all(), dtype=np.int64).reshape(-1, 2)
+
+    people = select(movie_people.c.movie_id, movie_people.c.person_id)
+    people_counts = None
+    if people_within is not None:
+        people = people.where(movie_people.c.movie_id.in_(people_within))
+        people_counts = np.zeros((len(ids), 2), dtype=np.int64)
+        for column, role in enumerate((ROLE_DIRECTOR, ROLE_CAST)):
+            counts = links(
+                select(movie_people.c.movie_id, func.count())
+                .where(movie_people.c.role == role)
+                .group_by(movie_people.c.movie_id)
+            )
+            rows = np.searchsorted(ids, counts[:, 0])
+            known = rows < len(ids)
+            known[known] = ids[rows[known]] == counts[known, 0]
+            people_counts[rows[known], column] = counts[known, 1]
+
+    return MovieFeatures(
+        ids, years, ratings,
+        links(select(movie_genres.c.movie_id, movie_genres.c.genre_id)),
+        links(people.where(movie_people.c.role == ROLE_DIRECTOR)),
+        links(people.where(movie_people.c.role == ROLE_CAST)),
+        people_counts,
+    )
+
+# (movie id, similar movie id, score) lists, best first per movie
+Neighbours = Tuple[List[int], List[int], List[float]]
+
+def _neighbour_ids(features: MovieFeatures, neighbours: Tuple[np.ndarray, np.ndarray, np.ndarray]) -> Neighbours:
+    sources, targets, scores = neighbours
+    return features.ids[sources].tolist(), features.ids[targets].tolist(), scores.tolist()
+
+def _write_neighbours(db: Session, movie_ids: List[int], neighbours: Neighbours, replace: bool = True) -> None:
+    """Write the neighbours of movie_ids, replacing their current lists unless replace is off"""
+    if replace:
+        for start in range(0, len(movie_ids), WRITE_BATCH_SIZE):
+            chunk = movie_ids[start:start + WRITE_BATCH_SIZE]
+            db.execute(delete(movie_similarities).where(movie_similarities.c.movie_id.in_(chunk)))
+
+    values = [
+        {"movie_id": movie_id, "similar_movie_id": similar_movie_id, "score": score}
+        for movie_id, similar_movie_id, score in zip(*neighbours)
+    ]
+    for start in range(0, len(values), WRITE_BATCH_SIZE):
+        db.execute(insert(movie_similarities), values[start:start + WRITE_BATCH_SIZE])
+
+def rebuild_similar_movies(db: Session) -> int:
+    """Recompute every movie's neighbours; the caller commits. Returns the number of movies"""
+    started = time.monotonic()
+    features = load_features(db)
+    loaded = time.monotonic()
+    neighbours = features.neighbours()
+    computed = time.monotonic()
+    db.execute(delete(movie_similarities))
+    _write_neighbours(db, features.ids.tolist(), _neighbour_ids(features, neighbours), replace=False)
+    logger.info(
+        f"Rebuilt similar movies of {len(features)} movies: load {loaded - started:.1f}s, "
+        f"neighbours {computed - loaded:.1f}s, write {time.monotonic() - computed:.1f}s"
+    )
+    return len(features)
+
+def unlink_similar_movies(db: Session, movie_id: int) -> List[int]:
+    """
+    Remove a movie's neighbour rows ahead of deleting it; returns the movies
+    that listed it, whose lists refresh_similar_movies should refill
+    """
+    listed_by = db.scalars(
+        select(movie_similarities.c.movie_id).where(movie_similarities.c.similar_movie_id == movie_id)
+    ).all()
+    db.execute(delete(movie_similarities).where(or_(
+        movie_similarities.c.movie_id == movie_id,
+        movie_similarities.c.similar_movie_id == movie_id,
+    )))
+    return listed_by
+
+def _kth_lower_bounds(features: MovieFeatures, rows: np.ndarray, sample: np.ndarray, k: int) -> np.ndarray:
+    """
+    A lower bound on the k-th best neighbour score of each of rows: its
+    k-th best dense score against the sample rows, 0 with fewer to go by.
+    People only ever add to a score, so the sample movies would rank at
+    least that high. Rows whose lists can't change must not be sampled.
+    """
+    if len(sample) <= k:
+        return np.zeros(len(rows))
+    bounds = np.zeros(len(rows))
+    for start in range(0, len(rows), BLOCK_SIZE * 16):
+        block = rows[start:start + BLOCK_SIZE * 16]
+        scores = features.dense[block] @ features.dense[sample].T
+        scores[block[:, None] == sample[None, :]] = -np.inf
+        bounds[start:start + len(block)] = np.partition(scores, -k, axis=1)[:, -k]
+    # Leave room for float32 rounding against the stored scores
+    return np.maximum(bounds - 1e-5, 0.0)
+
+def _merge_changed(db: Session, features: MovieFeatures, changed: List[int], relisted: List[int], k: int) -> int:
+    """
+    Add the changed movies to the lists they now make the top k of, among
+    the lists that weren't just recomputed. Returns the number of lists
+    updated.
+    """
+    changed_rows = features.rows_of(changed)
+    candidates = np.setdiff1d(np.arange(len(features)), features.rows_of(relisted))
+    if not len(changed_rows) or not len(candidates):
+        return 0
+    scores = features.scores(changed_rows, candidates)
+
+    # Only lists a changed movie scores positively against can take it, and
+    # only if it beats a lower bound on their k-th score taken from the
+    # unchanged movies nearest the changed ones; the rest are left unread
+    positive = (scores > 0).any(axis=0)
+    candidates, scores = candidates[positive], scores[:, positive]
+    nearest = np.argsort(-scores, axis=1)[:, :BOUND_SAMPLE_SIZE]
+    bounds = _kth_lower_bounds(features, candidates, np.unique(candidates[nearest]), k)
+    reachable = (scores > bounds[None, :]).any(axis=0)
+    candidates, scores = candidates[reachable], scores[:, reachable]
+
+    # The score each of those has to beat is its k-th best, or none while it's short
+    candidate_ids = features.ids[candidates].tolist()
+    column_of = {movie_id: column for column, movie_id in enumerate(candidate_ids)}
+    kth = np.zeros(len(candidate_ids), dtype=np.float64)
+    for start in range(0, len(candidate_ids), WRITE_BATCH_SIZE):
+        lists = db.execute(
+            select(movie_similarities.c.movie_id, func.min(movie_similarities.c.score), func.count())
+            .where(movie_similarities.c.movie_id.in_(candidate_ids[start:start + WRITE_BATCH_SIZE]))
+            .group_by(movie_similarities.c.movie_id)
+        ).all()
+        for movie_id, lowest, size in lists:
+            if size >= k:
+                kth[column_of[movie_id]] = lowest
+
+    beats = scores > kth[None, :]
+    beaten = np.flatnonzero(beats.any(axis=0))
+    if not len(beaten):
+        return 0
+
+    # Merge into the stored lists, which hold none of the changed movies
+    # (the lists that did were recomputed), and keep the best k
+    beaten_ids = [candidate_ids[column] for column in beaten]
+    merged = {movie_id: [] for movie_id in beaten_ids}
+    for start in range(0, len(beaten_ids), WRITE_BATCH_SIZE):
+        stored = db.execute(
+            select(movie_similarities.c.movie_id, movie_similarities.c.similar_movie_id, movie_similarities.c.score)
+            .where(movie_similarities.c.movie_id.in_(beaten_ids[start:start + WRITE_BATCH_SIZE]))
+        ).all()
+        for movie_id, similar_movie_id, score in stored:
+            merged[movie_id].append((score, similar_movie_id))
+    changed_ids = features.ids[changed_rows].tolist()
+    for query, column in zip(*np.nonzero(beats[:, beaten])):
+        merged[beaten_ids[column]].append((float(scores[query, beaten[column]]), changed_ids[query]))
+
+    neighbours = ([], [], [])
+    for movie_id, entries in merged.items():
+        for score, similar_movie_id in sorted(entries, key=lambda entry: (-entry[0], entry[1]))[:k]:
+            neighbours[0].append(movie_id)
+            neighbours[1].append(similar_movie_id)
+            neighbours[2].append(score)
+    _write_neighbours(db, beaten_ids, neighbours)
+    return len(beaten_ids)
+
+def refresh_similar_movies(movie_ids: Iterable[int], refill: Iterable[int] = ()) -> None:
+    """
+    Update neighbour lists after movies were created or changed (movie_ids)
+    or lost a neighbour that was deleted (refill): recompute the lists of
+    those movies and of the movies that listed the changed ones, and merge
+    the changed movies into the lists whose k-th neighbour they now beat.
+
+    The result matches a full rebuild. Release year and rating relate
+    nearly every pair of movies, so every movie's dense features are
+    loaded, but people links only for the movies sharing someone with the
+    movies concerned, and only the lists a changed movie can enter are
+    read. Runs as a background task.
+    """
+    changed = sorted(set(movie_ids))
+    relisted = set(changed) | set(refill)
+    if not relisted:
+        return
+
+    started = time.monotonic()
+    k = settings.SIMILAR_MOVIES_TOP_K
+    with _write_lock, SessionLocal() as db:
+        try:
+            if changed:
+                relisted.update(db.scalars(
+                    select(movie_similarities.c.movie_id).where(movie_similarities.c.similar_movie_id.in_(changed))
+                ))
+            relisted = sorted(relisted)
+            features = load_features(db, people_within=_sharing_people(relisted))
+            rows = features.rows_of(relisted)
+            _write_neighbours(db, features.ids[rows].tolist(), _neighbour_ids(features, features.neighbours(rows, k)))
+            merged = _merge_changed(db, features, changed, relisted, k) if changed else 0
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error(f"Error refreshing similar movies for changes to {changed} and {sorted(set(refill))}: {str(e)}")
+            return
+    catalog_cache.invalidate()
+    logger.info(
+        f"Refreshed similar movies of {len(rows) + merged} movies of {len(features)} "
+        f"in {time.monotonic() - started:.2f}s"
+    )
+
+def rebuild_similar_movies_task() -> None:
+    """Full rebuild in its own session and transaction, for background tasks and scripts/similar_movies.py"""
+    with _write_lock, SessionLocal() as db:
+        rebuild_similar_movies(db)
+        db.commit()
+    catalog_cache.invalidate()
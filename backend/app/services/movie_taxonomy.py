@@ -0,0 +1,195 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.movie import Movie, Genre, Person, movie_genres, movie_people
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+ROLE_DIRECTOR = "director"
+ROLE_CAST = "cast"
+
+# Rows per IN list / multi-row insert
+BATCH_SIZE = 500
+
+# Entries returned per facet
+FACET_LIMIT = 20
+
+def name_key(name: str) -> str:
+    """Lookup key for a genre or person name: whitespace-collapsed and lowercased"""
+    return " ".join(name.split()).lower()
+
+def split_names(value: Optional[str]) -> Dict[str, str]:
+    """Names in a comma-separated string, keyed by name_key, first spelling wins"""
+    names = {}
+    for name in (value or "").split(","):
+        name = " ".join(name.split())
+        if name:
+            names.setdefault(name_key(name), name)
+    return names
+
+def _chunks(items: List[Any]) -> Iterable[List[Any]]:
+    for start in range(0, len(items), BATCH_SIZE):
+        yield items[start:start + BATCH_SIZE]
+
+def _get_or_create_ids(db: Session, model, names: Dict[str, str]) -> Dict[str, int]:
+    """Ids of genres or people by key, inserting the ones that don't exist yet"""
+    ids = {}
+    keys = list(names)
+    for chunk in _chunks(keys):
+        ids.update(db.execute(select(model.key, model.id).where(model.key.in_(chunk))).all())
+
+    missing = [{"key": key, "name": names[key]} for key in keys if key not in ids]
+    if not missing:
+        return ids
+
+    try:
+        with db.begin_nested():
+            for chunk in _chunks(missing):
+                db.execute(insert(model), chunk)
+    except IntegrityError:
+        # A concurrent writer created some of them; insert the rest one at a time
+        for values in missing:
+            try:
+                with db.begin_nested():
+                    db.execute(insert(model), [values])
+            except IntegrityError:
+                pass
+
+    for chunk in _chunks([values["key"] for values in missing]):
+        ids.update(db.execute(select(model.key, model.id).where(model.key.in_(chunk))).all())
+    return ids
+
+def index_movies(db: Session, movies: Iterable[Any], replace: bool = True) -> None:
+    """
+    Rebuild the genre and people links of movies (anything with id, genre,
+    director and cast attributes) from their comma-separated strings.
+    Pass replace=False for newly inserted movies that have no links yet.
+    Call after the movies are flushed; the caller commits.
+    """
+    movies = list(movies)
+    if not movies:
+        return
+
+    genres = {movie.id: split_names(movie.genre) for movie in movies}
+    credits = {
+        movie.id: [(ROLE_DIRECTOR, split_names(movie.director)), (ROLE_CAST, split_names(movie.cast))]
+        for movie in movies
+    }
+
+    # First spelling of each new genre or person across the batch wins
+    all_genres = {}
+    for names in genres.values():
+        for key, name in names.items():
+            all_genres.setdefault(key, name)
+    all_people = {}
+    for roles in credits.values():
+        for _, names in roles:
+            for key, name in names.items():
+                all_people.setdefault(key, name)
+
+    genre_ids = _get_or_create_ids(db, Genre, all_genres)
+    person_ids = _get_or_create_ids(db, Person, all_people)
+
+    if replace:
+        for chunk in _chunks(list(genres)):
+            db.execute(delete(movie_genres).where(movie_genres.c.movie_id.in_(chunk)))
+            db.execute(delete(movie_people).where(movie_people.c.movie_id.in_(chunk)))
+
+    genre_links = [
+        {"movie_id": movie_id, "genre_id": genre_ids[key]}
+        for movie_id, names in genres.items()
+        for key in names
+    ]
+    people_links = [
+        {"movie_id": movie_id, "person_id": person_ids[key], "role": role}
+        for movie_id, roles in credits.items()
+        for role, names in roles
+        for key in names
+    ]
+    for chunk in _chunks(genre_links):
+        db.execute(insert(movie_genres), chunk)
+    for chunk in _chunks(people_links):
+        db.execute(insert(movie_people), chunk)
+
+def unindex_movie(db: Session, movie_id: int) -> None:
+    """Remove a movie's genre and people links ahead of deleting it"""
+    db.execute(delete(movie_genres).where(movie_genres.c.movie_id == movie_id))
+    db.execute(delete(movie_people).where(movie_people.c.movie_id == movie_id))
+
+def reindex_all_movies(db: Session) -> int:
+    """Backfill the links of every movie; returns the number of movies indexed"""
+    movies = db.execute(select(Movie.id, Movie.genre, Movie.director, Movie.cast)).all()
+    for start in range(0, len(movies), BATCH_SIZE * 10):
+        index_movies(db, movies[start:start + BATCH_SIZE * 10])
+    logger.info(f"Indexed genres and people of {len(movies)} movies")
+    return len(movies)
+
+def filter_movies(
+    query,
+    genre: Optional[str] = None,
+    person: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    min_rating: Optional[float] = None,
+):
+    """Apply catalog filters to a Query or select() over movies"""
+    if genre:
+        query = query.where(Movie.id.in_(
+            select(movie_genres.c.movie_id)
+            .join(Genre, Genre.id == movie_genres.c.genre_id)
+            .where(Genre.key == name_key(genre))
+        ))
+    if person:
+        query = query.where(Movie.id.in_(
+            select(movie_people.c.movie_id)
+            .join(Person, Person.id == movie_people.c.person_id)
+            .where(Person.key == name_key(person))
+        ))
+    if year_from is not None:
+        query = query.where(Movie.release_year >= year_from)
+    if year_to is not None:
+        query = query.where(Movie.release_year <= year_to)
+    if min_rating is not None:
+        query = query.where(Movie.rating >= min_rating)
+    return query
+
+def movie_facets(db: Session, **filters) -> Dict[str, Any]:
+    """Counts of the movies matching filters, by genre, director and decade"""
+    matching = filter_movies(select(Movie.id), **filters)
+    count = func.count().label("count")
+
+    genres = db.execute(
+        select(Genre.name, count)
+        .join(movie_genres, movie_genres.c.genre_id == Genre.id)
+        .where(movie_genres.c.movie_id.in_(matching))
+        .group_by(Genre.id, Genre.name)
+        .order_by(count.desc(), Genre.name)
+        .limit(FACET_LIMIT)
+    ).all()
+    directors = db.execute(
+        select(Person.name, count)
+        .join(movie_people, movie_people.c.person_id == Person.id)
+        .where(movie_people.c.movie_id.in_(matching), movie_people.c.role == ROLE_DIRECTOR)
+        .group_by(Person.id, Person.name)
+        .order_by(count.desc(), Person.name)
+        .limit(FACET_LIMIT)
+    ).all()
+    decade = (Movie.release_year // 10 * 10).label("decade")
+    decades = db.execute(
+        select(decade, count)
+        .where(Movie.id.in_(matching), Movie.release_year.isnot(None))
+        .group_by(decade)
+        .order_by(decade)
+    ).all()
+
+    return {
+        "total": db.scalar(select(func.count()).select_from(matching.subquery())),
+        "genres": [{"value": name, "count": total} for name, total in genres],
+        "directors": [{"value": name, "count": total} for name, total in directors],
+        "decades": [{"value": str(value), "count": total} for value, total in decades],
+    }
@@ -0,0 +1,347 @@
+import time
+import random
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import insert, select, update
+from starlette.concurrency import run_in_threadpool
+
+from app.core.catalog_cache import catalog_cache
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.movie import Movie
+from app.services import movie_api
+from app.services.movie_api import format_movie_details
+from app.services.movie_similarity import SIMILARITY_FIELDS, refresh_similar_movies
+from app.services.movie_taxonomy import index_movies
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Movie columns filled from TMDB details
+ENRICHED_FIELDS = (
+    "title", "description", "release_year", "duration", "genre",
+    "director", "cast", "poster_url", "rating",
+)
+
+# Results written per transaction
+BATCH_SIZE = 100
+
+# Movies loaded per IN list
+LOOKUP_BATCH_SIZE = 500
+
+# Responses worth retrying; anything else is returned or raised as is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Exponential backoff between retries, and the longest Retry-After honoured
+BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 30.0
+
+class TMDBError(Exception):
+    """A TMDB request that failed, after retries where they apply"""
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return min(max(float(response.headers["retry-after"]), 0.0), MAX_BACKOFF_SECONDS)
+    except (KeyError, ValueError):
+        return None
+
+class TMDBClient:
+    """
+    Async TMDB client sharing one pool of keep-alive connections. At most
+    max_concurrency requests are in flight and requests are spaced to
+    requests_per_second; a 429 holds back every request until its
+    Retry-After has passed. 429s, 5xx responses, timeouts and connection
+    errors are retried with exponential backoff.
+
+    Use as an async context manager. base_url and transport exist so the
+    client can be pointed at a stub server.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_concurrency: int = settings.TMDB_MAX_CONCURRENCY,
+        requests_per_second: float = settings.TMDB_REQUESTS_PER_SECOND,
+        max_retries: int = settings.TMDB_MAX_RETRIES,
+        timeout: httpx.Timeout = movie_api.TMDB_TIMEOUT,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.api_key = movie_api.TMDB_API_KEY if api_key is None else api_key
+        self.base_url = base_url or movie_api.TMDB_BASE_URL
+        self.max_concurrency = max(max_concurrency, 1)
+        self.requests_per_second = requests_per_second
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._next_slot = 0.0
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+
+    async def __aenter__(self) -> "TMDBClient":
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+            ),
+            transport=self.transport,
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._client.aclose()
+        self._client = None
+
+    async def _wait_for_slot(self) -> None:
+        # Reserve the next send time before sleeping so waiters queue in order
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        if self.requests_per_second > 0:
+            self._next_slot = slot + 1 / self.requests_per_second
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def get(self, path: str, **params: Any) -> Optional[Dict[str, Any]]:
+        """GET a TMDB endpoint as JSON; None when it answers 404"""
+        params = {"api_key": self.api_key, "language": "en-US", **params}
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self._wait_for_slot()
+                self.requests += 1
+                rate_limited = False
+                try:
+                    response = await self._client.get(path, params=params)
+                except httpx.TransportError as e:
+                    error, delay = f"{type(e).__name__}: {e}", None
+                else:
+                    if response.status_code == 404:
+                        return None
+                    if response.status_code not in RETRY_STATUSES:
+                        if response.is_error:
+                            raise TMDBError(f"GET {path}: HTTP {response.status_code}")
+                        try:
+                            return response.json()
+                        except ValueError as e:
+                            raise TMDBError(f"GET {path}: invalid JSON: {str(e)}")
+                    error, delay = f"HTTP {response.status_code}", _retry_after(response)
+                    rate_limited = response.status_code == 429
+
+                if attempt == self.max_retries:
+                    break
+                self.retries += 1
+                if delay is None:
+                    delay = min(BACKOFF_SECONDS * 2 ** attempt, MAX_BACKOFF_SECONDS) * random.uniform(0.5, 1.0)
+                if rate_limited:
+                    # Hold back every request, not just this one
+                    self.throttled += 1
+                    self._next_slot = max(self._next_slot, time.monotonic() + delay)
+                else:
+                    await asyncio.sleep(delay)
+
+        raise TMDBError(f"GET {path}: {error} after {self.max_retries + 1} attempts")
+
+    async def find_movie_id(self, title: str, release_year: Optional[int] = None) -> Optional[int]:
+        """TMDB id of the best search match for a title, preferring an exact title match"""
+        params = {"query": title, "include_adult": "false"}
+        if release_year:
+            params["primary_release_year"] = release_year
+        data = await self.get("/search/movie", **params)
+        results = (data or {}).get("results") or []
+        if not results:
+            return None
+        key = title.strip().casefold()
+        exact = [result for result in results if (result.get("title") or "").strip().casefold() == key]
+        return (exact or results)[0].get("id")
+
+    async def movie_details(self, tmdb_id: int) -> Optional[Dict[str, Any]]:
+        """Movie fields for a TMDB id, formatted like get_movie_details"""
+        movie = await self.get(f"/movie/{tmdb_id}", append_to_response="credits")
+        return format_movie_details(movie) if movie else None
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == 0
+
+def _chunks(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _load_targets(movie_ids: List[int], tmdb_ids: List[int]) -> Tuple[List[Any], List[int]]:
+    """Movies to enrich, and the TMDB ids no movie is linked to yet"""
+    columns = [Movie.id, Movie.tmdb_id, *(getattr(Movie, name) for name in ENRICHED_FIELDS)]
+    movies = {}
+    with SessionLocal() as db:
+        for chunk in _chunks(movie_ids, LOOKUP_BATCH_SIZE):
+            movies.update((row.id, row) for row in db.execute(select(*columns).where(Movie.id.in_(chunk))))
+        for chunk in _chunks(tmdb_ids, LOOKUP_BATCH_SIZE):
+            movies.update((row.id, row) for row in db.execute(select(*columns).where(Movie.tmdb_id.in_(chunk))))
+    linked = {movie.tmdb_id for movie in movies.values()}
+    return list(movies.values()), [tmdb_id for tmdb_id in tmdb_ids if tmdb_id not in linked]
+
+def _changes(movie: Any, details: Dict[str, Any], overwrite: bool) -> Dict[str, Any]:
+    """Columns of a movie to set from TMDB details; blank details never replace a value"""
+    return {
+        name: details[name]
+        for name in ENRICHED_FIELDS
+        if not _is_empty(details.get(name))
+        and details[name] != getattr(movie, name)
+        and (overwrite or _is_empty(getattr(movie, name)))
+    }
+
+def _write_batch(results: List[Tuple[Optional[Any], int, Dict[str, Any]]], overwrite: bool) -> Tuple[int, int, List[int]]:
+    """
+    Apply fetched details to their movies, creating movies for unlinked TMDB
+    ids; returns (updated, created, ids of the movies whose similar movies
+    need a refresh)
+    """
+    # Runs in the threadpool on the sync engine, like the bulk import
+    updates = []
+    for movie, tmdb_id, details in results:
+        if movie is None:
+            continue
+        values = _changes(movie, details, overwrite)
+        if movie.tmdb_id != tmdb_id:
+            values["tmdb_id"] = tmdb_id
+        if values:
+            updates.append({"id": movie.id, **values})
+    creates = [
+        {"tmdb_id": tmdb_id, **{name: details.get(name) for name in ENRICHED_FIELDS}}
+        for movie, tmdb_id, details in results
+        if movie is None
+    ]
+    if not updates and not creates:
+        return 0, 0, []
+
+    with SessionLocal() as db:
+        if updates:
+            db.execute(update(Movie), updates)
+        if creates:
+            # Skip TMDB ids a movie got matched to by title during this run
+            linked = set(db.scalars(
+                select(Movie.tmdb_id).where(Movie.tmdb_id.in_([values["tmdb_id"] for values in creates]))
+            ))
+            creates = [values for values in creates if values["tmdb_id"] not in linked]
+        created = []
+        if creates:
+            created = db.execute(
+                insert(Movie).returning(Movie.id, Movie.genre, Movie.director, Movie.cast, sort_by_parameter_order=True),
+                creates,
+            ).all()
+            index_movies(db, created, replace=False)
+
+        relinked = [
+            values["id"] for values in updates
+            if values.keys() & {"genre", "director", "cast"}
+        ]
+        if relinked:
+            index_movies(db, db.execute(
+                select(Movie.id, Movie.genre, Movie.director, Movie.cast).where(Movie.id.in_(relinked))
+            ).all())
+        db.commit()
+    catalog_cache.invalidate()
+    rescored = [values["id"] for values in updates if values.keys() & SIMILARITY_FIELDS]
+    return len(updates), len(created), rescored + [movie.id for movie in created]
+
+async def enrich_movies(
+    movie_ids: Iterable[int] = (),
+    tmdb_ids: Iterable[int] = (),
+    overwrite: bool = False,
+    client: Optional[TMDBClient] = None,
+) -> Dict[str, Any]:
+    """
+    Fetch TMDB details for catalog movies and write them back in batches of
+    BATCH_SIZE. movie_ids name movies to enrich; those without a tmdb_id are
+    matched by title and release year first. tmdb_ids enrich the movies
+    linked to them, or create a movie when none is. Only empty columns are
+    filled unless overwrite is set. The similar movies of the movies
+    created or changed are refreshed once at the end. Returns a summary of
+    the run.
+    """
+    started = time.monotonic()
+    movie_ids, tmdb_ids = list(dict.fromkeys(movie_ids)), list(dict.fromkeys(tmdb_ids))
+    movies, new_tmdb_ids = await run_in_threadpool(_load_targets, movie_ids, tmdb_ids)
+    found = {movie.id for movie in movies}
+
+    summary = {
+        "movies": len(movies) + len(new_tmdb_ids),
+        "updated": 0,
+        "created": 0,
+        "unchanged": 0,
+        "not_found": [{"movie_id": movie_id} for movie_id in movie_ids if movie_id not in found],
+        "failed": [],
+    }
+    client = client or TMDBClient()
+
+    async def fetch(movie: Optional[Any], tmdb_id: Optional[int]):
+        try:
+            if tmdb_id is None:
+                if not movie.title:
+                    return movie, None, None
+                tmdb_id = await client.find_movie_id(movie.title, movie.release_year)
+                if tmdb_id is None:
+                    return movie, None, None
+            return movie, tmdb_id, await client.movie_details(tmdb_id)
+        except TMDBError as e:
+            return movie, tmdb_id, e
+
+    pending: List[Tuple[Optional[Any], int, Dict[str, Any]]] = []
+    new_movies: List[Tuple[None, int, Dict[str, Any]]] = []
+    rescored: List[int] = []
+
+    async def flush() -> None:
+        batch = pending[:]
+        pending.clear()
+        updated, created, changed = await run_in_threadpool(_write_batch, batch, overwrite)
+        rescored.extend(changed)
+        summary["updated"] += updated
+        summary["created"] += created
+        summary["unchanged"] += len(batch) - updated - created
+
+    async with client:
+        fetches = [fetch(movie, movie.tmdb_id) for movie in movies]
+        fetches += [fetch(None, tmdb_id) for tmdb_id in new_tmdb_ids]
+        for next_result in asyncio.as_completed(fetches):
+            movie, tmdb_id, details = await next_result
+            target = {"movie_id": movie.id} if movie is not None else {}
+            if isinstance(details, TMDBError):
+                logger.warning(f"TMDB enrichment of movie {target.get('movie_id')} / TMDB id {tmdb_id} failed: {str(details)}")
+                summary["failed"].append({**target, "tmdb_id": tmdb_id, "error": str(details)})
+                continue
+            if details is None:
+                summary["not_found"].append({**target, "tmdb_id": tmdb_id} if tmdb_id else target)
+                continue
+            if movie is None:
+                new_movies.append((None, tmdb_id, details))
+                continue
+            pending.append((movie, tmdb_id, details))
+            if len(pending) >= BATCH_SIZE:
+                await flush()
+
+        # Created last so TMDB ids that movies got matched to aren't added again
+        for start in range(0, len(new_movies), BATCH_SIZE):
+            pending.extend(new_movies[start:start + BATCH_SIZE])
+            await flush()
+        if pending:
+            await flush()
+        if rescored:
+            await run_in_threadpool(refresh_similar_movies, rescored)
+
+        summary.update(
+            requests=client.requests,
+            retries=client.retries,
+            throttled=client.throttled,
+            seconds=round(time.monotonic() - started, 3),
+        )
+
+    logger.info(
+        f"TMDB enrichment finished: {summary['updated']} updated, {summary['created']} created, "
+        f"{len(summary['not_found'])} not found, {len(summary['failed'])} failed in {summary['seconds']}s"
+    )
+    return summary
@@ -0,0 +1,202 @@
+import time
+import logging
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.flusher import BackgroundFlusher
+from app.core.upsert import upsert
+from app.models.movie import Movie
+from app.models.watch import WatchEvent, movie_watch_counts
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Count column of movie_watch_counts bumped by each event type
+EVENT_COUNTS = {"start": "plays", "heartbeat": "heartbeats", "complete": "completions"}
+
+# Rows per IN list / multi-row insert
+BATCH_SIZE = 1000
+
+SECONDS_PER_HOUR = 3600
+
+# (user_id, movie_id, event, position, received_at)
+BufferedEvent = Tuple[int, int, str, Optional[int], float]
+
+def _chunks(items: List[Any]) -> Iterable[List[Any]]:
+    for start in range(0, len(items), BATCH_SIZE):
+        yield items[start:start + BATCH_SIZE]
+
+def write_watch_events(db: Session, events: List[BufferedEvent]) -> int:
+    """
+    Bulk insert buffered events and add them to the hourly counts; events of
+    movies that no longer exist are skipped. The caller commits. Returns the
+    number of events written.
+    """
+    known = set()
+    for chunk in _chunks(sorted({event[1] for event in events})):
+        known.update(db.scalars(select(Movie.id).where(Movie.id.in_(chunk))))
+
+    rows = []
+    counts: Dict[Tuple[int, int], Counter] = defaultdict(Counter)
+    for user_id, movie_id, event, position, received_at in events:
+        if movie_id not in known:
+            continue
+        rows.append({
+            "user_id": user_id,
+            "movie_id": movie_id,
+            "event": event,
+            "position": position,
+            "created_at": datetime.fromtimestamp(received_at, timezone.utc),
+        })
+        counts[movie_id, int(received_at // SECONDS_PER_HOUR)][EVENT_COUNTS[event]] += 1
+
+    for chunk in _chunks(rows):
+        db.execute(insert(WatchEvent), chunk)
+    upsert(
+        db,
+        movie_watch_counts,
+        [
+            {"movie_id": movie_id, "hour": hour, **{column: counter[column] for column in EVENT_COUNTS.values()}}
+            for (movie_id, hour), counter in counts.items()
+        ],
+        keys=("movie_id", "hour"),
+        increment=EVENT_COUNTS.values(),
+    )
+    return len(rows)
+
+def prune_watch_counts(db: Session, hour: int) -> None:
+    """Drop hourly counts that have left the trending window; the caller commits"""
+    db.execute(delete(movie_watch_counts).where(
+        movie_watch_counts.c.hour <= hour - settings.TRENDING_WINDOW_HOURS
+    ))
+
+def trending_scores(now: Optional[float] = None):
+    """
+    Subquery of (movie_id, score) over the trending window. A play counts
+    once more when it's finished, and each hour's counts are weighted down
+    by half every TRENDING_HALF_LIFE_HOURS.
+    """
+    hour = int((now if now is not None else time.time()) // SECONDS_PER_HOUR)
+    counts = movie_watch_counts.c
+    weight = case(
+        {hour - age: 0.5 ** (age / settings.TRENDING_HALF_LIFE_HOURS) for age in range(settings.TRENDING_WINDOW_HOURS)},
+        value=counts.hour,
+        else_=0.0,
+    )
+    score = func.sum((counts.plays + counts.completions) * weight).label("score")
+    return (
+        select(counts.movie_id, score)
+        .where(counts.hour > hour - settings.TRENDING_WINDOW_HOURS)
+        .group_by(counts.movie_id)
+        .subquery()
+    )
+
+def unlink_watch_events(db: Session, movie_id: int) -> None:
+    """Remove a movie's events and counts ahead of deleting it"""
+    db.execute(delete(WatchEvent).where(WatchEvent.movie_id == movie_id))
+    db.execute(delete(movie_watch_counts).where(movie_watch_counts.c.movie_id == movie_id))
+
+def delete_user_watch_events(db: Session, user_id: int) -> None:
+    """Remove a user's events ahead of deleting them; the hourly counts are anonymous and stay"""
+    db.execute(delete(WatchEvent).where(WatchEvent.user_id == user_id))
+
+class WatchEventBuffer(BackgroundFlusher):
+    """
+    Per-process buffer of playback events. add() only appends to a list; the
+    flusher task writes the buffer every flush_seconds, or as soon as
+    flush_size events are waiting, with one bulk insert of the events and one
+    upsert of the hourly counts they touch.
+
+    Once max_size events are waiting add() refuses new ones until the
+    database catches up. Events of a failed flush are dropped, and so are
+    events still buffered when a worker is killed; stop() flushes the rest.
+    """
+
+    def __init__(self, flush_size: int, flush_seconds: float, max_size: int):
+        super().__init__(flush_seconds)
+        self.flush_size = flush_size
+        self.max_size = max_size
+        self._events: List[BufferedEvent] = []
+        self._lock = threading.Lock()
+        # One flush at a time, so a slow one isn't overtaken by the next
+        self._flush_lock = threading.Lock()
+        self._pruned_hour = 0
+        self.received = 0
+        self.written = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+
+    def add(self, user_id: int, movie_id: int, event: str, position: Optional[int] = None) -> bool:
+        """Buffer an event; returns False when the buffer is full"""
+        with self._lock:
+            if len(self._events) >= self.max_size:
+                self.rejected += 1
+                return False
+            self._events.append((user_id, movie_id, event, position, time.time()))
+            self.received += 1
+            pending = len(self._events)
+
+        if pending == self.flush_size:
+            self.wake()
+        return True
+
+    def flush(self) -> int:
+        """Write the buffered events in the calling thread; returns the number written"""
+        with self._flush_lock:
+            with self._lock:
+                events, self._events = self._events, []
+            if not events:
+                return 0
+
+            started = time.perf_counter()
+            hour = int(time.time() // SECONDS_PER_HOUR)
+            try:
+                with SessionLocal() as db:
+                    written = write_watch_events(db, events)
+                    if hour > self._pruned_hour:
+                        prune_watch_counts(db, hour)
+                    db.commit()
+            except SQLAlchemyError as e:
+                logger.error(f"Error writing {len(events)} watch events, dropping them: {str(e)}")
+                self.dropped += len(events)
+                return 0
+
+            self._pruned_hour = hour
+            self.flushes += 1
+            self.written += written
+            self.dropped += len(events) - written
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+            return written
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._events)
+        return {
+            "pending": pending,
+            "flush_size": self.flush_size,
+            "flush_seconds": self.flush_seconds,
+            "max_size": self.max_size,
+            "received": self.received,
+            "written": self.written,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 1),
+        }
+
+# Create a singleton instance
+watch_event_buffer = WatchEventBuffer(
+    flush_size=settings.WATCH_EVENT_FLUSH_SIZE,
+    flush_seconds=settings.WATCH_EVENT_FLUSH_SECONDS,
+    max_size=settings.WATCH_EVENT_BUFFER_MAX_SIZE,
+)
@@ -0,0 +1,228 @@
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, delete, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.flusher import BackgroundFlusher
+from app.core.upsert import upsert
+from app.core.utils import as_utc, get_utc_now
+from app.models.movie import Movie
+from app.models.watch import WatchProgress
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Rows per IN list
+BATCH_SIZE = 1000
+
+# (position, completed, updated_at) of a (user, movie), latest update only
+PendingProgress = Tuple[int, bool, datetime]
+
+def write_watch_progress(db: Session, pending: Dict[int, Dict[int, PendingProgress]]) -> int:
+    """
+    Upsert one row per (user, movie); a row already holding newer progress
+    (written by another worker) is left alone, and movies that no longer
+    exist are skipped. The caller commits. Returns the number of rows sent.
+    """
+    movie_ids = sorted({movie_id for movies in pending.values() for movie_id in movies})
+    known = set()
+    for start in range(0, len(movie_ids), BATCH_SIZE):
+        known.update(db.scalars(select(Movie.id).where(Movie.id.in_(movie_ids[start:start + BATCH_SIZE]))))
+
+    rows = [
+        {"user_id": user_id, "movie_id": movie_id, "position": position, "completed": completed, "updated_at": updated_at}
+        for user_id, movies in pending.items()
+        for movie_id, (position, completed, updated_at) in movies.items()
+        if movie_id in known
+    ]
+    upsert(
+        db,
+        WatchProgress.__table__,
+        rows,
+        keys=("user_id", "movie_id"),
+        replace=("position", "completed", "updated_at"),
+        version="updated_at",
+    )
+    return len(rows)
+
+def unlink_watch_progress(db: Session, movie_id: int) -> None:
+    """Remove every user's progress on a movie ahead of deleting it"""
+    db.execute(delete(WatchProgress).where(WatchProgress.movie_id == movie_id))
+
+def delete_user_watch_progress(db: Session, user_id: int) -> None:
+    """Remove a user's progress ahead of deleting them"""
+    db.execute(delete(WatchProgress).where(WatchProgress.user_id == user_id))
+
+def get_watch_progress(db: Session, user_id: int, movie_id: int) -> Optional[Dict[str, Any]]:
+    """
+    A user's latest progress on a movie: this process's pending update if
+    it has one, unless another worker has since written a newer one
+    """
+    pending = watch_progress_buffer.get(user_id, movie_id)
+    progress = db.get(WatchProgress, (user_id, movie_id))
+    if progress is not None:
+        updated_at = as_utc(progress.updated_at)
+        if pending is None or updated_at > pending[2]:
+            pending = (progress.position, progress.completed, updated_at)
+    if pending is None:
+        return None
+
+    position, completed, updated_at = pending
+    return {"movie_id": movie_id, "position": position, "completed": completed, "updated_at": updated_at}
+
+def get_continue_watching(db: Session, user_id: int, columns: Sequence[Any], limit: int) -> List[Tuple[Any, ...]]:
+    """
+    Rows of columns (the WatchProgress columns and any Movie columns) for the
+    movies a user started and hasn't finished, most recently watched first.
+    This process's pending updates are merged in as get_watch_progress does,
+    so the feed reflects them without flushing the buffer.
+    """
+    pending = watch_progress_buffer.get_user(user_id)
+    keys = [column.key for column in columns]
+    movie_index, position_index = keys.index("movie_id"), keys.index("position")
+    completed_index, updated_index = keys.index("completed"), keys.index("updated_at")
+
+    conditions = [WatchProgress.user_id == user_id, WatchProgress.completed == False]
+    if pending:
+        conditions.append(WatchProgress.movie_id.notin_(list(pending)))
+    rows = [
+        tuple(row)
+        for row in db.execute(
+            select(*columns)
+            .join(Movie, Movie.id == WatchProgress.movie_id)
+            .where(*conditions)
+            .order_by(WatchProgress.updated_at.desc())
+            .limit(limit)
+        )
+    ]
+
+    if pending:
+        # The pending movies with their stored progress, if any, which wins when newer
+        stored = db.execute(
+            select(*columns, Movie.id)
+            .select_from(Movie)
+            .outerjoin(WatchProgress, and_(WatchProgress.movie_id == Movie.id, WatchProgress.user_id == user_id))
+            .where(Movie.id.in_(list(pending)))
+        )
+        for row in stored:
+            row = list(row)
+            movie_id = row.pop()
+            position, completed, updated_at = pending[movie_id]
+            if row[updated_index] is None or not as_utc(row[updated_index]) > updated_at:
+                row[movie_index], row[position_index] = movie_id, position
+                row[completed_index], row[updated_index] = completed, updated_at
+            if not row[completed_index]:
+                rows.append(tuple(row))
+        rows.sort(key=lambda row: as_utc(row[updated_index]), reverse=True)
+
+    return rows[:limit]
+
+class WatchProgressBuffer(BackgroundFlusher):
+    """
+    Coalesces resume positions in memory: each (user, movie) keeps only its
+    latest update, and every flush_seconds the buffer is written as one
+    upsert row per key. Database writes are bounded by the number of active
+    viewers per interval, however often players report; a flush starts early
+    once max_size keys are waiting.
+
+    Progress is per process until flushed, so other workers see it up to
+    flush_seconds late. Updates of a failed flush are dropped; the next
+    report from the player replaces them.
+    """
+
+    def __init__(self, flush_seconds: float, max_size: int):
+        super().__init__(flush_seconds)
+        self.max_size = max_size
+        self._pending: Dict[int, Dict[int, PendingProgress]] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        # One flush at a time, so an older batch never lands after a newer one
+        self._flush_lock = threading.Lock()
+        self.received = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+
+    def set(self, user_id: int, movie_id: int, position: int, completed: bool = False) -> None:
+        """Record a user's latest position in a movie"""
+        with self._lock:
+            movies = self._pending.setdefault(user_id, {})
+            if movie_id not in movies:
+                self._size += 1
+            movies[movie_id] = (position, completed, get_utc_now())
+            self.received += 1
+            size = self._size
+
+        if size == self.max_size:
+            self.wake()
+
+    def get(self, user_id: int, movie_id: int) -> Optional[PendingProgress]:
+        """A user's progress on a movie that this process hasn't written yet"""
+        with self._lock:
+            return self._pending.get(user_id, {}).get(movie_id)
+
+    def get_user(self, user_id: int) -> Dict[int, PendingProgress]:
+        """A user's progress by movie that this process hasn't written yet"""
+        with self._lock:
+            return dict(self._pending.get(user_id, {}))
+
+    def flush(self, user_id: Optional[int] = None) -> int:
+        """
+        Write the buffered progress, or only one user's, in the calling
+        thread; returns the number of rows written
+        """
+        with self._flush_lock:
+            with self._lock:
+                if user_id is None:
+                    pending, self._pending = self._pending, {}
+                else:
+                    pending = {user_id: self._pending.pop(user_id)} if user_id in self._pending else {}
+                size = sum(len(movies) for movies in pending.values())
+                self._size -= size
+            if not size:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                with SessionLocal() as db:
+                    written = write_watch_progress(db, pending)
+                    db.commit()
+            except SQLAlchemyError as e:
+                logger.error(f"Error writing watch progress of {size} movies, dropping it: {str(e)}")
+                self.dropped += size
+                return 0
+
+            self.flushes += 1
+            self.written += written
+            self.dropped += size - written
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+            return written
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = self._size
+        return {
+            "pending": pending,
+            "flush_seconds": self.flush_seconds,
+            "max_size": self.max_size,
+            "received": self.received,
+            "written": self.written,
+            "coalesced": self.received - self.written - self.dropped - pending,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 1),
+        }
+
+# Create a singleton instance
+watch_progress_buffer = WatchProgressBuffer(
+    flush_seconds=settings.WATCH_PROGRESS_FLUSH_SECONDS,
+    max_size=settings.WATCH_PROGRESS_BUFFER_MAX_SIZE,
+)
@@ -1,9 +1,8 @@
 #!/bin/bash
 set -e
 
-# Run migrations
+# Run pending migrations (including initial seed data); no-op when up to date
 python -m app.core.migrate_db
-python -m app.core.init_db
 
 # Execute the command
 exec "$@"
@@ -0,0 +1,30 @@
+"""
+Shared setup for the benchmark scripts: a scratch database to run against
+and latency summaries. use_scratch_database must run before anything from
+app is imported, since settings are read at import time.
+"""
+import os
+import tempfile
+from typing import Optional, Sequence
+
+import numpy as np
+
+def use_scratch_database(database_url: Optional[str] = None) -> str:
+    """Point the app at database_url, or at a new SQLite file when none is given"""
+    if not database_url:
+        directory = tempfile.mkdtemp(prefix="movie-app-benchmark-")
+        database_url = f"sqlite:///{os.path.join(directory, 'movie_app.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    # boto3 rejects the blank default when the MediaConvert client is created
+    os.environ.setdefault("MEDIACONVERT_ENDPOINT", "https://mediaconvert.example.com")
+    return database_url
+
+def latency_summary(latencies: Sequence[float]) -> str:
+    """p50 / p99 / max of latencies given in seconds"""
+    if not len(latencies):
+        return "no requests completed"
+    milliseconds = np.asarray(latencies) * 1000
+    return (
+        f"p50 {np.percentile(milliseconds, 50):7.1f}ms  p99 {np.percentile(milliseconds, 99):7.1f}ms  "
+        f"max {milliseconds.max():7.1f}ms  ({len(milliseconds)} requests)"
+    )
@@ -0,0 +1,220 @@
+"""
+Time the hot subscription and payment queries at 1M subscriptions and 10M
+payments, without and then with the composite indexes of migration 6: the
+access check, a user's payment history and a deep keyset page of each admin
+listing. Fills a scratch SQLite database with synthetic rows unless
+--database-url is given, which must then name a disposable database. Run
+from the backend directory:
+
+    python -m scripts.hot_query_indexes
+    python -m scripts.hot_query_indexes --subscriptions 100000 --payments 1000000
+"""
+import time
+import logging
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+import numpy as np
+from sqlalchemy import event, text
+
+from scripts.benchmarking import use_scratch_database
+
+# Indexes added by migration 6 for these queries, by table
+HOT_QUERY_INDEXES = {
+    "subscriptions": ("ix_subscriptions_user_active_paid_end_date", "ix_subscriptions_created_at_id"),
+    "payments": ("ix_payments_user_id_created_at", "ix_payments_created_at_id"),
+}
+
+# Rows per executemany
+INSERT_BATCH_SIZE = 50000
+
+# Rows span this many days back from now
+HISTORY_DAYS = 3 * 365
+
+def timestamps(rng: np.random.Generator, now: datetime, count: int, days: float, offset_days: float = 0.0) -> np.ndarray:
+    """Random "YYYY-MM-DD HH:MM:SS.ffffff" UTC times within days before now (shifted by offset_days)"""
+    seconds = rng.uniform(-days * 86400, 0, count) + offset_days * 86400
+    moments = np.datetime64(now.replace(tzinfo=None), "us") + (seconds * 1e6).astype("timedelta64[us]")
+    return np.char.replace(np.datetime_as_string(moments, unit="us"), "T", " ")
+
+def batches(total: int) -> Iterator[Tuple[int, int]]:
+    for start in range(0, total, INSERT_BATCH_SIZE):
+        yield start, min(start + INSERT_BATCH_SIZE, total)
+
+def fill(connection, users: int, subscriptions: int, payments: int, seed: int = 0) -> None:
+    """Insert synthetic users, subscriptions and payments"""
+    rng = np.random.default_rng(seed)
+    now = datetime.now(timezone.utc)
+    first_user = (connection.execute(text("SELECT max(id) FROM users")).scalar() or 0) + 1
+    plan_ids = connection.execute(text("SELECT id FROM subscription_plans")).scalars().all()
+
+    insert_users = text(
+        "INSERT INTO users (id, email, username, hashed_password, is_active, is_superuser) "
+        "VALUES (:id, :email, :username, '-', :is_active, :is_superuser)"
+    )
+    for start, end in batches(users):
+        connection.execute(insert_users, [
+            {"id": first_user + n, "email": f"bench-{n}@example.com", "username": f"bench-{n}", "is_active": True, "is_superuser": False}
+            for n in range(start, end)
+        ])
+
+    insert_subscriptions = text(
+        "INSERT INTO subscriptions (user_id, plan_id, start_date, end_date, is_active, auto_renew, payment_status, created_at) "
+        "VALUES (:user_id, :plan_id, :created_at, :end_date, :is_active, :auto_renew, :payment_status, :created_at)"
+    )
+    for start, end in batches(subscriptions):
+        count = end - start
+        # Mostly lapsed, some running: end dates within a year either side of now
+        values = zip(
+            rng.integers(first_user, first_user + users, count).tolist(),
+            rng.choice(plan_ids, count).tolist(),
+            timestamps(rng, now, count, HISTORY_DAYS).tolist(),
+            timestamps(rng, now, count, 730, offset_days=365).tolist(),
+            (rng.random(count) < 0.7).tolist(),
+            rng.choice(["paid", "pending", "failed"], count, p=[0.8, 0.1, 0.1]).tolist(),
+        )
+        connection.execute(insert_subscriptions, [
+            {"user_id": user_id, "plan_id": plan_id, "created_at": created_at, "end_date": end_date,
+             "is_active": is_active, "auto_renew": True, "payment_status": payment_status}
+            for user_id, plan_id, created_at, end_date, is_active, payment_status in values
+        ])
+
+    insert_payments = text(
+        "INSERT INTO payments (user_id, amount, currency, status, created_at) "
+        "VALUES (:user_id, :amount, 'INR', :status, :created_at)"
+    )
+    for start, end in batches(payments):
+        count = end - start
+        values = zip(
+            rng.integers(first_user, first_user + users, count).tolist(),
+            rng.choice([199.0, 499.0, 1499.0], count).tolist(),
+            rng.choice(["successful", "pending", "failed"], count, p=[0.85, 0.05, 0.1]).tolist(),
+            timestamps(rng, now, count, HISTORY_DAYS).tolist(),
+        )
+        connection.execute(insert_payments, [
+            {"user_id": user_id, "amount": amount, "status": status, "created_at": created_at}
+            for user_id, amount, status, created_at in values
+        ])
+
+def model_indexes() -> List[Any]:
+    from app.models.payment import Payment
+    from app.models.subscription import Subscription
+
+    tables = {"subscriptions": Subscription.__table__, "payments": Payment.__table__}
+    return [
+        index
+        for table_name, names in HOT_QUERY_INDEXES.items()
+        for index in tables[table_name].indexes
+        if index.name in names
+    ]
+
+def create_queries(users: Tuple[int, int], rng: np.random.Generator) -> Dict[str, Callable[[Any], Any]]:
+    """The hot queries as the app builds them, each picking a random user or page"""
+    from sqlalchemy import select
+
+    from app.api.deps import get_user_entitlement
+    from app.core.pagination import encode_cursor, paginate
+    from app.models.payment import Payment
+    from app.models.subscription import Subscription
+    from app.models.user import User
+
+    def user_id() -> int:
+        return int(rng.integers(*users))
+
+    def cursor() -> str:
+        # A page about halfway through the history
+        moment = datetime.now(timezone.utc) - timedelta(days=float(rng.uniform(0.4, 0.6)) * HISTORY_DAYS)
+        return encode_cursor([moment, 2 ** 62])
+
+    def listing(model) -> Callable[[Any], Any]:
+        order = [model.created_at, model.id]
+        return lambda db: db.scalars(paginate(select(model), order, cursor(), 0, 20, descending=True)).all()
+
+    return {
+        "access check": lambda db: get_user_entitlement(db, User(id=user_id(), is_active=True, is_superuser=False)),
+        "payment history": lambda db: db.scalars(paginate(
+            select(Payment).where(Payment.user_id == user_id()), [Payment.created_at, Payment.id], None, 0, 20, descending=True,
+        )).all(),
+        "admin subscriptions page": listing(Subscription),
+        "admin payments page": listing(Payment),
+    }
+
+def explain(db, query: Callable[[Any], Any]) -> str:
+    """The query plan of the statement query runs, on one line"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    connection = db.connection()
+    event.listen(connection, "before_cursor_execute", capture)
+    try:
+        query(db)
+    finally:
+        event.remove(connection, "before_cursor_execute", capture)
+    statement, parameters = statements[0]
+    if connection.dialect.name == "sqlite":
+        return "; ".join(row[3] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+    return " / ".join(row[0].strip() for row in connection.exec_driver_sql(f"EXPLAIN {statement}", parameters))
+
+def time_queries(queries: Dict[str, Callable[[Any], Any]], budget_seconds: float, max_runs: int) -> None:
+    from app.core.database import SessionLocal
+
+    with SessionLocal() as db:
+        for name, query in queries.items():
+            plan = explain(db, query)
+            runs, started = 0, time.perf_counter()
+            while runs < max_runs and (runs < 3 or time.perf_counter() - started < budget_seconds):
+                query(db)
+                runs += 1
+            elapsed = time.perf_counter() - started
+            print(f"  {name:26} {elapsed / runs * 1000:9.2f}ms/query ({runs} runs)  {plan}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Hot query timings without and with the composite indexes")
+    parser.add_argument("--subscriptions", type=int, default=1_000_000)
+    parser.add_argument("--payments", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, help="users the rows belong to (default: subscriptions / 2)")
+    parser.add_argument("--seconds", type=float, default=2.0, help="time budget per query")
+    parser.add_argument("--runs", type=int, default=500, help="most runs per query")
+    parser.add_argument("--database-url", help="disposable database to fill instead of a scratch SQLite file")
+    args = parser.parse_args()
+
+    database_url = use_scratch_database(args.database_url)
+    from app.core.database import engine
+    from app.core.migrate_db import migrate_db
+
+    migrate_db()
+    # Without the indexes every admin page would be logged as a slow query
+    logging.getLogger("app").setLevel(logging.ERROR)
+    users = args.users or max(args.subscriptions // 2, 1)
+    print(f"{database_url}: {users} users, {args.subscriptions} subscriptions, {args.payments} payments")
+
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        first_user = (connection.execute(text("SELECT max(id) FROM users")).scalar() or 0) + 1
+        fill(connection, users, args.subscriptions, args.payments)
+        indexes = model_indexes()
+        for index in indexes:
+            index.drop(connection, checkfirst=True)
+        connection.execute(text("ANALYZE"))
+    print(f"Filled in {time.perf_counter() - started:.1f}s")
+
+    queries = create_queries((first_user, first_user + users), np.random.default_rng(1))
+    print("Without the composite indexes:")
+    time_queries(queries, args.seconds, args.runs)
+
+    for index in indexes:
+        started = time.perf_counter()
+        with engine.begin() as connection:
+            index.create(connection)
+        print(f"Created {index.name} in {time.perf_counter() - started:.1f}s")
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+
+    print("With the composite indexes:")
+    time_queries(queries, args.seconds, args.runs)
+
+if __name__ == "__main__":
+    main()
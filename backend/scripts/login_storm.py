@@ -0,0 +1,92 @@
+"""
+Measure /movies latency while concurrent clients hammer /login, with bcrypt
+on the bounded hashing pool and, for comparison, verified on the event loop
+as login did before. Runs the app in process against a scratch SQLite
+database unless --database-url is given. Run from the backend directory:
+
+    python -m scripts.login_storm
+    python -m scripts.login_storm --logins 64 --seconds 20
+"""
+import time
+import asyncio
+import logging
+import argparse
+from collections import Counter
+from typing import List, Tuple
+
+import httpx
+
+from scripts.benchmarking import latency_summary, use_scratch_database
+
+LOGIN = {"username": "admin@example.com", "password": "adminpassword"}
+
+async def storm(client: httpx.AsyncClient, stop: asyncio.Event, outcomes: Counter) -> None:
+    """Log in back to back, backing off for Retry-After when shed like a well-behaved client"""
+    while not stop.is_set():
+        response = await client.post("/v1/api/login", data=LOGIN)
+        outcomes[response.status_code] += 1
+        if response.status_code == 503:
+            await asyncio.sleep(float(response.headers.get("retry-after", 1)))
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, interval: float, latencies: List[float]) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/v1/api/movies", params={"limit": 20})
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+
+async def run(app, logins: int, seconds: float, interval: float) -> Tuple[List[float], Counter]:
+    latencies: List[float] = []
+    outcomes: Counter = Counter()
+    stop = asyncio.Event()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        # Fill the catalog cache so every mode serves /movies the same way
+        (await client.get("/v1/api/movies", params={"limit": 20})).raise_for_status()
+        tasks = [asyncio.create_task(storm(client, stop, outcomes)) for _ in range(logins)]
+        tasks.append(asyncio.create_task(probe(client, stop, interval, latencies)))
+        await asyncio.sleep(seconds)
+        stop.set()
+        await asyncio.gather(*tasks)
+    return latencies, outcomes
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="p50/p99 of /movies under a login storm")
+    parser.add_argument("--logins", type=int, default=32, help="concurrent login clients")
+    parser.add_argument("--seconds", type=float, default=10.0, help="duration of each run")
+    parser.add_argument("--interval", type=float, default=0.02, help="pause between /movies requests")
+    parser.add_argument("--database-url", help="database to run against instead of a scratch SQLite file")
+    args = parser.parse_args()
+
+    use_scratch_database(args.database_url)
+    from app.core import security
+    from app.core.migrate_db import migrate_db
+    from app.main import app
+
+    migrate_db()
+    # The app logs at INFO; one line per request would drown the results
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    pooled_verify = security.password_hasher.verify
+
+    async def verify_on_loop(plain_password: str, hashed_password: str) -> bool:
+        # What login did before: bcrypt on the event loop itself
+        return security.verify_password(plain_password, hashed_password)
+
+    print(
+        f"{args.logins} login clients, {args.seconds:.0f}s per run, hashing pool of "
+        f"{security.password_hasher.max_workers} workers + {security.password_hasher.max_pending} pending"
+    )
+    for mode, logins, verify in (
+        ("no logins", 0, pooled_verify),
+        ("bcrypt on the event loop", args.logins, verify_on_loop),
+        ("bcrypt on the hashing pool", args.logins, pooled_verify),
+    ):
+        security.password_hasher.verify = verify
+        latencies, outcomes = asyncio.run(run(app, logins, args.seconds, args.interval))
+        logins_summary = ", ".join(f"{count} x {code}" for code, count in sorted(outcomes.items()))
+        print(f"{mode:28} /movies {latency_summary(latencies)}  logins: {logins_summary or 'none'}")
+    security.password_hasher.verify = pooled_verify
+
+if __name__ == "__main__":
+    main()
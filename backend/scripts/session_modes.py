@@ -0,0 +1,157 @@
+"""
+Compare requests/sec of the /subscriptions/check-access lookup served three
+ways: an async route querying through the sync session (blocking the event
+loop, as the async routes did before the async engine), a sync route in the
+threadpool, and an async route on the async session. Each statement waits
+--round-trip-ms to stand in for the network hop to PostgreSQL; pass
+--database-url to measure a real server instead. The client shares the
+app's event loop, so latencies leave out time spent waiting for a blocked
+loop; compare requests/sec. Run from the backend directory:
+
+    python -m scripts.session_modes
+    python -m scripts.session_modes --concurrency 200 --round-trip-ms 2
+"""
+import time
+import asyncio
+import logging
+import argparse
+from datetime import timedelta
+from typing import List, Tuple
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event, select
+
+from scripts.benchmarking import latency_summary, use_scratch_database
+
+def add_round_trip(seconds: float) -> None:
+    """Delay every statement on both engines, blocking on sync and yielding on async"""
+    from sqlalchemy.util import await_only
+    from app.core.database import async_engine, engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _sync_round_trip(*args):
+        time.sleep(seconds)
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def _async_round_trip(*args):
+        # Async engines run their events in a greenlet on the event loop
+        await_only(asyncio.sleep(seconds))
+
+def create_benchmark_app(user_id: int) -> FastAPI:
+    from app.core.database import AsyncSessionLocal, SessionLocal
+    from app.core.utils import get_utc_now
+    from app.models.subscription import Subscription, SubscriptionPlan
+
+    def access_query():
+        # The query behind get_user_entitlement
+        return select(
+            Subscription.plan_id, Subscription.end_date, SubscriptionPlan.name, SubscriptionPlan.duration_days,
+        ).join(
+            SubscriptionPlan, Subscription.plan_id == SubscriptionPlan.id
+        ).where(
+            Subscription.user_id == user_id,
+            Subscription.is_active == True,
+            Subscription.payment_status == "paid",
+            Subscription.end_date > get_utc_now(),
+        ).order_by(Subscription.end_date.desc()).limit(1)
+
+    def access(subscription) -> dict:
+        return {"has_access": subscription is not None, "plan_name": subscription and subscription.name}
+
+    # Sessions are closed in the route rather than in a dependency's
+    # teardown, which runs after the response: with more requests in flight
+    # than pooled connections, the sync modes would otherwise hold every
+    # connection while the teardowns wait for the loop or a worker thread
+    benchmark_app = FastAPI()
+
+    @benchmark_app.get("/sync-session-on-the-loop")
+    async def sync_session_on_the_loop():
+        with SessionLocal() as db:
+            return access(db.execute(access_query()).first())
+
+    @benchmark_app.get("/sync-session-in-the-threadpool")
+    def sync_session_in_the_threadpool():
+        with SessionLocal() as db:
+            return access(db.execute(access_query()).first())
+
+    @benchmark_app.get("/async-session")
+    async def async_session():
+        async with AsyncSessionLocal() as db:
+            return access((await db.execute(access_query())).first())
+
+    return benchmark_app
+
+async def load(app: FastAPI, path: str, concurrency: int, seconds: float) -> Tuple[int, List[float]]:
+    latencies: List[float] = []
+    deadline = time.perf_counter() + seconds
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            assert response.json()["has_access"]
+            latencies.append(time.perf_counter() - started)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    from app.core.database import async_engine
+    # aiosqlite/asyncpg connections belong to this run's event loop
+    await async_engine.dispose()
+    return len(latencies) / elapsed, latencies
+
+def create_subscriber() -> int:
+    """A user with an active, paid subscription; returns their id"""
+    from app.core.database import SessionLocal
+    from app.core.utils import get_utc_now
+    from app.models.subscription import Subscription, SubscriptionPlan
+    from app.models.user import User
+
+    with SessionLocal() as db:
+        user = User(email=f"subscriber-{time.time_ns()}@example.com", hashed_password="-", is_active=True)
+        db.add(user)
+        db.flush()
+        plan = db.scalars(select(SubscriptionPlan).order_by(SubscriptionPlan.id)).first()
+        db.add(Subscription(
+            user_id=user.id,
+            plan_id=plan.id,
+            end_date=get_utc_now() + timedelta(days=plan.duration_days or 30),
+            is_active=True,
+            payment_status="paid",
+        ))
+        db.commit()
+        return user.id
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Requests/sec of the access check on sync and async sessions")
+    parser.add_argument("--concurrency", type=int, default=100, help="requests in flight")
+    parser.add_argument("--seconds", type=float, default=10.0, help="duration of each run")
+    parser.add_argument("--round-trip-ms", type=float, default=1.0, help="simulated latency per statement")
+    parser.add_argument("--database-url", help="database to run against instead of a scratch SQLite file")
+    args = parser.parse_args()
+
+    use_scratch_database(args.database_url)
+    from app.core.config import settings
+    from app.core.migrate_db import migrate_db
+
+    migrate_db()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    if args.round_trip_ms > 0:
+        add_round_trip(args.round_trip_ms / 1000)
+    app = create_benchmark_app(create_subscriber())
+
+    print(
+        f"{args.concurrency} requests in flight, {args.seconds:.0f}s per run, "
+        f"{args.round_trip_ms:g}ms per statement, pool of {settings.DB_POOL_SIZE} + {settings.DB_MAX_OVERFLOW} overflow"
+    )
+    for path in ("/sync-session-on-the-loop", "/sync-session-in-the-threadpool", "/async-session"):
+        throughput, latencies = asyncio.run(load(app, path, args.concurrency, args.seconds))
+        print(f"{path:32} {throughput:8.1f} req/s  {latency_summary(latencies)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Rebuild the similar movies of the whole catalog, or time the neighbour
+computation on a synthetic catalog. Run from the backend directory:
+
+    python -m scripts.similar_movies
+    python -m scripts.similar_movies --benchmark 100000
+"""
+import time
+import logging
+import argparse
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.movie_similarity import MovieFeatures, rebuild_similar_movies_task
+
+def benchmark(n: int, k: int = settings.SIMILAR_MOVIES_TOP_K, seed: int = 0) -> None:
+    """Time a full neighbour computation over a synthetic catalog of n movies"""
+    rng = np.random.default_rng(seed)
+    ids = np.arange(1, n + 1, dtype=np.int64)
+    genre_counts = rng.integers(1, 4, n)
+    genre_links = np.unique(np.stack([np.repeat(ids, genre_counts), rng.integers(1, 21, genre_counts.sum())], axis=1), axis=0)
+    cast_counts = rng.integers(2, 6, n)
+    # About 10 films per director and 20 per actor
+    director_links = np.stack([ids, rng.integers(0, max(n // 10, 1), n)], axis=1)
+    cast_links = np.unique(np.stack([np.repeat(ids, cast_counts), rng.integers(0, max(n // 6, 1), cast_counts.sum())], axis=1), axis=0)
+    years = rng.integers(1930, 2025, n).astype(np.float64)
+    ratings = np.round(rng.uniform(1, 10, n), 1)
+
+    started = time.perf_counter()
+    features = MovieFeatures(ids, years, ratings, genre_links, director_links, cast_links)
+    built = time.perf_counter()
+    sources, _, _ = features.neighbours(k=k)
+    done = time.perf_counter()
+    print(
+        f"{n} movies, {len(features.group_bounds)} groups: features {built - started:.2f}s, "
+        f"top-{k} neighbours {done - built:.2f}s ({len(sources) / n:.1f} per movie)"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the similar movies of the whole catalog")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="time a rebuild of N synthetic movies instead")
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark(args.benchmark)
+    else:
+        logging.basicConfig(level=logging.INFO)
+        rebuild_similar_movies_task()
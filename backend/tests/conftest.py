@@ -0,0 +1,57 @@
+import os
+import tempfile
+
+# Settings are read at import time, so point the app at a scratch database first
+_directory = tempfile.mkdtemp(prefix="movie-app-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_directory, 'movie_app.db')}"
+os.environ.setdefault("MEDIACONVERT_ENDPOINT", "https://mediaconvert.example.com")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.database import SessionLocal
+from app.core.migrate_db import migrate_db
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """Create the schema and seed data (admin user, plans, sample movies) once per run"""
+    migrate_db()
+
+@pytest.fixture(scope="session")
+def client():
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    response = client.post(
+        "/v1/api/login", data={"username": "admin@example.com", "password": "adminpassword"}
+    )
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def db():
+    with SessionLocal() as db:
+        yield db
+
+@pytest.fixture
+def create_movie(client, admin_headers):
+    """Create a movie through the API, overriding any of the default fields"""
+    def create(**fields):
+        movie = {
+            "description": "",
+            "release_year": 2000,
+            "duration": 100,
+            "genre": "Drama",
+            "director": "Test Director",
+            "cast": "",
+            **fields,
+        }
+        response = client.post("/v1/api/movies", json=movie, headers=admin_headers)
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return create
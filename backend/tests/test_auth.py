@@ -0,0 +1,15 @@
+from app.api.deps import decode_access_token
+
+def test_login(client):
+    response = client.post("/v1/api/login", data={"username": "user@example.com", "password": "userpassword"})
+    assert response.status_code == 200
+    token = decode_access_token(response.json()["access_token"])
+    assert token.ent.is_active and not token.ent.is_superuser
+
+def test_login_rejects_a_wrong_password(client):
+    response = client.post("/v1/api/login", data={"username": "user@example.com", "password": "wrong"})
+    assert response.status_code == 401
+
+def test_login_rejects_an_unknown_email(client):
+    response = client.post("/v1/api/login", data={"username": "nobody@example.com", "password": "userpassword"})
+    assert response.status_code == 401
@@ -0,0 +1,129 @@
+import pytest
+from starlette.requests import Request
+
+from app.core import catalog_cache as catalog_cache_module
+from app.core.catalog_cache import CatalogCache, catalog_cache
+
+def make_request(path="/v1/api/movies", query=b"", if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": query, "headers": headers})
+
+class Renderer:
+    """render() for CatalogCache.respond, counting calls and optionally running a hook mid-render"""
+
+    def __init__(self, during=None):
+        self.calls = 0
+        self.during = during
+
+    def __call__(self):
+        self.calls += 1
+        if self.during:
+            self.during()
+        return f'{{"render": {self.calls}}}'.encode(), {"X-Next-Cursor": "abc"}
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.monotonic of the cache module"""
+    now = [1000.0]
+    monkeypatch.setattr(catalog_cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+def test_etag_answers_304_on_if_none_match():
+    cache = CatalogCache(max_size=10, ttl_seconds=60)
+    render = Renderer()
+    response = cache.respond(make_request(), render)
+    assert response.status_code == 200
+    assert response.body == b'{"render": 1}'
+    etag = response.headers["etag"]
+    assert response.headers["x-next-cursor"] == "abc"
+
+    for if_none_match in (etag, f"W/{etag}", f'"stale", {etag}', "*"):
+        response = cache.respond(make_request(if_none_match=if_none_match), render)
+        assert response.status_code == 304, if_none_match
+        assert response.body == b""
+        assert response.headers["etag"] == etag
+        assert response.headers["x-next-cursor"] == "abc"
+
+    assert cache.respond(make_request(if_none_match='"stale"'), render).status_code == 200
+    assert render.calls == 1
+    assert cache.stats()["not_modified"] == 4
+
+def test_key_ignores_query_parameter_order():
+    cache = CatalogCache(max_size=10, ttl_seconds=60)
+    render = Renderer()
+    cache.respond(make_request(query=b"limit=20&genre=Drama"), render)
+    cache.respond(make_request(query=b"genre=Drama&limit=20"), render)
+    cache.respond(make_request(query=b"genre=Drama&limit=21"), render)
+    assert render.calls == 2
+
+def test_render_racing_an_invalidation_is_not_stored():
+    cache = CatalogCache(max_size=10, ttl_seconds=60)
+    # A catalog write commits while the response is being rendered from the old data
+    racing = Renderer(during=cache.invalidate)
+    assert cache.respond(make_request(), racing).body == b'{"render": 1}'
+    assert cache.stats()["size"] == 0
+
+    render = Renderer()
+    assert cache.respond(make_request(), render).body == b'{"render": 1}'
+    assert cache.respond(make_request(), render).body == b'{"render": 1}'
+    assert render.calls == 1
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = CatalogCache(max_size=10, ttl_seconds=60)
+    render = Renderer()
+    cache.respond(make_request(), render)
+    clock[0] += 59
+    cache.respond(make_request(), render)
+    assert render.calls == 1
+
+    clock[0] += 2
+    assert cache.respond(make_request(), render).body == b'{"render": 2}'
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+def test_least_recently_used_entries_are_evicted():
+    cache = CatalogCache(max_size=2, ttl_seconds=60)
+    render = Renderer()
+    for query in (b"page=1", b"page=2", b"page=1", b"page=3"):
+        cache.respond(make_request(query=query), render)
+    assert render.calls == 3
+    assert cache.stats()["evictions"] == 1
+
+    # page=2 was the least recently used
+    cache.respond(make_request(query=b"page=1"), render)
+    cache.respond(make_request(query=b"page=2"), render)
+    assert render.calls == 4
+
+def test_disabled_cache_renders_every_time():
+    cache = CatalogCache(max_size=0, ttl_seconds=60)
+    render = Renderer()
+    etag = cache.respond(make_request(), render).headers["etag"]
+    assert cache.respond(make_request(if_none_match=etag), render).status_code == 200
+    assert render.calls == 2
+
+def test_movie_writes_invalidate_cached_responses(client, admin_headers, create_movie):
+    movie_id = create_movie(title="Cache Before", genre="Brindlecore")["id"]
+    first = client.get(f"/v1/api/movies/{movie_id}")
+    hits = catalog_cache.hits
+    second = client.get(f"/v1/api/movies/{movie_id}", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 304
+    assert catalog_cache.hits == hits + 1
+    listing = client.get("/v1/api/movies", params={"genre": "brindlecore"})
+    assert [movie["title"] for movie in listing.json()] == ["Cache Before"]
+
+    response = client.put(f"/v1/api/movies/{movie_id}", json={"title": "Cache After"}, headers=admin_headers)
+    assert response.status_code == 200
+    updated = client.get(f"/v1/api/movies/{movie_id}", headers={"If-None-Match": first.headers["etag"]})
+    assert updated.status_code == 200
+    assert updated.json()["title"] == "Cache After"
+    assert updated.headers["etag"] != first.headers["etag"]
+
+    other_id = create_movie(title="Cache Other", genre="Brindlecore")["id"]
+    listing = client.get("/v1/api/movies", params={"genre": "brindlecore"})
+    assert [movie["title"] for movie in listing.json()] == ["Cache After", "Cache Other"]
+
+    assert client.delete(f"/v1/api/movies/{movie_id}", headers=admin_headers).status_code == 200
+    assert client.get(f"/v1/api/movies/{movie_id}").status_code == 404
+    listing = client.get("/v1/api/movies", params={"genre": "brindlecore"})
+    assert [movie["id"] for movie in listing.json()] == [other_id]
+    client.delete(f"/v1/api/movies/{other_id}", headers=admin_headers)
@@ -0,0 +1,44 @@
+import pytest
+from fastapi import HTTPException
+
+from app.api.deps import create_user_access_token, get_current_entitlement
+from app.core.security import create_access_token
+from app.core.user_cache import user_cache
+from app.models.user import User
+
+@pytest.fixture
+def superuser(db):
+    user = User(email="entitled@example.com", username="entitled", is_active=True, is_superuser=True)
+    db.add(user)
+    db.commit()
+    yield user
+    db.delete(user)
+    db.commit()
+    user_cache.invalidate(user.id)
+
+def deactivate(db, user):
+    user.is_active = False
+    db.commit()
+    user_cache.invalidate(user.id)
+
+def test_active_claim_is_trusted_without_the_database(db, superuser):
+    token = create_user_access_token(db, superuser)
+    entitlement = get_current_entitlement(db=None, token=token)
+    assert entitlement.is_active and entitlement.has_access()
+
+def test_claim_of_an_inactive_account_falls_back_to_the_database(db, superuser):
+    deactivate(db, superuser)
+    token = create_user_access_token(db, superuser)
+    with pytest.raises(HTTPException) as raised:
+        get_current_entitlement(db=db, token=token)
+    assert raised.value.detail == "Inactive user"
+
+def test_claim_without_account_state_falls_back_to_the_database(db, superuser):
+    # Issued before claims carried is_active
+    token = create_access_token(superuser.id, entitlement={"is_superuser": True})
+    assert get_current_entitlement(db=db, token=token).is_active
+
+    deactivate(db, superuser)
+    with pytest.raises(HTTPException) as raised:
+        get_current_entitlement(db=db, token=token)
+    assert raised.value.detail == "Inactive user"
@@ -0,0 +1,141 @@
+import orjson
+import pytest
+from sqlalchemy import delete, select
+
+from app.models.movie import Movie
+from app.services import movie_import
+from app.services.movie_taxonomy import name_key, unindex_movie
+
+def import_body(client, admin_headers, body, content_type, chunk_size=7):
+    """POST body to /movies/import in small chunks; returns the progress events"""
+    chunks = (body[start:start + chunk_size] for start in range(0, len(body), chunk_size))
+    response = client.post(
+        "/v1/api/movies/import", content=chunks, headers={**admin_headers, "Content-Type": content_type}
+    )
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/x-ndjson"
+    return [orjson.loads(line) for line in response.text.splitlines()]
+
+def row(**fields):
+    """An NDJSON line of a valid movie, overriding any of the default fields"""
+    movie = {"description": "", "release_year": 2000, "duration": 100, "director": "Import Director", "cast": "", **fields}
+    return orjson.dumps(movie)
+
+def titles(client, **params):
+    response = client.get("/v1/api/movies", params={"limit": 5000, "fields": "id,title", **params})
+    assert response.status_code == 200, response.text
+    return [movie["title"] for movie in response.json()]
+
+@pytest.fixture
+def imported_genre(db):
+    """Name of a genre to import into; its movies are removed afterwards"""
+    genres = []
+
+    def use(genre):
+        genres.append(genre)
+        return genre
+
+    yield use
+    for genre in genres:
+        ids = db.scalars(select(Movie.id).where(Movie.genre.contains(genre))).all()
+        for movie_id in ids:
+            unindex_movie(db, movie_id)
+        db.execute(delete(Movie).where(Movie.id.in_(ids)))
+    db.commit()
+
+def test_csv_import_reads_quoted_multiline_fields(client, admin_headers, db, imported_genre):
+    genre = imported_genre("Saltmarsh")
+    before = titles(client, genre=genre)
+    assert before == []
+    body = (
+        "﻿title,description,release_year,duration,genre,director,cast,poster_url\r\n"
+        f'"Tidewater","First line\r\nsecond, with ""quotes""\r\n\r\nlast line",1999,95,"{genre}, Drama",Oona Vale,"Pell Ames, Rhys Dunmore",\r\n'
+        f"Brackish,Short,2004,80,{genre},Oona Vale,Ivy Lorn,/posters/brackish.jpg\r\n"
+        "\r\n"
+    ).encode()
+    events = import_body(client, admin_headers, body, "text/csv")
+    assert events == [
+        {"event": "progress", "rows": 2, "imported": 2, "failed": 0},
+        {"event": "done", "rows": 2, "imported": 2, "failed": 0},
+    ]
+
+    movies = {movie.title: movie for movie in db.scalars(select(Movie).where(Movie.genre.contains(genre)))}
+    assert movies["Tidewater"].description == 'First line\nsecond, with "quotes"\n\nlast line'
+    assert movies["Tidewater"].cast == "Pell Ames, Rhys Dunmore"
+    assert (movies["Tidewater"].release_year, movies["Tidewater"].duration) == (1999, 95)
+    # Empty cells fall back to the schema defaults
+    assert movies["Tidewater"].poster_url is None
+    assert movies["Brackish"].poster_url == "/posters/brackish.jpg"
+
+    # The cached empty listing was invalidated, and the taxonomy indexed
+    assert sorted(titles(client, genre=genre)) == ["Brackish", "Tidewater"]
+    assert titles(client, person="rhys dunmore") == ["Tidewater"]
+    facets = client.get("/v1/api/movies/facets", params={"genre": genre}).json()
+    assert facets["total"] == 2
+    assert {"value": "Oona Vale", "count": 2} in facets["directors"]
+    assert {"value": "Drama", "count": 1} in facets["genres"]
+
+def test_ndjson_import_reports_bad_rows_and_keeps_going(client, admin_headers, db, imported_genre):
+    genre = imported_genre("Cindermoor")
+    rows = [
+        row(title="Ashfall", genre=genre, release_year=2001),
+        row(genre=genre, release_year=2002),
+        b"{not json",
+        b"[1, 2]",
+        b"",
+        row(title="Emberline", genre=genre, release_year="soon"),
+        row(title="Kilnlight", genre=genre, director="Tamsin Roe", id=1),
+    ]
+    events = import_body(client, admin_headers, b"\n".join(rows), "application/x-ndjson")
+
+    errors = [event for event in events if event["event"] == "error"]
+    assert [error["row"] for error in errors] == [2, 3, 4, 5]
+    assert errors[0]["errors"] == ["title: Field required"]
+    assert errors[2]["errors"] == ["Row must be an object"]
+    assert errors[3]["errors"][0].startswith("release_year: ")
+    assert events[-2:] == [
+        {"event": "progress", "rows": 6, "imported": 2, "failed": 4},
+        {"event": "done", "rows": 6, "imported": 2, "failed": 4},
+    ]
+    # Fields other than the movie's own, like id, are ignored
+    assert sorted(titles(client, genre=genre)) == ["Ashfall", "Kilnlight"]
+    assert 1 not in db.scalars(select(Movie.id).where(Movie.genre == genre)).all()
+    assert titles(client, person="Tamsin Roe") == ["Kilnlight"]
+
+def test_rows_are_committed_in_batches(client, admin_headers, db, imported_genre):
+    genre = imported_genre("Gorsebank")
+    count = movie_import.BATCH_SIZE * 2 + 500
+    body = b"\n".join(
+        row(title=f"Batch {n}", genre=genre, director=f"Batch Director {n % 3}")
+        for n in range(count)
+    )
+    events = import_body(client, admin_headers, body, "application/x-ndjson", chunk_size=64 * 1024)
+    assert events == [
+        {"event": "progress", "rows": 1000, "imported": 1000, "failed": 0},
+        {"event": "progress", "rows": 2000, "imported": 2000, "failed": 0},
+        {"event": "progress", "rows": 2500, "imported": 2500, "failed": 0},
+        {"event": "done", "rows": 2500, "imported": 2500, "failed": 0},
+    ]
+    imported = db.execute(select(Movie.id, Movie.title).where(Movie.genre == genre).order_by(Movie.id)).all()
+    # Inserted in file order
+    assert [title for _, title in imported] == [f"Batch {n}" for n in range(count)]
+    facets = client.get("/v1/api/movies/facets", params={"genre": genre}).json()
+    assert facets["total"] == count
+    assert sorted(facet["count"] for facet in facets["directors"]) == [833, 833, 834]
+
+def test_unterminated_quote_aborts_after_committed_rows(client, admin_headers, db, imported_genre):
+    genre = imported_genre("Hollowfen")
+    body = f'title,description,release_year,duration,genre,director,cast\nKept,Kept row,2000,90,{genre},Someone,Nobody\n"Broken,{genre}\n'.encode()
+    events = import_body(client, admin_headers, body, "text/csv")
+    assert events == [
+        {"event": "error", "row": 2, "errors": ["Aborted: Unterminated quoted field at end of file"]},
+        {"event": "progress", "rows": 1, "imported": 1, "failed": 0},
+        {"event": "done", "rows": 1, "imported": 1, "failed": 0},
+    ]
+    assert titles(client, genre=name_key(genre)) == ["Kept"]
+
+def test_import_needs_a_known_format(client, admin_headers):
+    response = client.post(
+        "/v1/api/movies/import", content=b"title\nX\n", headers={**admin_headers, "Content-Type": "text/plain"}
+    )
+    assert response.status_code == 415
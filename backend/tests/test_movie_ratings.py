@@ -0,0 +1,58 @@
+import random
+import threading
+
+from sqlalchemy import func, insert, select
+
+from app.core.database import SessionLocal
+from app.models.movie import Movie
+from app.models.rating import Rating
+from app.models.user import User
+from app.services.movie_ratings import rate_movie, unrate_movie
+
+THREADS = 8
+USERS = 40
+OPERATIONS = 1600
+
+def test_concurrent_ratings_keep_the_aggregate_consistent(db):
+    movie_id = db.scalar(insert(Movie).values(title="Hammered").returning(Movie.id))
+    user_ids = db.scalars(
+        insert(User).returning(User.id),
+        [{"email": f"rater-{n}@example.com", "username": f"rater-{n}"} for n in range(USERS)],
+    ).all()
+    db.commit()
+
+    errors = []
+
+    def worker(index: int) -> None:
+        rng = random.Random(index)
+        with SessionLocal() as session:
+            for _ in range(OPERATIONS // THREADS):
+                # Users are shared between threads, so the same user's rating
+                # is created, replaced and deleted concurrently too
+                user_id = rng.choice(user_ids)
+                try:
+                    if rng.random() < 0.75:
+                        rate_movie(session, user_id, movie_id, rng.randint(1, 10))
+                    else:
+                        unrate_movie(session, user_id, movie_id)
+                except Exception as e:
+                    session.rollback()
+                    errors.append(f"{type(e).__name__}: {str(e)}")
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    db.expire_all()
+    movie = db.execute(
+        select(Movie.user_rating_sum, Movie.user_rating_count, Movie.user_rating).where(Movie.id == movie_id)
+    ).one()
+    total, count = db.execute(
+        select(func.coalesce(func.sum(Rating.score), 0), func.count()).where(Rating.movie_id == movie_id)
+    ).one()
+    assert (movie.user_rating_sum, movie.user_rating_count) == (total, count)
+    assert count > 0
+    assert movie.user_rating == total / count
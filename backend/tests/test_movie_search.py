@@ -0,0 +1,67 @@
+import pytest
+
+from app.services.movie_search import edit_distance
+
+def search(client, q, **params):
+    response = client.get("/v1/api/movies/search", params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return [movie["id"] for movie in response.json()]
+
+@pytest.fixture(scope="module")
+def ranked(client, admin_headers):
+    """Movies mentioning "quillfeather" in a differently weighted column each"""
+    movies = {}
+    for column, fields in {
+        "title": {"title": "The Quillfeather Affair"},
+        "director": {"title": "Ranked Director", "director": "Ada Quillfeather"},
+        "description": {"title": "Ranked Description", "description": "A story about quillfeather ink"},
+    }.items():
+        movie = {"description": "", "release_year": 2000, "duration": 100, "genre": "Drama", "director": "Someone", "cast": "", **fields}
+        response = client.post("/v1/api/movies", json=movie, headers=admin_headers)
+        assert response.status_code == 200, response.text
+        movies[column] = response.json()["id"]
+    yield movies
+    for movie_id in movies.values():
+        client.delete(f"/v1/api/movies/{movie_id}", headers=admin_headers)
+
+def test_results_are_ranked_by_weighted_bm25(client, ranked):
+    # Title outweighs director, which outweighs description
+    assert search(client, "quillfeather") == [ranked["title"], ranked["director"], ranked["description"]]
+    assert search(client, "quillfeather", limit=1) == [ranked["title"]]
+
+def test_terms_match_word_prefixes(client, ranked):
+    assert search(client, "quillfea") == search(client, "quillfeather")
+    # Every term must match
+    assert search(client, "quill affair") == [ranked["title"]]
+    assert search(client, "quill zebrafinch") == []
+
+def test_misspelled_terms_are_corrected_from_the_index(client, ranked):
+    assert search(client, "quilfeather") == search(client, "quillfeather")
+    assert search(client, "quillfaether afair") == [ranked["title"]]
+    # Candidates must share the first two letters, in either order
+    assert search(client, "uqillfeather") == search(client, "quillfeather")
+    assert search(client, "wuillfeather") == []
+    # Short terms must match exactly, and nothing close is no result
+    assert search(client, "qxz") == []
+    assert search(client, "xylophonist") == []
+
+def test_edit_distance_gives_up_past_the_limit():
+    assert edit_distance("quillfeather", "quilfeather", 2) == 1
+    assert edit_distance("kitten", "sitting", 3) == 3
+    assert edit_distance("kitten", "sitting", 2) == 3
+    assert edit_distance("abc", "abcdef", 1) == 2
+
+def test_index_follows_movie_writes(client, admin_headers, create_movie):
+    movie_id = create_movie(title="Marrowglass", cast="Tova Brightwater")["id"]
+    assert search(client, "marrowglass") == [movie_id]
+    assert search(client, "brightwater") == [movie_id]
+
+    response = client.put(f"/v1/api/movies/{movie_id}", json={"title": "Emberwick"}, headers=admin_headers)
+    assert response.status_code == 200
+    assert search(client, "marrowglass") == []
+    assert search(client, "emberwick") == [movie_id]
+    assert search(client, "brightwater") == [movie_id]
+
+    assert client.delete(f"/v1/api/movies/{movie_id}", headers=admin_headers).status_code == 200
+    assert search(client, "emberwick") == []
+    assert search(client, "brightwater") == []
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+from sqlalchemy import select
+
+from app.models.movie import Movie, movie_similarities
+from app.services.movie_similarity import (
+    MovieFeatures,
+    rebuild_similar_movies,
+    refresh_similar_movies,
+    unlink_similar_movies,
+)
+from app.services.movie_taxonomy import index_movies, unindex_movie
+
+def test_neighbours_match_brute_force():
+    rng = np.random.default_rng(0)
+    n, k = 500, 10
+    ids = np.arange(1, n + 1, dtype=np.int64)
+    genre_counts = rng.integers(1, 4, n)
+    genre_links = np.unique(np.stack([np.repeat(ids, genre_counts), rng.integers(1, 8, genre_counts.sum())], axis=1), axis=0)
+    director_links = np.stack([ids, rng.integers(0, 50, n)], axis=1)
+    cast_counts = rng.integers(2, 6, n)
+    cast_links = np.unique(np.stack([np.repeat(ids, cast_counts), rng.integers(0, 80, cast_counts.sum())], axis=1), axis=0)
+    years = rng.integers(1930, 2025, n).astype(np.float64)
+    ratings = np.round(rng.uniform(1, 10, n), 1)
+    # Some movies with missing blocks
+    years[::7] = 0
+    ratings[::5] = 0
+
+    features = MovieFeatures(ids, years, ratings, genre_links, director_links, cast_links)
+    sources, targets, scores = features.neighbours(k=k)
+
+    everything = features.scores(np.arange(n))
+    np.fill_diagonal(everything, -np.inf)
+    for row in range(n):
+        expected = np.sort(everything[row][everything[row] > 0])[::-1][:k]
+        np.testing.assert_allclose(scores[sources == row], expected, rtol=1e-5, atol=1e-6)
+        assert row not in targets[sources == row]
+
+def _lists(db, movie_ids):
+    rows = db.execute(
+        select(movie_similarities.c.movie_id, movie_similarities.c.similar_movie_id, movie_similarities.c.score)
+        .where(movie_similarities.c.movie_id.in_(movie_ids))
+    ).all()
+    lists = {movie_id: {} for movie_id in movie_ids}
+    for movie_id, similar_movie_id, score in rows:
+        lists[movie_id][similar_movie_id] = score
+    return lists
+
+def _assert_matches_rebuild(db):
+    # Every list in the catalog, not just the test movies'
+    db.commit()
+    movie_ids = db.scalars(select(Movie.id)).all()
+    refreshed = _lists(db, movie_ids)
+    rebuild_similar_movies(db)
+    db.commit()
+    rebuilt = _lists(db, movie_ids)
+    for movie_id in movie_ids:
+        assert refreshed[movie_id].keys() == rebuilt[movie_id].keys(), movie_id
+        assert refreshed[movie_id] == pytest.approx(rebuilt[movie_id], abs=1e-4), movie_id
+
+def _add_movie(db, rng, title, director, genre="Similarity Test"):
+    movie = Movie(
+        title=title,
+        genre=genre,
+        director=director,
+        release_year=int(rng.integers(1950, 2020)),
+        rating=float(rng.uniform(1, 10)),
+    )
+    db.add(movie)
+    db.flush()
+    index_movies(db, [movie], replace=False)
+    return movie
+
+def test_refresh_matches_a_full_rebuild(db):
+    rng = np.random.default_rng(1)
+    movies = [_add_movie(db, rng, f"Similar {n}", f"Test Director {n % 4}") for n in range(40)]
+    db.commit()
+    rebuild_similar_movies(db)
+    db.commit()
+    movie_ids = [movie.id for movie in movies]
+
+    # Created
+    created = _add_movie(db, rng, "Similar new", "Test Director 1")
+    db.commit()
+    movie_ids.append(created.id)
+    refresh_similar_movies([created.id])
+    assert created.id in {similar for listed in _lists(db, movie_ids).values() for similar in listed}
+    _assert_matches_rebuild(db)
+
+    # Sharing no genre or person, related by release year and rating alone
+    loner = _add_movie(db, rng, "Similar loner", "Loner Director", genre="Loner Genre")
+    db.commit()
+    refresh_similar_movies([loner.id])
+    assert _lists(db, [loner.id])[loner.id]
+    _assert_matches_rebuild(db)
+
+    # Changed
+    changed = movies[5]
+    changed.release_year, changed.director = 1951, "Test Director 3"
+    db.flush()
+    index_movies(db, [changed])
+    db.commit()
+    refresh_similar_movies([changed.id])
+    _assert_matches_rebuild(db)
+
+    # Deleted
+    deleted = movies[9]
+    listed_by = unlink_similar_movies(db, deleted.id)
+    unindex_movie(db, deleted.id)
+    db.delete(deleted)
+    db.commit()
+    movie_ids.remove(deleted.id)
+    refresh_similar_movies([], refill=listed_by)
+    _assert_matches_rebuild(db)
@@ -0,0 +1,128 @@
+import pytest
+from sqlalchemy import select
+
+from app.models.movie import Movie, Genre, Person, movie_genres, movie_people
+from app.services.movie_taxonomy import ROLE_CAST, ROLE_DIRECTOR, index_movies, unindex_movie
+
+def movie_ids(client, **params):
+    response = client.get("/v1/api/movies", params={"limit": 1000, "fields": "id", **params})
+    assert response.status_code == 200, response.text
+    return {movie["id"] for movie in response.json()}
+
+def facets(client, **params):
+    response = client.get("/v1/api/movies/facets", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def links(db, movie_id):
+    genres = db.scalars(
+        select(Genre.name).join(movie_genres, movie_genres.c.genre_id == Genre.id).where(movie_genres.c.movie_id == movie_id)
+    ).all()
+    people = db.execute(
+        select(Person.name, movie_people.c.role)
+        .join(movie_people, movie_people.c.person_id == Person.id)
+        .where(movie_people.c.movie_id == movie_id)
+    ).all()
+    return set(genres), set(people)
+
+@pytest.fixture(scope="module")
+def catalog(client, admin_headers):
+    """Movies sharing the made-up "Fenwright" genre, spread over years, ratings and people"""
+    movies = {}
+    for name, fields in {
+        "old": {"release_year": 1987, "rating": 6.0, "genre": "Fenwright, Drama", "director": "Lio Sandgrave", "cast": "Mira Holt"},
+        "mid": {"release_year": 1995, "rating": 7.5, "genre": "fenwright", "director": "Lio Sandgrave", "cast": ""},
+        "new": {"release_year": 2012, "rating": 8.8, "genre": " Fenwright ,Thriller", "director": "Bea Corran", "cast": "Mira  Holt, Ode Pym"},
+        "other": {"release_year": 2012, "rating": 9.0, "genre": "Thriller", "director": "Bea Corran", "cast": ""},
+    }.items():
+        movie = {"title": f"Taxonomy {name}", "description": "", "duration": 100, **fields}
+        response = client.post("/v1/api/movies", json=movie, headers=admin_headers)
+        assert response.status_code == 200, response.text
+        movies[name] = response.json()["id"]
+        # Creating a movie leaves its rating at the default
+        response = client.put(f"/v1/api/movies/{movies[name]}", json={"rating": fields["rating"]}, headers=admin_headers)
+        assert response.status_code == 200, response.text
+    yield movies
+    for movie_id in movies.values():
+        client.delete(f"/v1/api/movies/{movie_id}", headers=admin_headers)
+
+def test_filters_match_genre_and_people_by_name_key(client, catalog):
+    fenwright = {catalog["old"], catalog["mid"], catalog["new"]}
+    assert movie_ids(client, genre="Fenwright") == fenwright
+    assert movie_ids(client, genre="  FENWRIGHT ") == fenwright
+    # Directors and cast alike, with whitespace collapsed
+    assert movie_ids(client, person="mira holt") == {catalog["old"], catalog["new"]}
+    assert movie_ids(client, person="Bea Corran", genre="fenwright") == {catalog["new"]}
+    assert movie_ids(client, genre="Fenwrigh") == set()
+
+def test_filters_by_year_range_and_min_rating(client, catalog):
+    assert movie_ids(client, genre="fenwright", year_from=1990) == {catalog["mid"], catalog["new"]}
+    assert movie_ids(client, genre="fenwright", year_to=1995) == {catalog["old"], catalog["mid"]}
+    assert movie_ids(client, genre="fenwright", year_from=1990, year_to=1999) == {catalog["mid"]}
+    assert movie_ids(client, person="Lio Sandgrave", min_rating=7.5) == {catalog["mid"]}
+    assert movie_ids(client, person="Bea Corran", min_rating=9.0) == {catalog["other"]}
+
+def test_facets_count_the_filtered_movies(client, catalog):
+    result = facets(client, genre="fenwright")
+    assert result["total"] == 3
+    genres = {facet["value"]: facet["count"] for facet in result["genres"]}
+    assert genres["Fenwright"] == 3
+    assert genres["Thriller"] == 1
+    assert genres["Drama"] == 1
+    assert result["directors"] == [{"value": "Lio Sandgrave", "count": 2}, {"value": "Bea Corran", "count": 1}]
+    assert result["decades"] == [
+        {"value": "1980", "count": 1},
+        {"value": "1990", "count": 1},
+        {"value": "2010", "count": 1},
+    ]
+
+    result = facets(client, person="Bea Corran", year_from=2000)
+    assert result["total"] == 2
+    assert result["directors"] == [{"value": "Bea Corran", "count": 2}]
+    assert result["decades"] == [{"value": "2010", "count": 2}]
+
+def test_links_follow_movie_writes(client, admin_headers, create_movie, db):
+    movie_id = create_movie(title="Taxonomy writes", genre="Quernic", director="Ivo Tallent", cast="Rue Ashdown")["id"]
+    assert links(db, movie_id) == ({"Quernic"}, {("Ivo Tallent", ROLE_DIRECTOR), ("Rue Ashdown", ROLE_CAST)})
+    assert movie_ids(client, genre="quernic") == {movie_id}
+
+    response = client.put(
+        f"/v1/api/movies/{movie_id}", json={"genre": "Vellish", "cast": "Rue Ashdown, Ivo Tallent"}, headers=admin_headers
+    )
+    assert response.status_code == 200, response.text
+    db.expire_all()
+    assert links(db, movie_id) == (
+        {"Vellish"},
+        {("Ivo Tallent", ROLE_DIRECTOR), ("Ivo Tallent", ROLE_CAST), ("Rue Ashdown", ROLE_CAST)},
+    )
+    assert movie_ids(client, genre="quernic") == set()
+    assert movie_ids(client, genre="vellish") == {movie_id}
+    assert facets(client, genre="quernic")["total"] == 0
+
+    assert client.delete(f"/v1/api/movies/{movie_id}", headers=admin_headers).status_code == 200
+    db.expire_all()
+    assert links(db, movie_id) == (set(), set())
+    assert movie_ids(client, genre="vellish") == set()
+    assert movie_ids(client, person="Rue Ashdown") == set()
+
+def test_index_movies_appends_or_replaces_links(db):
+    first = Movie(title="Index first", genre="Ostrel, Drama", director="Kit Varo", cast="")
+    second = Movie(title="Index second", genre="ostrel", director="kit  varo", cast="Nell Quay")
+    db.add_all([first, second])
+    db.flush()
+
+    # New movies have no links yet, so nothing needs deleting
+    index_movies(db, [first, second], replace=False)
+    assert links(db, first.id) == ({"Ostrel", "Drama"}, {("Kit Varo", ROLE_DIRECTOR)})
+    # Genres and people are shared by key, keeping the first spelling seen
+    assert links(db, second.id) == ({"Ostrel"}, {("Kit Varo", ROLE_DIRECTOR), ("Nell Quay", ROLE_CAST)})
+    assert len(db.scalars(select(Genre).where(Genre.key == "ostrel")).all()) == 1
+
+    first.genre, first.cast = "Drama", "Nell Quay"
+    index_movies(db, [first])
+    assert links(db, first.id) == ({"Drama"}, {("Kit Varo", ROLE_DIRECTOR), ("Nell Quay", ROLE_CAST)})
+    assert links(db, second.id) == ({"Ostrel"}, {("Kit Varo", ROLE_DIRECTOR), ("Nell Quay", ROLE_CAST)})
+
+    unindex_movie(db, second.id)
+    assert links(db, second.id) == (set(), set())
+    db.rollback()
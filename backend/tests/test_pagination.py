@@ -0,0 +1,65 @@
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.core.migrate_db import add_timestamp_microseconds
+from app.models.payment import Payment
+from app.models.user import User
+
+def page_through(client, headers, path, **params):
+    """Ids of every row of a keyset-paginated listing, one row per page"""
+    ids, cursor = [], None
+    while True:
+        response = client.get(path, params={**params, "limit": 1, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        assert response.status_code == 200, response.text
+        ids += [row["id"] for row in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return ids
+
+def test_cursors_keep_rows_with_whole_second_timestamps(client, admin_headers, db):
+    user = User(email="cursor-payer@example.com", hashed_password="-", is_active=True)
+    db.add(user)
+    db.flush()
+    created = [
+        datetime(2024, 3, 1, 12, 0, 0),
+        datetime(2024, 3, 1, 12, 0, 0),
+        datetime(2024, 3, 1, 12, 0, 0, 500000),
+        datetime(2024, 3, 1, 11, 59, 59),
+        None,
+    ]
+    payments = [
+        Payment(user_id=user.id, amount=199.0, status="successful", **({"created_at": at} if at else {}))
+        for at in created
+    ]
+    db.add_all(payments)
+    db.commit()
+
+    stored = db.scalars(text("SELECT created_at FROM payments WHERE user_id = :user_id ORDER BY id"), {"user_id": user.id}).all()
+    assert stored[:4] == [
+        "2024-03-01 12:00:00.000000",
+        "2024-03-01 12:00:00.000000",
+        "2024-03-01 12:00:00.500000",
+        "2024-03-01 11:59:59.000000",
+    ]
+    # The default timestamp is stored the same way
+    assert len(stored[4]) == 26
+
+    newest_first = sorted(payments, key=lambda payment: (payment.created_at.replace(tzinfo=None), payment.id), reverse=True)
+    assert page_through(client, admin_headers, "/v1/api/admin/payments", user_id=user.id) == [
+        payment.id for payment in newest_first
+    ]
+
+def test_migration_adds_microseconds_to_server_default_timestamps(db):
+    user = User(email="cursor-legacy@example.com", hashed_password="-", is_active=True)
+    db.add(user)
+    db.flush()
+    # A row written before the app set created_at, by the CURRENT_TIMESTAMP default
+    db.execute(
+        text("INSERT INTO payments (user_id, amount, currency, status, created_at) VALUES (:user_id, 1, 'INR', 'pending', '2023-01-01 08:00:00')"),
+        {"user_id": user.id},
+    )
+    add_timestamp_microseconds(db.connection())
+    add_timestamp_microseconds(db.connection())
+    assert db.scalar(text("SELECT created_at FROM payments WHERE user_id = :user_id"), {"user_id": user.id}) == "2023-01-01 08:00:00.000000"
+    db.rollback()
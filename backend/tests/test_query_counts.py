@@ -0,0 +1,63 @@
+import re
+from datetime import timedelta
+
+import pytest
+
+from app.core.database import SessionLocal
+from app.core.utils import get_utc_now
+from app.models.payment import Payment
+from app.models.subscription import Subscription, SubscriptionPlan
+from app.models.user import User
+
+ROWS = 30
+
+@pytest.fixture(scope="module")
+def history(database):
+    """Subscriptions and successful payments of the admin, more than a page of each"""
+    with SessionLocal() as db:
+        user_id = db.query(User.id).filter(User.email == "admin@example.com").scalar()
+        plan_ids = [plan_id for plan_id, in db.query(SubscriptionPlan.id).all()]
+        payment_ids = []
+        for n in range(ROWS):
+            subscription = Subscription(
+                user_id=user_id,
+                plan_id=plan_ids[n % len(plan_ids)],
+                end_date=get_utc_now() + timedelta(days=30),
+                payment_status="paid",
+            )
+            db.add(subscription)
+            db.flush()
+            payment = Payment(
+                user_id=user_id,
+                subscription_id=subscription.id,
+                amount=199.0,
+                status="successful",
+                razorpay_payment_id=f"pay_{n}",
+            )
+            db.add(payment)
+            db.flush()
+            payment_ids.append(payment.id)
+        db.commit()
+    return payment_ids
+
+def statement_count(response) -> int:
+    assert response.status_code == 200, response.text
+    return int(re.search(r'desc="(\d+) queries"', response.headers["Server-Timing"]).group(1))
+
+@pytest.mark.parametrize("path, expected", [
+    ("/v1/api/admin/subscriptions", 1),
+    ("/v1/api/payments/my", 1),
+])
+def test_listings_issue_a_fixed_number_of_statements(client, admin_headers, history, path, expected):
+    client.get(path, headers=admin_headers)  # Warm the user cache
+    for limit in (5, 25):
+        response = client.get(path, params={"limit": limit}, headers=admin_headers)
+        assert statement_count(response) == expected
+        assert len(response.json()) == limit
+
+def test_receipt_loads_its_subscription_and_plan_with_the_payment(client, admin_headers, history):
+    counts = [
+        statement_count(client.get(f"/v1/api/payments/{payment_id}/receipt", headers=admin_headers))
+        for payment_id in history[:2]
+    ]
+    assert counts == [1, 1]
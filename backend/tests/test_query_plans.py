@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import event
+
+from app.api.deps import get_user_entitlement
+from app.core.database import SessionLocal, async_engine, engine
+from app.core.pagination import encode_cursor
+from app.models.user import User
+
+@contextmanager
+def captured_statements():
+    """(statement, parameters) of everything the app runs, on both engines"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    engines = [engine, async_engine.sync_engine]
+    for target in engines:
+        event.listen(target, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", capture)
+
+def query_plan(statements, *fragments):
+    """EXPLAIN QUERY PLAN details of the one captured statement containing every fragment"""
+    matching = [(statement, parameters) for statement, parameters in statements if all(f in statement for f in fragments)]
+    assert len(matching) == 1, f"expected one statement containing {fragments}, got {len(matching)}"
+    statement, parameters = matching[0]
+    with engine.connect() as connection:
+        return [row[3] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+def assert_uses_index(plan, table, index):
+    assert any(line.startswith(("SEARCH", "SCAN")) and f" {table} " in f"{line} " and index in line for line in plan), plan
+    # A bare SCAN reads the whole table; a temp B-tree means the index didn't supply the order
+    assert not any(line == f"SCAN {table}" or "USE TEMP B-TREE" in line for line in plan), plan
+
+CURSOR = encode_cursor([datetime(2024, 1, 1, tzinfo=timezone.utc), 10])
+
+@pytest.fixture(scope="module")
+def admin(database):
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.email == "admin@example.com").one()
+        db.expunge(user)
+    return user
+
+def test_active_subscription_lookup_uses_its_index(db, admin):
+    with captured_statements() as statements:
+        get_user_entitlement(db, admin)
+    plan = query_plan(statements, "FROM subscriptions", "payment_status")
+    assert_uses_index(plan, "subscriptions", "ix_subscriptions_user_active_paid_end_date")
+
+@pytest.mark.parametrize("params", [{}, {"cursor": CURSOR}])
+def test_my_payments_use_the_user_index(client, admin_headers, params):
+    with captured_statements() as statements:
+        response = client.get("/v1/api/payments/my", params=params, headers=admin_headers)
+    assert response.status_code == 200
+    plan = query_plan(statements, "FROM payments", "ORDER BY payments.created_at DESC")
+    assert_uses_index(plan, "payments", "ix_payments_user_id_created_at")
+
+@pytest.mark.parametrize("path, table, index", [
+    ("/v1/api/admin/subscriptions", "subscriptions", "ix_subscriptions_created_at_id"),
+    ("/v1/api/admin/payments", "payments", "ix_payments_created_at_id"),
+])
+@pytest.mark.parametrize("params", [{}, {"cursor": CURSOR}])
+def test_admin_listings_page_through_the_created_at_index(client, admin_headers, path, table, index, params):
+    with captured_statements() as statements:
+        response = client.get(path, params=params, headers=admin_headers)
+    assert response.status_code == 200
+    plan = query_plan(statements, f"FROM {table}", f"ORDER BY {table}.created_at DESC")
+    assert_uses_index(plan, table, index)
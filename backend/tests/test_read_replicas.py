@@ -0,0 +1,73 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.database import AsyncSessionLocal, SessionLocal, read_replicas
+from app.core.read_replicas import STICKY_COOKIE, ReadReplicaRouter, Replica
+from app.models.movie import Movie
+
+def test_cookie_pins_reads_in_another_process():
+    writer = ReadReplicaRouter([Replica("replica-0", None, None)], sticky_seconds=5, retry_seconds=30)
+    reader = ReadReplicaRouter([Replica("replica-0", None, None)], sticky_seconds=5, retry_seconds=30)
+
+    sticky_until = writer.mark_write(7)
+    assert writer.candidates(7) == []
+    # The other process has no record of the write, only the client's cookie
+    assert len(reader.candidates(7)) == 1
+    assert reader.candidates(7, sticky_until) == []
+    assert reader.candidates(None, sticky_until) == []
+
+    # Expired or implausibly distant cookies are ignored
+    assert len(reader.candidates(7, time.time() - 1)) == 1
+    assert len(reader.candidates(7, time.time() + 3600)) == 1
+
+@pytest.fixture
+def replica(monkeypatch):
+    # A "replica" that is the primary itself, enough to exercise the routing
+    monkeypatch.setattr(read_replicas, "replicas", [Replica("replica-0", SessionLocal, AsyncSessionLocal)])
+
+def test_writes_set_the_sticky_cookie(client, admin_headers, db, replica):
+    movie_id = db.query(Movie.id).order_by(Movie.id).first()[0]
+    try:
+        response = client.put(f"/v1/api/movies/{movie_id}/rating", json={"score": 8}, headers=admin_headers)
+        assert response.status_code == 200
+        assert STICKY_COOKIE in response.cookies
+
+        # Served by a worker that didn't see the write
+        read_replicas._recent_writers.clear()
+        sticky_reads = read_replicas.sticky_reads
+        assert client.get("/v1/api/payments/my", headers=admin_headers).status_code == 200
+        assert read_replicas.sticky_reads == sticky_reads + 1
+
+        client.cookies.clear()
+        assert client.get("/v1/api/payments/my", headers=admin_headers).status_code == 200
+        assert read_replicas.sticky_reads == sticky_reads + 1
+    finally:
+        client.cookies.clear()
+
+def test_sticky_cookie_round_trips_to_another_worker(client, admin_headers, db, replica):
+    from app.main import app
+
+    movie_id = db.query(Movie.id).order_by(Movie.id).first()[0]
+    # The frontend calls the API cross-origin with credentials
+    origin = {"Origin": "http://localhost:5173"}
+    try:
+        response = client.put(
+            f"/v1/api/movies/{movie_id}/rating", json={"score": 7}, headers={**admin_headers, **origin}
+        )
+        assert response.status_code == 200
+        assert response.headers["access-control-allow-origin"] == origin["Origin"]
+        assert response.headers["access-control-allow-credentials"] == "true"
+        set_cookie = response.headers["set-cookie"]
+        assert "HttpOnly" in set_cookie and "SameSite=lax" in set_cookie and "Path=/" in set_cookie
+
+        # The browser replays the cookie to a worker that didn't see the write
+        read_replicas._recent_writers.clear()
+        sticky_reads = read_replicas.sticky_reads
+        other_worker = TestClient(app, cookies=client.cookies)
+        response = other_worker.get("/v1/api/payments/my", headers={**admin_headers, **origin})
+        assert response.status_code == 200
+        assert read_replicas.sticky_reads == sticky_reads + 1
+    finally:
+        client.cookies.clear()
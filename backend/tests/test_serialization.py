@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.serialization import RowSerializer
+from app.models.movie import Movie
+from app.models.payment import Payment
+from app.models.watch import WatchProgress
+from app.schemas.movie import Movie as MovieSchema, MovieCard
+from app.schemas.payment import Payment as PaymentSchema
+from app.schemas.watch import ContinueWatchingItem
+
+def movie_row(serializer, **values):
+    row = {name: None for name in serializer.fields}
+    row.update({"id": 1, "title": "Row", "created_at": datetime(2024, 5, 1, tzinfo=timezone.utc), **values})
+    return tuple(row[name] for name in serializer.fields)
+
+def test_datetimes_are_utc_in_the_pydantic_format():
+    serializer = RowSerializer.for_schema(MovieSchema, Movie)
+    created_at = datetime(2024, 5, 1, 12, 30, 0, 250000, tzinfo=timezone.utc)
+    row = movie_row(serializer, created_at=created_at, updated_at=created_at.replace(microsecond=0), user_rating_count=0)
+    item = serializer.payload([row])[0]
+    expected = MovieSchema.model_validate(dict(zip(serializer.fields, row))).model_dump(mode="json")
+    assert item["created_at"] == expected["created_at"] == "2024-05-01T12:30:00.250000Z"
+    assert item["updated_at"] == expected["updated_at"] == "2024-05-01T12:30:00Z"
+
+    # Naive values, as SQLite returns them, are UTC; other zones are converted
+    naive = movie_row(serializer, created_at=datetime(2024, 5, 1, 12, 30))
+    offset = movie_row(serializer, created_at=datetime(2024, 5, 1, 14, 30, tzinfo=timezone(timedelta(hours=2))))
+    assert [item["created_at"] for item in serializer.payload([naive, offset])] == ["2024-05-01T12:30:00Z"] * 2
+
+def test_null_columns_take_schema_defaults():
+    serializer = RowSerializer.for_schema(MovieSchema, Movie)
+    item = serializer.payload([movie_row(serializer)])[0]
+    assert item["user_rating_count"] == 0
+    assert item["is_transcoded"] is False
+    assert item["transcoding_status"] == "NOT_STARTED"
+    assert item["rating"] == 0.0
+    # Fields without a default, or defaulting to None, stay null
+    assert item["updated_at"] is None
+    assert item["description"] is None
+
+    payment = RowSerializer.for_schema(PaymentSchema, Payment)
+    row = {name: None for name in payment.fields}
+    row.update(id=1, user_id=1, amount=199.0, created_at=datetime(2024, 5, 1))
+    item = payment.payload([tuple(row[name] for name in payment.fields)])[0]
+    assert (item["currency"], item["status"]) == ("INR", "pending")
+
+def test_projections_keep_the_conversions():
+    serializer = RowSerializer.for_schema(MovieSchema, Movie).only({"id", "created_at", "rating"})
+    assert set(serializer.fields) == {"id", "created_at", "rating"}
+    row = {"id": 1, "rating": None, "created_at": datetime(2024, 5, 1)}
+    item = serializer.payload([tuple(row[name] for name in serializer.fields)])[0]
+    assert item == {"id": 1, "rating": 0.0, "created_at": "2024-05-01T00:00:00Z"}
+
+def test_projections_of_nested_serializers():
+    serializer = RowSerializer.for_schema(ContinueWatchingItem, WatchProgress, movie=(MovieCard, Movie))
+    projection = serializer.only({"movie_id", "movie"})
+    assert [column.key for column in projection.columns] == [
+        "movie_id", "movie__id", "movie__title", "movie__poster_url", "movie__rating",
+    ]
+    assert projection.payload([(7, 7, "Nested", None, None)]) == [
+        {"movie_id": 7, "movie": {"id": 7, "title": "Nested", "poster_url": None, "rating": 0.0}},
+    ]
+    with pytest.raises(ValueError, match="Unknown fields: position_ms"):
+        serializer.only({"movie_id", "position_ms"})
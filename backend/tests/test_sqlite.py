@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, event, func, insert, select, text
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.core.sqlite import _writer_lock, configure_sqlite_engine
+
+# Scratch table, kept out of the app's metadata
+writes = Table(
+    "test_sqlite_writes",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("writer", String, nullable=False),
+)
+writes.create(engine, checkfirst=True)
+
+async def write_async(writer: str, count: int = 1) -> None:
+    async with AsyncSessionLocal() as db:
+        for _ in range(count):
+            await db.execute(insert(writes).values(writer=writer))
+        await db.commit()
+
+def run(scenario) -> None:
+    async def main():
+        try:
+            await scenario()
+        finally:
+            # aiosqlite connections belong to this loop; close them with it
+            await async_engine.dispose()
+
+    asyncio.run(main())
+
+def write_sync(writer: str, count: int = 1) -> None:
+    with SessionLocal() as db:
+        for _ in range(count):
+            db.execute(insert(writes).values(writer=writer))
+        db.commit()
+
+def test_async_writers_queue_behind_sync_writers():
+    async def scenario():
+        lags = []
+
+        async def ticker():
+            while True:
+                started = time.monotonic()
+                await asyncio.sleep(0.01)
+                lags.append(time.monotonic() - started - 0.01)
+
+        async with AsyncSessionLocal() as db:
+            # An SQLite busy wait this short would fail the write below
+            await db.execute(text("PRAGMA busy_timeout=50"))
+            with SessionLocal() as sync_db:
+                sync_db.execute(insert(writes).values(writer="holder"))
+                assert _writer_lock.locked()
+
+                waiting = asyncio.create_task(db.execute(insert(writes).values(writer="queued")))
+                ticking = asyncio.create_task(ticker())
+                await asyncio.sleep(0.3)
+                assert not waiting.done()
+                sync_db.commit()
+
+            await asyncio.wait_for(waiting, 5)
+            await db.commit()
+            ticking.cancel()
+            await db.execute(text(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}"))
+
+        # The loop kept running while the async writer waited
+        assert max(lags) < 0.1
+
+    run(scenario)
+    assert not _writer_lock.locked()
+
+def test_concurrent_sync_and_async_writes():
+    async def scenario():
+        await asyncio.gather(
+            *(asyncio.to_thread(write_sync, f"sync-{n}", 20) for n in range(4)),
+            *(write_async(f"async-{n}", 20) for n in range(4)),
+        )
+
+    run(scenario)
+    assert not _writer_lock.locked()
+    with SessionLocal() as db:
+        counts = dict(db.execute(
+            select(writes.c.writer, func.count()).where(writes.c.writer.like("%sync-%")).group_by(writes.c.writer)
+        ).all())
+    assert counts == {f"{kind}-{n}": 20 for kind in ("sync", "async") for n in range(4)}
+
+def test_writer_lock_is_held_until_commit_returns():
+    slow_engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False})
+    events = []
+
+    # Stretch the DBAPI COMMIT itself so a writer getting in early would show
+    do_commit = slow_engine.dialect.do_commit
+
+    def slow_commit(dbapi_connection):
+        events.append(f"{threading.current_thread().name} commit started")
+        time.sleep(0.2)
+        do_commit(dbapi_connection)
+        events.append(f"{threading.current_thread().name} commit finished")
+
+    slow_engine.dialect.do_commit = slow_commit
+    configure_sqlite_engine(slow_engine, serialize_writes=True)
+
+    # Registered after the lock listener, so this runs once a writer holds the lock
+    @event.listens_for(slow_engine, "before_cursor_execute")
+    def _record_write(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT"):
+            events.append(f"{threading.current_thread().name} write")
+
+    def write(writer: str) -> None:
+        with slow_engine.begin() as conn:
+            conn.execute(insert(writes).values(writer=writer))
+
+    try:
+        with slow_engine.connect() as conn:
+            conn.execute(insert(writes).values(writer="first"))
+            second = threading.Thread(target=write, args=("second",), name="second")
+            second.start()
+            time.sleep(0.05)
+            conn.commit()
+        second.join(5)
+    finally:
+        slow_engine.dispose()
+
+    first = threading.current_thread().name
+    assert events == [
+        f"{first} write",
+        f"{first} commit started",
+        f"{first} commit finished",
+        "second write",
+        "second commit started",
+        "second commit finished",
+    ]
+    assert not _writer_lock.locked()
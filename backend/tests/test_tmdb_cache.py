@@ -0,0 +1,49 @@
+import asyncio
+import threading
+
+from app.core.tmdb_cache import TMDBCache
+
+def make_cache(path, max_size=10):
+    return TMDBCache(max_size=max_size, ttl_seconds=60, negative_ttl_seconds=5, path=str(path))
+
+def test_disk_tier_stays_off_the_event_loop(tmp_path, monkeypatch):
+    path = tmp_path / "tmdb_cache.db"
+    disk_threads = []
+
+    async def scenario():
+        loop_thread = threading.current_thread()
+        writer = make_cache(path)
+        await writer.set("details:1", {"title": "Cached"})
+        await writer.set("search:nothing", [])
+
+        # A fresh process finds the entries on disk, then in memory
+        reader = make_cache(path)
+        lookup_disk = reader._lookup_disk
+
+        def record_thread(*args):
+            disk_threads.append(threading.current_thread())
+            return lookup_disk(*args)
+
+        monkeypatch.setattr(reader, "_lookup_disk", record_thread)
+        assert await reader.get("details:1") == (True, {"title": "Cached"})
+        assert await reader.get("details:1") == (True, {"title": "Cached"})
+        assert await reader.get("search:nothing") == (True, [])
+        assert await reader.get("details:2") == (False, None)
+        assert loop_thread not in disk_threads
+        return reader.stats()
+
+    stats = asyncio.run(scenario())
+    assert len(disk_threads) == 3
+    assert (stats["memory_hits"], stats["disk_hits"], stats["negative_hits"], stats["misses"]) == (1, 2, 1, 1)
+
+def test_memory_only_without_a_file():
+    async def scenario():
+        cache = TMDBCache(max_size=1, ttl_seconds=60, negative_ttl_seconds=5, path="")
+        await cache.set("details:1", {"title": "First"})
+        await cache.set("details:2", {"title": "Second"})
+        return await cache.get("details:1"), await cache.get("details:2"), cache.stats()
+
+    first, second, stats = asyncio.run(scenario())
+    assert first == (False, None)
+    assert second == (True, {"title": "Second"})
+    assert (stats["evictions"], stats["path"]) == (1, None)
@@ -0,0 +1,96 @@
+import asyncio
+from collections import Counter
+
+import httpx
+from sqlalchemy import select
+
+from app.models.movie import Movie, movie_similarities
+from app.services import tmdb_enrichment
+from app.services.tmdb_enrichment import TMDBClient, enrich_movies
+
+def details(tmdb_id, title):
+    return {
+        "id": tmdb_id,
+        "title": title,
+        "overview": f"{title}, as told by the stub",
+        "release_date": "1999-03-31",
+        "runtime": 136,
+        "genres": [{"name": "Science Fiction"}, {"name": "Action"}],
+        "credits": {
+            "crew": [{"name": "Stub Director", "job": "Director"}],
+            "cast": [{"name": "First Actor"}, {"name": "Second Actor"}],
+        },
+        "poster_path": "/poster.jpg",
+        "vote_average": 8.2,
+    }
+
+class StubTMDB:
+    """TMDB stand-in: answers by path and records every request"""
+
+    def __init__(self):
+        self.calls = Counter()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path.removeprefix("/3")
+        self.calls[path] += 1
+        calls = self.calls[path]
+        if path == "/search/movie":
+            if calls == 1:
+                return httpx.Response(429, headers={"Retry-After": "0"})
+            assert request.url.params["query"] == "Stub Matrix"
+            return httpx.Response(200, json={"results": [{"id": 901, "title": "Stub Matrix"}]})
+        if path == "/movie/901":
+            if calls == 1:
+                return httpx.Response(503)
+            return httpx.Response(200, json=details(901, "Stub Matrix"))
+        if path == "/movie/902":
+            return httpx.Response(404, json={"status_message": "The resource you requested could not be found."})
+        if path == "/movie/903":
+            return httpx.Response(500)
+        if path == "/movie/904":
+            return httpx.Response(200, json=details(904, "Stub Sequel"))
+        raise AssertionError(f"unexpected request {request.url}")
+
+def test_enrich_movies_against_a_stub(db, monkeypatch):
+    monkeypatch.setattr(tmdb_enrichment, "BACKOFF_SECONDS", 0.0)
+    matched = Movie(title="Stub Matrix")
+    missing = Movie(title="Stub Missing", tmdb_id=902)
+    broken = Movie(title="Stub Broken", tmdb_id=903, description="Kept as is")
+    db.add_all([matched, missing, broken])
+    db.commit()
+
+    stub = StubTMDB()
+    client = TMDBClient(
+        api_key="test",
+        base_url="https://tmdb.test/3",
+        requests_per_second=0,
+        max_retries=2,
+        transport=httpx.MockTransport(stub),
+    )
+    summary = asyncio.run(enrich_movies(
+        movie_ids=[matched.id, missing.id, broken.id],
+        tmdb_ids=[904],
+        client=client,
+    ))
+
+    # 429 with Retry-After and 503 are retried; 404 isn't; 500 gives up after max_retries
+    assert stub.calls == {"/search/movie": 2, "/movie/901": 2, "/movie/902": 1, "/movie/903": 3, "/movie/904": 1}
+    assert (summary["requests"], summary["retries"], summary["throttled"]) == (9, 4, 1)
+    assert (summary["updated"], summary["created"], summary["unchanged"]) == (1, 1, 0)
+    assert summary["not_found"] == [{"movie_id": missing.id, "tmdb_id": 902}]
+    assert [(failure["movie_id"], failure["tmdb_id"]) for failure in summary["failed"]] == [(broken.id, 903)]
+
+    # Written back to the movie rows
+    db.expire_all()
+    assert (matched.tmdb_id, matched.release_year, matched.duration, matched.rating) == (901, 1999, 136, 8.2)
+    assert (matched.genre, matched.director, matched.cast) == ("Science Fiction, Action", "Stub Director", "First Actor, Second Actor")
+    assert broken.description == "Kept as is"
+    created = db.scalar(select(Movie).where(Movie.tmdb_id == 904))
+    assert (created.title, created.release_year) == ("Stub Sequel", 1999)
+
+    # Both are now in each other's similar movies, same genres and people
+    similar = set(db.execute(
+        select(movie_similarities.c.movie_id, movie_similarities.c.similar_movie_id)
+        .where(movie_similarities.c.movie_id.in_([matched.id, created.id]))
+    ).all())
+    assert {(matched.id, created.id), (created.id, matched.id)} <= similar
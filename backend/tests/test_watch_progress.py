@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from sqlalchemy import select, update
+
+from app.core.utils import get_utc_now
+from app.models.movie import Movie
+from app.models.user import User
+from app.models.watch import WatchProgress
+from app.services.watch_progress import watch_progress_buffer
+
+def test_progress_and_continue_watching_share_utc_timestamps(client, admin_headers, db):
+    movie_id = db.query(Movie.id).order_by(Movie.id).first()[0]
+    response = client.put(f"/v1/api/movies/{movie_id}/progress", json={"position": 120}, headers=admin_headers)
+    assert response.status_code == 202
+
+    progress = client.get(f"/v1/api/movies/{movie_id}/progress", headers=admin_headers).json()
+    feed = client.get("/v1/api/users/me/continue-watching", headers=admin_headers).json()
+    entry = next(item for item in feed if item["movie_id"] == movie_id)
+
+    assert entry["position"] == progress["position"] == 120
+    assert progress["updated_at"].endswith("Z")
+    assert entry["updated_at"] == progress["updated_at"]
+
+    # Read back from the database once flushed, the timestamp keeps its format
+    assert client.get(f"/v1/api/movies/{movie_id}/progress", headers=admin_headers).json() == progress
+
+def continue_watching(client, headers):
+    response = client.get("/v1/api/users/me/continue-watching", headers=headers)
+    assert response.status_code == 200, response.text
+    return [(item["movie_id"], item["position"]) for item in response.json()]
+
+def test_continue_watching_merges_pending_progress_without_flushing(client, admin_headers, create_movie, db):
+    admin_id = db.scalar(select(User.id).where(User.email == "admin@example.com"))
+    watch_progress_buffer.flush()
+    stored, finished, fresh = (create_movie(title=f"Resume {name}")["id"] for name in ("stored", "finished", "fresh"))
+    for movie_id, position in ((stored, 10), (finished, 20)):
+        client.put(f"/v1/api/movies/{movie_id}/progress", json={"position": position}, headers=admin_headers)
+    watch_progress_buffer.flush(admin_id)
+
+    client.put(f"/v1/api/movies/{stored}/progress", json={"position": 30}, headers=admin_headers)
+    client.put(f"/v1/api/movies/{finished}/progress", json={"position": 40, "completed": True}, headers=admin_headers)
+    client.put(f"/v1/api/movies/{fresh}/progress", json={"position": 50}, headers=admin_headers)
+    feed = continue_watching(client, admin_headers)
+    assert feed[:2] == [(fresh, 50), (stored, 30)]
+    assert finished not in [movie_id for movie_id, _ in feed]
+    assert len(watch_progress_buffer.get_user(admin_id)) == 3
+    assert continue_watching(client, admin_headers)[:1] == [(fresh, 50)]
+
+    # Progress another worker wrote after this process's pending update wins
+    db.execute(
+        update(WatchProgress)
+        .where(WatchProgress.user_id == admin_id, WatchProgress.movie_id == stored)
+        .values(position=90, updated_at=get_utc_now() + timedelta(minutes=1))
+    )
+    db.commit()
+    assert continue_watching(client, admin_headers)[:2] == [(stored, 90), (fresh, 50)]
+
+    watch_progress_buffer.flush(admin_id)
+    assert continue_watching(client, admin_headers)[:2] == [(stored, 90), (fresh, 50)]
+    response = client.get("/v1/api/users/me/continue-watching", params={"limit": 1}, headers=admin_headers)
+    assert [item["movie_id"] for item in response.json()] == [stored]
+    for movie_id in (stored, finished, fresh):
+        client.delete(f"/v1/api/movies/{movie_id}", headers=admin_headers)
@@ -107,8 +107,10 @@ const MOCK_ADMIN_USER = {
 };
 
 // Create axios instance with base URL
+// Send cookies cross-origin so the API's read-your-writes cookie comes back
 const api = axios.create({
   baseURL: API_URL,
+  withCredentials: true,
   headers: {
     'Content-Type': 'application/json',
   },
@@ -895,7 +897,17 @@ export const paymentService = {
         }, 500);
       });
     }
-    return api.post('/payments/verify', paymentData);
+    const response = await api.post('/payments/verify', paymentData);
+
+    // Refresh the access token so it carries the new subscription entitlement
+    try {
+      const tokenResponse = await api.post('/login/refresh');
+      localStorage.setItem('token', tokenResponse.data.access_token);
+    } catch (error) {
+      console.error('Failed to refresh access token after payment:', error);
+    }
+
+    return response;
   },
 
   getMyPayments: async () => {